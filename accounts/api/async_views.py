@@ -0,0 +1,61 @@
+"""
+Асинхронный эндпоинт публичного профиля преподавателя (ASGI)
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+
+from accounts.api.serializers import ProfileSerializer
+from accounts.models import Achievement, Education, Profile, WorkExperience
+from core.api.asynchronous import async_api_view, json_response
+from courses.models import Course
+
+
+async def _values(queryset, *fields):
+    return [row async for row in queryset.values(*fields)]
+
+
+def _serialize_profile(request, profile):
+    return ProfileSerializer(profile, context={'request': request}).data
+
+
+@async_api_view
+async def teacher_profile(request, custom_url):
+    """Профиль преподавателя с курсами, образованием, опытом и достижениями"""
+    profile = await Profile.objects.select_related('user').aget(
+        custom_url=custom_url,
+        user__role='teacher'
+    )
+    user_id = profile.user_id
+
+    data, courses, education, experience, achievements = await asyncio.gather(
+        sync_to_async(_serialize_profile)(request, profile),
+        _values(
+            Course.objects.filter(
+                user_roles__user_id=user_id,
+                user_roles__role='teacher',
+                status='published'
+            ).distinct().order_by('-created_at'),
+            'id', 'title', 'slug', 'excerpt', 'price', 'currency', 'average_rating', 'students_count'
+        ),
+        _values(
+            Education.objects.filter(user_id=user_id),
+            'institution', 'degree', 'field_of_study', 'start_date', 'end_date'
+        ),
+        _values(
+            WorkExperience.objects.filter(user_id=user_id),
+            'company', 'position', 'start_date', 'end_date'
+        ),
+        _values(
+            Achievement.objects.filter(user_id=user_id),
+            'title', 'description', 'date'
+        ),
+    )
+    return json_response({
+        **data,
+        'custom_url': profile.custom_url,
+        'courses': courses,
+        'education': education,
+        'work_experience': experience,
+        'achievements': achievements,
+    })
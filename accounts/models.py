@@ -33,6 +33,8 @@ class User(AbstractUser):
     phone = models.CharField('Телефон', max_length=15, blank=True)
     role = models.CharField('Роль', max_length=20, choices=ROLES, default='student')
     is_verified = models.BooleanField('Верифицирован', default=False)
+    # Увеличивается при отзыве токенов: токены со старой версией перестают приниматься
+    token_version = models.PositiveIntegerField('Версия токенов', default=0)
     created_at = models.DateTimeField('Дата создания', auto_now_add=True)
     updated_at = models.DateTimeField('Дата обновления', auto_now=True)
     
@@ -52,6 +54,13 @@ class User(AbstractUser):
     def __str__(self):
         return self.email
 
+    def revoke_tokens(self):
+        """Отзывает все выданные JWT токены пользователя"""
+        # save() вместо update(), чтобы сработали сигналы инвалидации кэша принципалов
+        self.token_version = models.F('token_version') + 1
+        self.save(update_fields=['token_version'])
+        self.refresh_from_db(fields=['token_version'])
+
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     avatar = models.ImageField('Фото', upload_to='avatars/', null=True, blank=True)
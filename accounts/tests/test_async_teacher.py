@@ -0,0 +1,38 @@
+import pytest
+from django.urls import reverse
+from accounts.models import Education, User
+from courses.models import Category, Course, CourseUserRole
+
+
+@pytest.mark.django_db
+class TestAsyncTeacherProfile:
+    def test_teacher_profile(self, client):
+        """Тест профиля преподавателя с курсами и образованием"""
+        teacher = User.objects.create_user(
+            email='teacher@example.com', password='testpass123', role='teacher',
+            first_name='Aibek', last_name='Sadykov'
+        )
+        category = Category.objects.create(name='Programming', slug='programming')
+        course = Course.objects.create(
+            title='Python', slug='python', description='Описание', category=category, status='published'
+        )
+        CourseUserRole.objects.create(course=course, user=teacher, role='teacher')
+        Education.objects.create(
+            user=teacher, institution='КНУ', degree='Бакалавр', field_of_study='Информатика',
+            start_date='2010-09-01'
+        )
+
+        response = client.get(reverse('async_api:teacher-profile', args=[teacher.profile.custom_url]))
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data['user']['email'] == teacher.email
+        assert [item['slug'] for item in data['courses']] == ['python']
+        assert data['education'][0]['institution'] == 'КНУ'
+
+    def test_student_has_no_teacher_profile(self, client):
+        student = User.objects.create_user(email='student@example.com', password='testpass123')
+        student.profile.custom_url = 'student'
+        student.profile.save()
+
+        assert client.get(reverse('async_api:teacher-profile', args=['student'])).status_code == 404
@@ -2,6 +2,8 @@ from rest_framework import viewsets, permissions
 from courses.models import CourseAnalytics
 from .serializers import CourseAnalyticsSerializer
 from core.api.base import CachedViewSetMixin
+from courses.permissions import HasCoursePermission
+from courses.services.permissions import CoursePermissionService
 
 class CourseAnalyticsViewSet(CachedViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """
@@ -9,7 +11,8 @@ class CourseAnalyticsViewSet(CachedViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """
     queryset = CourseAnalytics.objects.all()
     serializer_class = CourseAnalyticsSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, HasCoursePermission]
+    required_course_permission = 'can_view_analytics'
     lookup_field = 'course__slug'
     
     def get_queryset(self):
@@ -22,9 +25,7 @@ class CourseAnalyticsViewSet(CachedViewSetMixin, viewsets.ReadOnlyModelViewSet):
         if user.is_staff:
             return queryset
             
-        # Для преподавателей показываем только их курсы
-        if hasattr(user, 'teacher_profile'):
-            return queryset.filter(course__teacher=user.teacher_profile)
-            
-        # Для остальных пользователей показываем только купленные курсы
-        return queryset.filter(course__students=user)
+        # Для преподавателей и продюсеров - курсы с правом просмотра аналитики
+        return queryset.filter(
+            course_id__in=CoursePermissionService.get_course_ids(user, 'can_view_analytics')
+        )
@@ -0,0 +1,123 @@
+"""
+Сравнение пропускной способности синхронного DRF API и асинхронных
+эндпоинтов (/api/async/) под конкурентной нагрузкой.
+
+Запросы идут через ASGI-обработчик Django в процессе (AsyncClient):
+синхронные представления выполняются так же, как под ASGI-сервером -
+в потоке через sync_to_async. Данные создаются во временной тестовой БД.
+
+Запуск: python benchmarks/bench_async_views.py [--courses 50] [--requests 400] [--concurrency 20]
+Кэш ответа каталога асинхронного API по умолчанию отключен, чтобы сравнение
+было честным; --warm-cache включает его.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ustat.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.cache import cache  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import AsyncClient  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from accounts.models import User  # noqa: E402
+from courses.api import async_views  # noqa: E402
+from courses.models import Category, Course, CourseUserRole, Review, Tag  # noqa: E402
+
+
+def seed(count):
+    category = Category.objects.create(name='Programming', slug='programming')
+    tags = [Tag.objects.create(name=f'tag-{i}', slug=f'tag-{i}') for i in range(5)]
+    teacher = User.objects.create_user(email='teacher@example.com', password='x', role='teacher')
+    students = [User.objects.create_user(email=f'student{i}@example.com', password='x') for i in range(10)]
+    for i in range(count):
+        course = Course.objects.create(
+            title=f'Курс {i}', slug=f'course-{i}', description='Описание курса ' * 20,
+            category=category, status='published', rank_score=count - i
+        )
+        course.tags.set(tags[:3])
+        CourseUserRole.objects.create(course=course, user=teacher, role='teacher', is_primary=True)
+        for student in students[:5]:
+            Review.objects.create(course=course, user=student, rating=5, text='Отличный курс')
+
+
+async def run(urls, total, concurrency):
+    client = AsyncClient()
+    latencies = []
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(urls[i % len(urls)])
+
+    async def worker():
+        while not queue.empty():
+            url = queue.get_nowait()
+            started = time.perf_counter()
+            response = await client.get(url)
+            latencies.append(time.perf_counter() - started)
+            assert response.status_code == 200, (url, response.status_code)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'rps': round(total / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 2),
+        'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--courses', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--warm-cache', action='store_true', help='кэшировать страницы каталога')
+    parser.add_argument('--json', action='store_true', help='вывести результат в JSON')
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        seed(args.courses)
+        cache.clear()
+        if not args.warm_cache:
+            async_views.CATALOG_CACHE_TIMEOUT = 0
+
+        slugs = [f'course-{i}' for i in range(args.courses)]
+        scenarios = [
+            ('catalog list', 'sync', ['/api/courses/courses/']),
+            ('catalog list', 'async', ['/api/async/courses/']),
+            ('course detail', 'sync', [f'/api/courses/courses/{slug}/' for slug in slugs]),
+            ('course detail', 'async', [f'/api/async/courses/{slug}/' for slug in slugs]),
+        ]
+        results = []
+        for name, kind, urls in scenarios:
+            # Прогрев: кэш преподавателей и соединение с БД
+            asyncio.run(run(urls, len(urls), 1))
+            stats = asyncio.run(run(urls, args.requests, args.concurrency))
+            results.append({'endpoint': name, 'api': kind, **stats})
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+
+    print(f"{'endpoint':<16}{'api':<8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for row in results:
+        print(f"{row['endpoint']:<16}{row['api']:<8}{row['rps']:>10}{row['p50_ms']:>10}{row['p95_ms']:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Сравнение pickle моделей и core.codec для закэшированных списков курсов
+и преподавателей: размер данных и время декодирования.
+
+Запуск: python benchmarks/bench_cache_codec.py [--courses 10] [--repeat 2000]
+База данных не нужна: экземпляры моделей создаются в памяти.
+"""
+import argparse
+import json
+import os
+import pickle
+import sys
+import timeit
+from datetime import timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ustat.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.utils import timezone  # noqa: E402
+from accounts.models import Profile, User  # noqa: E402
+from core import codec  # noqa: E402
+from courses.models import Course, CourseUserRole  # noqa: E402
+from courses.services.course_manager import COURSE_SCHEMA  # noqa: E402
+from courses.services.teachers import PRIMARY_TEACHER_SCHEMA  # noqa: E402
+
+
+def make_courses(count):
+    """Курсы в том виде, в котором они приходят из БД"""
+    now = timezone.now()
+    values = []
+    for i in range(count):
+        course = Course(
+            id=i + 1,
+            title=f'Курс по программированию на Python, часть {i}',
+            slug=f'python-course-{i}',
+            description='<p>Подробное описание курса с примерами кода.</p>' * 5,
+            excerpt='Краткое описание курса для карточки в каталоге',
+            category_id=1,
+            price=Decimal('1990.00'),
+            status='published',
+            published_at=now - timedelta(days=i),
+            rank_score=1.0 / (i + 1),
+            average_rating=Decimal('4.75'),
+        )
+        values.append([getattr(course, field) for field in COURSE_SCHEMA.fields])
+    return [Course.from_db('default', COURSE_SCHEMA.fields, row) for row in values]
+
+
+def make_primary_teacher():
+    user = User.from_db('default', ['id', 'email', 'first_name', 'last_name', 'role', 'is_verified', 'is_active'],
+                        [1, 'teacher@example.com', 'Айбек', 'Садыков', 'teacher', True, True])
+    profile = Profile(id=1, user_id=1, bio='Преподаватель с десятилетним опытом' * 3, language='ru')
+    profile._state.adding = False
+    user.profile = profile
+    role = CourseUserRole(id=1, course_id=1, user_id=1, role='teacher', is_primary=True,
+                          permissions=CourseUserRole.DEFAULT_PERMISSIONS['teacher'], added_at=timezone.now())
+    role._state.adding = False
+    role.user = user
+    return [role]
+
+
+def measure(name, value, schema, repeat):
+    pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+    packed = codec.pack(schema, value, many=True)
+    pickle_time = timeit.timeit(lambda: pickle.loads(pickled), number=repeat) / repeat
+    codec_time = timeit.timeit(lambda: codec.unpack(schema, packed, many=True), number=repeat) / repeat
+    return {
+        'payload': name,
+        'pickle_bytes': len(pickled),
+        'codec_bytes': len(packed),
+        'pickle_decode_us': round(pickle_time * 1e6, 1),
+        'codec_decode_us': round(codec_time * 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--courses', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=2000)
+    parser.add_argument('--json', action='store_true', help='вывести результат в JSON')
+    args = parser.parse_args()
+
+    results = [
+        measure(f'popular_courses ({args.courses})', make_courses(args.courses), COURSE_SCHEMA, args.repeat),
+        measure('course_primary_teacher', make_primary_teacher(), PRIMARY_TEACHER_SCHEMA, args.repeat),
+    ]
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+
+    print(f"{'payload':<28}{'pickle B':>10}{'codec B':>10}{'pickle us':>12}{'codec us':>12}")
+    for row in results:
+        print(f"{row['payload']:<28}{row['pickle_bytes']:>10}{row['codec_bytes']:>10}"
+              f"{row['pickle_decode_us']:>12}{row['codec_decode_us']:>12}")
+
+
+if __name__ == '__main__':
+    main()
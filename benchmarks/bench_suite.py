@@ -0,0 +1,197 @@
+"""
+Набор бенчмарков горячих эндпоинтов и задач Celery: перцентили задержки,
+число SQL-запросов и пик выделенной памяти на вызов.
+
+По умолчанию создается временная тестовая БД, в нее генерируется набор
+данных (generate_scale_data, тот же seed - те же данные), после прогона
+БД удаляется. С --existing-db бенчмарк идет по уже сгенерированным данным
+в настроенной БД; сценарии записи и задачи откатываются после каждого вызова.
+
+Запуск:
+    python benchmarks/bench_suite.py [--scale small] [--iterations 30] [--only catalog]
+    python benchmarks/bench_suite.py --update-baseline  # сохранить базовую линию
+
+Результаты пишутся в benchmarks/results/latest.json и сравниваются
+с benchmarks/baselines/<scale>.json; при регрессии код выхода 1.
+Задержки зависят от машины: базовую линию стоит обновлять на той же машине,
+где идет сравнение (например, на CI-раннере).
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ustat.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.cache import cache  # noqa: E402
+from django.test import Client  # noqa: E402
+from accounts.models import User  # noqa: E402
+from courses import tasks  # noqa: E402
+from courses.models import Course, Enrollment, Review  # noqa: E402
+from core.scale_data import SCALES  # noqa: E402
+from ustat.celery import app as celery_app  # noqa: E402
+
+from harness import (  # noqa: E402
+    Scenario, benchmark_database, compare, get_meta, load_results, measure, write_results
+)
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Параметры запросов повторяются по кругу: набор не зависит от --iterations
+SEARCH_TERMS = ('Курс 1', 'Курс 2', 'Курс 3')
+
+
+def check_response(response):
+    assert 200 <= response.status_code < 300, (response.status_code, response.content[:200])
+
+
+def check_task(result):
+    assert result.get('status') == 'success', result
+
+
+def build_scenarios():
+    """Сценарии по данным в текущей БД"""
+    courses = list(
+        Course.objects.filter(status='published').order_by('id').values_list('id', 'slug')[:20]
+    )
+    if not courses:
+        raise SystemExit('В БД нет опубликованных курсов: сначала запустите generate_scale_data')
+
+    staff, _ = User.objects.get_or_create(email='bench-staff@example.com', defaults={'is_staff': True})
+    student, _ = User.objects.get_or_create(email='bench-student@example.com')
+    # Бенчмарк не должен упереться в уже существующие зачисление или отзыв
+    Enrollment.objects.filter(student=student).delete()
+    Review.objects.filter(user=student).delete()
+
+    anonymous = Client()
+    admin = Client()
+    admin.force_login(staff)
+
+    filtered = anonymous.get('/api/courses/courses/', {'difficulty': 'beginner'}).json()
+    pages = max(1, min(5, -(-filtered['count'] // 10)))
+
+    def slug(i):
+        return courses[i % len(courses)][1]
+
+    def course_id(i):
+        return courses[i % len(courses)][0]
+
+    return [
+        Scenario('catalog list', 'api', lambda i: anonymous.get('/api/courses/courses/'), check_response),
+        Scenario(
+            'catalog list page', 'api',
+            lambda i: anonymous.get('/api/courses/courses/', {'page': i % pages + 1, 'difficulty': 'beginner'}),
+            check_response
+        ),
+        Scenario('course detail', 'api', lambda i: anonymous.get(f'/api/courses/courses/{slug(i)}/'), check_response),
+        Scenario(
+            'search', 'api',
+            lambda i: anonymous.get('/api/courses/courses/', {'search': SEARCH_TERMS[i % len(SEARCH_TERMS)]}),
+            check_response
+        ),
+        Scenario(
+            'course analytics', 'api',
+            lambda i: admin.get(f'/api/analytics/course-analytics/{slug(i)}/'),
+            check_response
+        ),
+        Scenario('async catalog list', 'api', lambda i: anonymous.get('/api/async/courses/'), check_response),
+        # Эндпоинтов записи на курс и отзыва в API курсов нет: меряется путь
+        # через ORM вместе с сигналами счетчиков и рейтинга
+        Scenario(
+            'enrollment create', 'write',
+            lambda i: Enrollment.objects.create(student=student, course_id=course_id(i)),
+            rollback=True
+        ),
+        Scenario(
+            'review create', 'write',
+            lambda i: Review.objects.create(user=student, course_id=course_id(i), rating=i % 5 + 1, text='Отзыв'),
+            rollback=True
+        ),
+        Scenario(
+            'update_course_analytics', 'task',
+            lambda i: tasks.update_course_analytics(course_id(i)),
+            check_task, rollback=True
+        ),
+        Scenario(
+            'recalculate_course_ratings', 'task',
+            lambda i: tasks.recalculate_course_ratings(),
+            check_task, iterations=15, rollback=True
+        ),
+        Scenario(
+            'cleanup_old_analytics_logs', 'task',
+            lambda i: tasks.cleanup_old_analytics_logs(days=30),
+            check_task, iterations=15, rollback=True
+        ),
+    ]
+
+
+def run(args):
+    # Без брокера задачи выполняют все порции циклом, в замер попадает вся задача
+    celery_app.conf.task_always_eager = True
+    scenarios = build_scenarios()
+    if args.only:
+        scenarios = [s for s in scenarios if any(name in s.name or name == s.kind for name in args.only)]
+
+    results = []
+    for scenario in scenarios:
+        cache.clear()
+        row = measure(scenario, iterations=args.iterations, warmup=args.warmup)
+        results.append(row)
+        print(
+            f"{row['name']:<30}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}"
+            f"{row['queries']:>9}{row['peak_kb']:>11}",
+            flush=True
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', choices=list(SCALES), default='small')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--existing-db', action='store_true', help='не создавать тестовую БД')
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--only', action='append', help='только сценарии с подстрокой в имени или вида api/write/task')
+    parser.add_argument('--output', default=os.path.join(BENCH_DIR, 'results', 'latest.json'))
+    parser.add_argument('--baseline', help='файл базовой линии (по умолчанию baselines/<scale>.json)')
+    parser.add_argument('--threshold', type=float, default=0.3, help='допустимый относительный рост')
+    parser.add_argument('--update-baseline', action='store_true', help='записать результат как базовую линию')
+    args = parser.parse_args()
+    baseline_path = args.baseline or os.path.join(BENCH_DIR, 'baselines', f'{args.scale}.json')
+
+    with benchmark_database(args.scale, args.seed, existing=args.existing_db):
+        print(f"{'scenario':<30}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}{'peak KB':>11}")
+        results = run(args)
+        meta = get_meta(scale=args.scale, seed=args.seed, iterations=args.iterations)
+
+    write_results(args.output, meta, results)
+    print(f'Результаты: {args.output}')
+
+    if args.update_baseline:
+        write_results(baseline_path, meta, results)
+        print(f'Базовая линия обновлена: {baseline_path}')
+        return
+
+    if not os.path.exists(baseline_path):
+        print(f'Базовая линия {baseline_path} не найдена, сравнение пропущено')
+        return
+    baseline = load_results(baseline_path)
+    if baseline['meta'].get('scale') != args.scale:
+        print(f"Базовая линия снята на масштабе {baseline['meta'].get('scale')}, сравнение пропущено")
+        return
+    regressions = compare(results, baseline, threshold=args.threshold)
+    if regressions:
+        print('Регрессии относительно базовой линии:')
+        for line in regressions:
+            print(f'  {line}')
+        sys.exit(1)
+    print('Регрессий нет')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""
+Измерения для набора бенчмарков (bench_suite.py): перцентили задержки,
+число SQL-запросов и пик выделенной памяти на вызов, запись результатов
+в JSON и сравнение с сохраненной базовой линией.
+
+Задержка и ресурсы меряются в разных проходах: tracemalloc замедляет
+выполнение в разы и исказил бы время. Проход ресурсов всегда вызывает
+сценарий с номерами 0..resource_iterations-1, поэтому число запросов
+и память не зависят от --iterations.
+"""
+import io
+import json
+import os
+import platform
+import statistics
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import django
+from django.core.management import call_command
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+
+PERCENTILES = (50, 95, 99)
+
+# Разница меньше порогов считается шумом при любом относительном росте
+MIN_LATENCY_DELTA_MS = 5.0
+MIN_MEMORY_DELTA_KB = 64
+
+# Управление транзакциями сценариев с откатом в число запросов не входит
+TRANSACTION_STATEMENTS = ('BEGIN', 'SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK')
+
+
+@contextmanager
+def benchmark_database(scale, seed, existing=False):
+    """
+    Временная тестовая БД с набором данных generate_scale_data
+    (existing=True - настроенная БД с уже сгенерированными данными)
+    """
+    setup_test_environment()
+    if existing:
+        yield
+        return
+
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        call_command('generate_scale_data', scale=scale, seed=seed, stdout=io.StringIO())
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def percentile(values, pct):
+    """Перцентиль методом ближайшего ранга (values отсортированы)"""
+    index = max(0, min(len(values) - 1, round(pct / 100 * len(values) + 0.5) - 1))
+    return values[index]
+
+
+class Scenario:
+    """
+    Сценарий бенчмарка. run(i) выполняет одну операцию (i - номер вызова),
+    check(result) бросает AssertionError на неверном результате.
+    rollback=True откатывает каждый вызов (сценарии записи и задачи),
+    чтобы вызовы не влияли друг на друга и на данные.
+    """
+
+    def __init__(self, name, kind, run, check=None, iterations=None, rollback=False):
+        self.name = name
+        self.kind = kind
+        self.run = run
+        self.check = check
+        self.iterations = iterations
+        self.rollback = rollback
+
+    def call(self, index):
+        if not self.rollback:
+            started = time.perf_counter()
+            result = self.run(index)
+            return result, time.perf_counter() - started
+
+        with transaction.atomic():
+            started = time.perf_counter()
+            result = self.run(index)
+            elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+        return result, elapsed
+
+
+def measure(scenario, iterations=30, warmup=3, resource_iterations=5):
+    """Прогоняет сценарий и возвращает строку результата"""
+    iterations = scenario.iterations or iterations
+    index = 0
+
+    for _ in range(warmup):
+        result, _ = scenario.call(index)
+        index += 1
+        if scenario.check:
+            scenario.check(result)
+
+    latencies = []
+    for _ in range(iterations):
+        _, elapsed = scenario.call(index)
+        index += 1
+        latencies.append(elapsed * 1000)
+
+    queries, peaks = [], []
+    for index in range(min(resource_iterations, iterations)):
+        # Лог запросов ограничен по длине: переполненный лог дал бы 0 запросов
+        reset_queries()
+        tracemalloc.start()
+        try:
+            with CaptureQueriesContext(connection) as captured:
+                scenario.call(index)
+            peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+        finally:
+            tracemalloc.stop()
+        queries.append(sum(
+            not query['sql'].startswith(TRANSACTION_STATEMENTS) for query in captured.captured_queries
+        ))
+
+    latencies.sort()
+    row = {'name': scenario.name, 'kind': scenario.kind, 'iterations': iterations}
+    for pct in PERCENTILES:
+        row[f'p{pct}_ms'] = round(percentile(latencies, pct), 3)
+    row['mean_ms'] = round(statistics.fmean(latencies), 3)
+    row['queries'] = int(statistics.median(queries))
+    row['peak_kb'] = round(statistics.median(peaks), 1)
+    return row
+
+
+def get_meta(**extra):
+    return {
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'machine': platform.machine(),
+        **extra,
+    }
+
+
+def write_results(path, meta, results):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta, 'results': results}, f, ensure_ascii=False, indent=2)
+        f.write('\n')
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(results, baseline, threshold=0.3):
+    """
+    Сравнивает результаты с базовой линией. Регрессия: выросло число
+    запросов (точное сравнение), p50 или пик памяти выросли больше чем
+    на threshold и больше порога шума. Задержка сравнивается по p50:
+    p95 и p99 из десятков вызовов определяются единичными паузами (GC,
+    планировщик) и только выводятся. Возвращает список строк с описанием регрессий.
+    """
+    base_rows = {row['name']: row for row in baseline['results']}
+    regressions = []
+    for row in results:
+        base = base_rows.get(row['name'])
+        if base is None:
+            continue
+        name = row['name']
+        if (row['p50_ms'] > base['p50_ms'] * (1 + threshold)
+                and row['p50_ms'] - base['p50_ms'] >= MIN_LATENCY_DELTA_MS):
+            regressions.append(f"{name}: p50 {base['p50_ms']} -> {row['p50_ms']} ms")
+        if row['queries'] > base['queries']:
+            regressions.append(f"{name}: запросов {base['queries']} -> {row['queries']}")
+        if (row['peak_kb'] > base['peak_kb'] * (1 + threshold)
+                and row['peak_kb'] - base['peak_kb'] >= MIN_MEMORY_DELTA_KB):
+            regressions.append(f"{name}: память {base['peak_kb']} -> {row['peak_kb']} KB")
+    return regressions
@@ -0,0 +1,361 @@
+"""
+Локальный генератор нагрузки: виртуальные пользователи прогоняют
+реалистичную смесь трафика через весь стек Django (ASGI-обработчик
+в процессе, middleware, аутентификация, DRF):
+
+    70% просмотр каталога, 15% heartbeat уроков и события аналитики,
+    10% поиск, 5% записи на курсы и отзывы.
+
+Отчет: пропускная способность, доля ошибок и гистограмма задержек по каждому
+действию, суммарное число SQL-запросов по каждому сценарию смеси.
+
+У записи на курс и heartbeat урока пока нет маршрутов API, а маршрут
+приема событий аналитики принимает от пользователей только просмотры,
+поэтому эти действия выполняют тот же код в процессе (сигналы,
+CourseAnalyticsService.record_event) в потоке синхронного кода,
+как это делал бы обработчик запроса.
+
+Запуск:
+    python benchmarks/loadgen.py [--scale small] [--users 20] [--duration 30] [--ramp 5] [--think-ms 0]
+С --existing-db нагрузка идет по данным настроенной БД, записи сохраняются.
+"""
+import argparse
+import asyncio
+import contextvars
+import logging
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ustat.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from asgiref.sync import sync_to_async  # noqa: E402
+from django.db.backends.signals import connection_created  # noqa: E402
+from django.test import AsyncClient, Client  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from accounts.models import User  # noqa: E402
+from courses.models import Course, Enrollment  # noqa: E402
+from courses.services import CourseAnalyticsService  # noqa: E402
+from core.scale_data import SCALES  # noqa: E402
+
+from harness import benchmark_database, get_meta, percentile, write_results  # noqa: E402
+
+# Сценарий: (доля трафика в %, действия с весами внутри сценария)
+TRAFFIC_MIX = {
+    'browse': (70, (
+        ('catalog_list', 40), ('catalog_filter', 15), ('course_detail', 30),
+        ('course_modules', 10), ('categories', 5),
+    )),
+    'events': (15, (('lesson_heartbeat', 70), ('analytics_event', 30))),
+    'search': (10, (('search', 100),)),
+    'writes': (5, (('enroll', 50), ('review', 50))),
+}
+
+ANALYTICS_EVENTS = (('view', 70), ('rate', 15), ('purchase', 15))
+
+SEARCH_TERMS = ('Курс 1', 'Курс 2', 'Курс 15', 'Курс 42', 'Курс', 'Описание', 'python', 'дизайн')
+
+HISTOGRAM_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+current_scenario = contextvars.ContextVar('loadgen_scenario', default=None)
+
+
+class QueryCounter:
+    """
+    Обертка выполнения SQL: считает запросы по сценарию из contextvar.
+    asgiref переносит контекст в поток синхронного кода, поэтому запросы
+    представлений и вызовов в процессе попадают в сценарий своего пользователя
+    """
+
+    def __init__(self):
+        self.totals = defaultdict(int)
+
+    def __call__(self, execute, sql, params, many, context):
+        scenario = current_scenario.get()
+        if scenario is not None:
+            self.totals[scenario] += 1
+        return execute(sql, params, many, context)
+
+    def install(self, sender, connection, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.error_samples = {}
+        self.scenarios = {}
+
+    def record(self, scenario, action, elapsed_ms, error=None):
+        self.scenarios[action] = scenario
+        self.latencies[action].append(elapsed_ms)
+        if error is not None:
+            self.errors[action] += 1
+            self.error_samples.setdefault(action, error)
+
+    def report(self, elapsed, query_totals):
+        actions = []
+        for action, latencies in sorted(self.latencies.items(), key=lambda item: -len(item[1])):
+            latencies = sorted(latencies)
+            histogram, start = {}, 0
+            for bound in HISTOGRAM_BUCKETS_MS:
+                end = start
+                while end < len(latencies) and latencies[end] <= bound:
+                    end += 1
+                histogram[f'<={bound}'] = end - start
+                start = end
+            histogram[f'>{HISTOGRAM_BUCKETS_MS[-1]}'] = len(latencies) - start
+            actions.append({
+                'action': action,
+                'scenario': self.scenarios[action],
+                'requests': len(latencies),
+                'errors': self.errors[action],
+                'error_rate': round(self.errors[action] / len(latencies), 4),
+                'rps': round(len(latencies) / elapsed, 1),
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p95_ms': round(percentile(latencies, 95), 2),
+                'p99_ms': round(percentile(latencies, 99), 2),
+                'max_ms': round(latencies[-1], 2),
+                'histogram_ms': histogram,
+                'error_sample': self.error_samples.get(action),
+            })
+
+        total = sum(row['requests'] for row in actions) or 1
+        scenarios = []
+        for scenario in TRAFFIC_MIX:
+            rows = [row for row in actions if row['scenario'] == scenario]
+            requests = sum(row['requests'] for row in rows)
+            scenarios.append({
+                'scenario': scenario,
+                'requests': requests,
+                'share': round(requests / total * 100, 1),
+                'errors': sum(row['errors'] for row in rows),
+                'rps': round(requests / elapsed, 1),
+                'queries': query_totals.get(scenario, 0),
+                'queries_per_request': round(query_totals.get(scenario, 0) / requests, 1) if requests else 0,
+            })
+        return {
+            'elapsed_s': round(elapsed, 2),
+            'requests': total,
+            'rps': round(total / elapsed, 1),
+            'error_rate': round(sum(row['errors'] for row in actions) / total, 4),
+            'actions': actions,
+            'scenarios': scenarios,
+        }
+
+
+def record_event(user, course_id, event_data):
+    CourseAnalyticsService.record_event(Course(pk=course_id), event_data, user=user)
+
+
+class Catalog:
+    """Данные, общие для всех виртуальных пользователей"""
+
+    def __init__(self):
+        courses = list(Course.objects.filter(status='published').order_by('id').values_list('id', 'slug', 'price'))
+        if not courses:
+            raise SystemExit('В БД нет опубликованных курсов: сначала запустите generate_scale_data')
+        self.courses = courses
+        count = Client().get('/api/courses/courses/').json()['count']
+        self.pages = max(1, min(10, -(-count // 10)))
+
+    def popular(self, rng):
+        # Первые курсы популярнее (как и в сгенерированных зачислениях)
+        return self.courses[int(len(self.courses) * rng.random() ** 2)]
+
+
+class VirtualUser:
+    def __init__(self, index, user, catalog, stats, seed, think_ms):
+        self.user = user
+        self.catalog = catalog
+        self.stats = stats
+        self.rng = random.Random(f'{seed}:vu:{index}')
+        self.think_ms = think_ms
+        self.client = AsyncClient()
+        self.client.force_login(user)
+        self.enrolled = list(Enrollment.objects.filter(student=user).values_list('course_id', flat=True))
+        self.reviewed = set()
+        self.scenarios = list(TRAFFIC_MIX)
+        self.scenario_weights = [TRAFFIC_MIX[name][0] for name in self.scenarios]
+
+    def pick(self):
+        scenario = self.rng.choices(self.scenarios, self.scenario_weights)[0]
+        actions, weights = zip(*TRAFFIC_MIX[scenario][1])
+        return scenario, self.rng.choices(actions, weights)[0]
+
+    async def run(self, deadline):
+        loop = asyncio.get_running_loop()
+        while loop.time() < deadline:
+            scenario, action = self.pick()
+            current_scenario.set(scenario)
+            started = time.perf_counter()
+            try:
+                error = await getattr(self, action)()
+            except Exception as e:
+                error = f'{type(e).__name__}: {e}'
+            self.stats.record(scenario, action, (time.perf_counter() - started) * 1000, error)
+            current_scenario.set(None)
+            if self.think_ms:
+                await asyncio.sleep(self.think_ms * self.rng.uniform(0.5, 1.5) / 1000)
+
+    async def get(self, path, params=None):
+        response = await self.client.get(path, params or {})
+        return None if response.status_code < 400 else f'HTTP {response.status_code}'
+
+    # Просмотр каталога
+
+    async def catalog_list(self):
+        return await self.get('/api/courses/courses/', {'page': self.rng.randrange(self.catalog.pages) + 1})
+
+    async def catalog_filter(self):
+        return await self.get('/api/courses/courses/', {
+            'difficulty': self.rng.choice(('beginner', 'intermediate', 'advanced')),
+            'language': self.rng.choice(('ru', 'ky', 'en')),
+        })
+
+    async def course_detail(self):
+        return await self.get(f'/api/courses/courses/{self.catalog.popular(self.rng)[1]}/')
+
+    async def course_modules(self):
+        return await self.get(f'/api/courses/courses/{self.catalog.popular(self.rng)[1]}/modules/')
+
+    async def categories(self):
+        return await self.get('/api/courses/categories/')
+
+    async def search(self):
+        return await self.get('/api/courses/courses/', {'search': self.rng.choice(SEARCH_TERMS)})
+
+    # События
+
+    async def lesson_heartbeat(self):
+        course_id = self.rng.choice(self.enrolled) if self.enrolled else self.catalog.popular(self.rng)[0]
+        await sync_to_async(self._heartbeat)(course_id)
+
+    def _heartbeat(self, course_id):
+        Enrollment.objects.filter(student=self.user, course_id=course_id).update(last_accessed=timezone.now())
+        record_event(self.user, course_id, {'event_type': 'view'})
+
+    async def analytics_event(self):
+        course_id, _, price = self.catalog.popular(self.rng)
+        events, weights = zip(*ANALYTICS_EVENTS)
+        event_type = self.rng.choices(events, weights)[0]
+        event_data = {'event_type': event_type}
+        if event_type == 'rate':
+            event_data['rating'] = self.rng.randint(1, 5)
+        elif event_type == 'purchase':
+            event_data['amount'] = int(price)
+        await sync_to_async(record_event)(self.user, course_id, event_data)
+
+    # Записи
+
+    async def enroll(self):
+        course_id = self.catalog.popular(self.rng)[0]
+        if course_id in self.enrolled:
+            return await self.course_detail()
+        await sync_to_async(Enrollment.objects.create)(student=self.user, course_id=course_id)
+        self.enrolled.append(course_id)
+
+    async def review(self):
+        course_id, slug, _ = self.catalog.popular(self.rng)
+        if course_id in self.reviewed:
+            return await self.course_detail()
+        self.reviewed.add(course_id)
+        response = await self.client.post(
+            f'/api/reviews/courses/{slug}/reviews/',
+            {'course': course_id, 'rating': self.rng.randint(1, 5), 'content': 'Отзыв под нагрузкой'},
+            content_type='application/json'
+        )
+        return None if response.status_code < 400 else f'HTTP {response.status_code}'
+
+
+async def run_load(virtual_users, duration, ramp):
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    deadline = started + duration
+
+    async def start(index, vu):
+        # Пользователи подключаются равномерно в течение ramp секунд
+        await asyncio.sleep(ramp * index / len(virtual_users))
+        await vu.run(deadline)
+
+    await asyncio.gather(*(start(index, vu) for index, vu in enumerate(virtual_users)))
+    return loop.time() - started
+
+
+def print_report(report):
+    print(f"\n{report['requests']} запросов за {report['elapsed_s']} с: "
+          f"{report['rps']} req/s, ошибок {report['error_rate']:.2%}\n")
+    print(f"{'action':<18}{'scenario':<9}{'req':>7}{'err %':>8}{'req/s':>8}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for row in report['actions']:
+        print(f"{row['action']:<18}{row['scenario']:<9}{row['requests']:>7}{row['error_rate']:>8.2%}{row['rps']:>8}"
+              f"{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}{row['max_ms']:>9}")
+
+    print('\nГистограмма задержек, мс')
+    buckets = list(report['actions'][0]['histogram_ms']) if report['actions'] else []
+    print(f"{'action':<18}" + ''.join(f'{bucket:>8}' for bucket in buckets))
+    for row in report['actions']:
+        print(f"{row['action']:<18}" + ''.join(f'{count:>8}' for count in row['histogram_ms'].values()))
+
+    print(f"\n{'scenario':<10}{'share %':>9}{'req':>8}{'errors':>8}{'req/s':>8}{'queries':>10}{'q/req':>8}")
+    for row in report['scenarios']:
+        print(f"{row['scenario']:<10}{row['share']:>9}{row['requests']:>8}{row['errors']:>8}{row['rps']:>8}"
+              f"{row['queries']:>10}{row['queries_per_request']:>8}")
+
+    samples = [row for row in report['actions'] if row['error_sample']]
+    if samples:
+        print('\nПримеры ошибок:')
+        for row in samples:
+            print(f"  {row['action']}: {row['error_sample']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', choices=list(SCALES), default='small')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--existing-db', action='store_true', help='не создавать тестовую БД')
+    parser.add_argument('--users', type=int, default=20, help='число виртуальных пользователей (конкурентность)')
+    parser.add_argument('--duration', type=float, default=30, help='длительность прогона, с (включая разгон)')
+    parser.add_argument('--ramp', type=float, default=5, help='время подключения всех пользователей, с')
+    parser.add_argument('--think-ms', type=float, default=0, help='средняя пауза между действиями пользователя')
+    parser.add_argument('--output', help='сохранить отчет в JSON')
+    args = parser.parse_args()
+
+    # 404 и 400 уже учитываются как ошибки в отчете
+    logging.getLogger('django.request').setLevel(logging.ERROR)
+
+    counter = QueryCounter()
+    connection_created.connect(counter.install)
+    with benchmark_database(args.scale, args.seed, existing=args.existing_db):
+        catalog = Catalog()
+        stats = Stats()
+        students = User.objects.filter(role='student').order_by('id')[:args.users]
+        virtual_users = [
+            VirtualUser(index, user, catalog, stats, args.seed, args.think_ms)
+            for index, user in enumerate(students)
+        ]
+        if len(virtual_users) < args.users:
+            print(f'В БД только {len(virtual_users)} студентов, столько и будет пользователей')
+
+        elapsed = asyncio.run(run_load(virtual_users, args.duration, args.ramp))
+        report = stats.report(elapsed, counter.totals)
+
+    print_report(report)
+    if args.output:
+        meta = get_meta(scale=args.scale, seed=args.seed, users=len(virtual_users), duration=args.duration,
+                        ramp=args.ramp, think_ms=args.think_ms)
+        write_results(args.output, meta, report)
+        print(f'\nОтчет: {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Основа для асинхронных (ASGI) эндпоинтов чтения.
+
+DRF-представления синхронные, поэтому асинхронные эндпоинты - обычные
+async-представления Django, которые отдают JSON. Аутентификация выполняется
+теми же классами DRF, что и в синхронном API (в потоке через sync_to_async).
+
+Асинхронный ORM Django 4.2 выполняет запросы в общем потоке для синхронного
+кода, поэтому asyncio.gather не распараллеливает сами запросы к БД,
+но ожидание кэша и БД не занимает поток воркера на весь запрос.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, JsonResponse
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+DEFAULT_PAGE_SIZE = api_settings.PAGE_SIZE or 10
+MAX_PAGE_SIZE = 100
+
+
+def json_response(data, status=200):
+    return JsonResponse(
+        data,
+        status=status,
+        encoder=DjangoJSONEncoder,
+        safe=False,
+        json_dumps_params={'ensure_ascii': False}
+    )
+
+
+def async_api_view(view_func):
+    """
+    Декоратор асинхронного эндпоинта: только безопасные методы
+    и ошибки в формате DRF ({"detail": ...})
+    """
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return json_response({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+        try:
+            return await view_func(request, *args, **kwargs)
+        except (Http404, ObjectDoesNotExist):
+            return json_response({'detail': 'Not found.'}, status=404)
+        except APIException as exc:
+            return json_response({'detail': exc.detail}, status=exc.status_code)
+    return wrapper
+
+
+def _authenticate(request):
+    drf_request = Request(
+        request,
+        authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    )
+    return drf_request.user
+
+
+async def aauthenticate(request):
+    """Пользователь запроса по классам аутентификации DRF (JWT, сессия)"""
+    return await sync_to_async(_authenticate)(request)
+
+
+def get_page_params(request):
+    """Номер страницы и ее размер из query-параметров (page, page_size)"""
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+        page_size = int(request.GET.get('page_size', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        page, page_size = 1, DEFAULT_PAGE_SIZE
+    return page, min(max(page_size, 1), MAX_PAGE_SIZE)
+
+
+async def aget_or_build(key, timeout, build):
+    """Значение из кэша или результат корутины build(), сохраненный в кэш"""
+    value = await cache.aget(key)
+    if value is None:
+        value = await build()
+        await cache.aset(key, value, timeout)
+    return value
+
+
+async def aiter_in_thread(iterator):
+    """
+    Асинхронная обертка синхронного генератора для StreamingHttpResponse под ASGI
+    (иначе Django 4.2 сначала прочитает его целиком в память).
+    Все шаги выполняются в одном потоке, где живет соединение с БД
+    """
+    iterator = iter(iterator)
+    sentinel = object()
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    while (chunk := await next_chunk(iterator, sentinel)) is not sentinel:
+        yield chunk
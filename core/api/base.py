@@ -2,9 +2,11 @@ from rest_framework.viewsets import GenericViewSet
 from rest_framework.mixins import ListModelMixin, RetrieveModelMixin, CreateModelMixin, UpdateModelMixin
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 from rest_framework.throttling import UserRateThrottle, AnonRateThrottle
 from django.core.cache import cache
 from django.conf import settings
+from collections import namedtuple
 from functools import wraps
 from typing import Type, Optional
 from django.db.models import QuerySet
@@ -35,9 +37,16 @@ class BaseThrottle:
         rate = '30/min'  # 30 запросов в минуту для анонимных пользователей
 
 
+# Данные ответа DRF в кэше cache_response
+CachedResponse = namedtuple('CachedResponse', ['data', 'status'])
+
+
 def cache_response(timeout: int = 300, key_prefix: str = ''):
     """
-    Декоратор для кэширования ответов API
+    Декоратор для кэширования ответов API.
+    Ответ кэшируется отдельно для каждого пользователя: проверка прав на объект
+    (get_object) выполняется внутри view, и закэшированный ответ одного
+    пользователя не должен отдаваться другому
     
     Args:
         timeout (int): Время жизни кэша в секундах
@@ -47,18 +56,26 @@ def cache_response(timeout: int = 300, key_prefix: str = ''):
         @wraps(view_func)
         def wrapper(view_instance, request, *args, **kwargs):
             # Формируем ключ кэша
-            cache_key = f"{key_prefix}:{request.path}:{request.query_params}"
+            user_id = request.user.pk if request.user.is_authenticated else 'anon'
+            cache_key = f"{key_prefix}:{user_id}:{request.path}:{request.query_params}"
             
             # Проверяем наличие данных в кэше
             cached_response = cache.get(cache_key)
             if cached_response is not None:
+                if isinstance(cached_response, CachedResponse):
+                    return Response(cached_response.data, status=cached_response.status)
                 return cached_response
             
             # Если данных нет в кэше, выполняем запрос
             response = view_func(view_instance, request, *args, **kwargs)
             
-            # Сохраняем результат в кэш
-            cache.set(cache_key, response, timeout)
+            # Сохраняем результат в кэш. Response до рендеринга не сериализуется,
+            # поэтому кэшируются данные успешного ответа
+            if isinstance(response, Response):
+                if response.status_code == 200:
+                    cache.set(cache_key, CachedResponse(response.data, response.status_code), timeout)
+            else:
+                cache.set(cache_key, response, timeout)
             
             return response
         return wrapper
@@ -0,0 +1,44 @@
+from django.http import HttpResponse
+from rest_framework.exceptions import NotFound
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from core.profiling import PROFILE_ID_RE, get_config, get_storage, make_token
+
+
+class RequestProfileListView(APIView):
+    """Список сохраненных профилей запросов (без стеков), новые первыми; ?endpoint= - фильтр"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        profiles = get_storage().list()
+        endpoint = request.query_params.get('endpoint')
+        if endpoint:
+            profiles = [profile for profile in profiles if profile['endpoint'] == endpoint]
+        return Response(profiles)
+
+
+class RequestProfileDownloadView(APIView):
+    """Стеки профиля в формате collapsed stacks (flamegraph.pl, speedscope)"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, profile_id):
+        profile = get_storage().get(profile_id) if PROFILE_ID_RE.match(profile_id) else None
+        if profile is None:
+            raise NotFound()
+        response = HttpResponse(profile['folded'], content_type='text/plain; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{profile_id}.folded"'
+        return response
+
+
+class RequestProfileTokenView(APIView):
+    """Токен для заголовка, который включает профилирование запроса"""
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        config = get_config()
+        return Response({
+            'header': config['HEADER'],
+            'token': make_token(),
+            'expires_in': config['TOKEN_MAX_AGE'],
+        })
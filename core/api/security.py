@@ -3,13 +3,123 @@ from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 from django.utils import timezone
 from django.conf import settings
+from django.core.cache import cache
+from collections import OrderedDict
 from typing import Tuple, Optional
+import threading
+import time
 import jwt
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+
+# Поля пользователя, которые хранятся в кэше принципалов. Остальные поля
+# модели отложены (deferred) и загружаются при первом обращении
+PRINCIPAL_FIELDS = (
+    'id', 'email', 'first_name', 'last_name', 'role',
+    'is_active', 'is_staff', 'is_superuser', 'is_verified', 'token_version'
+)
+
+
+def build_user(values: dict):
+    """
+    Экземпляр модели пользователя из закэшированных полей без запроса к БД.
+    Это настоящий User (_state.adding=False, _state.db задан), поэтому его
+    можно передавать в фильтры и внешние ключи ORM. Экземпляр кладется
+    в карту идентичности: profile.user и другие ссылки на этого пользователя
+    в том же запросе тоже не идут в БД
+    """
+    from django.contrib.auth import get_user_model
+    from django.db import router
+    from core import identity_map
+
+    model = get_user_model()
+    # from_db ожидает значения в порядке полей модели
+    field_names = [field.attname for field in model._meta.concrete_fields if field.attname in values]
+    user = model.from_db(router.db_for_read(model), field_names, [values[name] for name in field_names])
+    return identity_map.add(user)
+
+
+class PrincipalCache:
+    """
+    Локальный для процесса LRU-кэш принципалов с ограниченным временем жизни.
+    Запись - словарь полей PRINCIPAL_FIELDS, включая версию токенов пользователя:
+    токен с другой версией считается промахом и перепроверяется по БД.
+
+    Запись хранит и версию принципала из общего кэша Django (как карта прав
+    CoursePermissionService): invalidate меняет ее, и записи во всех процессах
+    перестают читаться. С двухуровневым кэшем (core.cache.TwoLevelCache)
+    другие процессы видят новую версию через канал инвалидации, в худшем
+    случае через L1_TIMEOUT. TTL ограничивает устаревание, если общий кэш недоступен.
+    """
+
+    VERSION_KEY_PREFIX = 'jwt_principal_version_'
+
+    def __init__(self, max_size: int = 10000, ttl: int = 60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def _version_key(cls, user_id: int) -> str:
+        return f'{cls.VERSION_KEY_PREFIX}{user_id}'
+
+    def get_version(self, user_id: int) -> int:
+        """Версия принципала в общем кэше; читать до загрузки полей из БД"""
+        return cache.get_or_set(self._version_key(user_id), 0, None)
+
+    def get(self, user_id: int, token_version: int, version: int = 0) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            values, entry_version, expires_at = entry
+            if (expires_at < time.monotonic() or entry_version != version
+                    or values['token_version'] != token_version):
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return values
+
+    def set(self, values: dict, version: int = 0) -> None:
+        with self._lock:
+            self._entries[values['id']] = (values, version, time.monotonic() + self.ttl)
+            self._entries.move_to_end(values['id'])
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        """Сбрасывает запись в этом процессе и меняет общую версию для остальных"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+        cache.set(self._version_key(user_id), time.time_ns(), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_principal_cache_settings = getattr(settings, 'JWT_PRINCIPAL_CACHE', {})
+principal_cache = PrincipalCache(
+    max_size=_principal_cache_settings.get('MAX_SIZE', 10000),
+    ttl=_principal_cache_settings.get('TTL', 60)
+)
+
+
+def get_jwt_secret_key() -> str:
+    return getattr(settings, 'JWT_SECRET_KEY', settings.SECRET_KEY)
+
 
 class JWTAuthentication(BaseAuthentication):
     """
-    Аутентификация на основе JWT токенов с поддержкой автоматического обновления
+    Аутентификация на основе JWT токенов с поддержкой автоматического обновления.
+    Пользователь собирается из полей в локальном кэше процесса (build_user),
+    поэтому проверка токена обычно не обращается к БД. Поля вне PRINCIPAL_FIELDS
+    у такого пользователя отложены: первое обращение к ним - отдельный запрос.
+    Принимает и access-токены simplejwt (user_id, token_type=access, подпись SECRET_KEY).
     """
     
     def authenticate(self, request) -> Optional[Tuple]:
@@ -20,40 +130,71 @@ class JWTAuthentication(BaseAuthentication):
         if not auth_header:
             return None
             
+        # Извлекаем токен
+        auth_parts = auth_header.split()
+        if len(auth_parts) != 2 or auth_parts[0].lower() != 'bearer':
+            return None
+        token = auth_parts[1]
+
         try:
-            # Извлекаем токен
-            auth_parts = auth_header.split()
-            if len(auth_parts) != 2 or auth_parts[0].lower() != 'bearer':
-                return None
-            token = auth_parts[1]
-            
             # Проверяем токен
             payload = jwt.decode(
                 token,
-                settings.JWT_SECRET_KEY,
+                get_jwt_secret_key(),
                 algorithms=['HS256']
             )
-            
-            # Проверяем срок действия
-            exp = datetime.fromtimestamp(payload['exp'])
-            if exp < timezone.now():
-                raise AuthenticationFailed('Token has expired')
-                
-            # Получаем пользователя
-            from django.contrib.auth import get_user_model
-            User = get_user_model()
-            user = User.objects.get(id=payload['user_id'])
-            
-            # Проверяем необходимость обновления токена
-            if self._should_refresh_token(exp):
-                new_token = self.generate_token(user)
-                # Добавляем новый токен в заголовок ответа
-                request.new_token = new_token
-                
-            return (user, token)
-            
-        except (jwt.InvalidTokenError, User.DoesNotExist):
+        except jwt.ExpiredSignatureError:
+            raise AuthenticationFailed('Token has expired')
+        except jwt.InvalidTokenError:
             return None
+
+        # Refresh-токены (token_type=refresh) не принимаются вместо access
+        if payload.get('token_type', 'access') != 'access':
+            return None
+
+        # Проверяем срок действия
+        exp = datetime.fromtimestamp(payload['exp'], tz=dt_timezone.utc)
+        if exp < timezone.now():
+            raise AuthenticationFailed('Token has expired')
+
+        user = self.get_user(payload['user_id'], payload.get('ver', 0))
+        if user is None:
+            return None
+        if not user.is_active:
+            raise AuthenticationFailed('User is inactive')
+
+        # Проверяем необходимость обновления токена
+        if self._should_refresh_token(exp):
+            # Добавляем новый токен в заголовок ответа
+            request.new_token = self.generate_token(user)
+
+        return (user, token)
+
+    def authenticate_header(self, request) -> str:
+        # Без заголовка WWW-Authenticate DRF отвечает 403 вместо 401
+        return 'Bearer realm="api"'
+
+    @staticmethod
+    def get_user(user_id: int, token_version: int):
+        """
+        Возвращает пользователя из полей в кэше или загружает их одним запросом.
+        Отозванные токены (старая версия) отклоняются.
+        """
+        version = principal_cache.get_version(user_id)
+        values = principal_cache.get(user_id, token_version, version)
+        if values is None:
+            from django.contrib.auth import get_user_model
+            values = get_user_model().objects.filter(pk=user_id).values(*PRINCIPAL_FIELDS).first()
+            if values is None:
+                return None
+            if values['token_version'] != token_version:
+                raise AuthenticationFailed('Token has been revoked')
+            # Версия прочитана до запроса: изменение во время загрузки не потеряется
+            principal_cache.set(values, version)
+
+        # Каждый запрос получает свой экземпляр, чтобы загруженные позже поля
+        # не переживали запрос и не делились между потоками
+        return build_user(values)
             
     def _should_refresh_token(self, exp_time: datetime) -> bool:
         """
@@ -71,9 +212,10 @@ class JWTAuthentication(BaseAuthentication):
             'user_id': user.id,
             'exp': int((timezone.now() + timedelta(hours=24)).timestamp()),
             'iat': int(timezone.now().timestamp()),
-            'role': user.role
+            'role': user.role,
+            'ver': user.token_version
         }
-        return jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm='HS256')
+        return jwt.encode(payload, get_jwt_secret_key(), algorithm='HS256')
 
 
 class RoleBasedPermission(BasePermission):
@@ -0,0 +1,8 @@
+from django.urls import path
+from .profiling import RequestProfileDownloadView, RequestProfileListView, RequestProfileTokenView
+
+urlpatterns = [
+    path('profiling/', RequestProfileListView.as_view(), name='request-profile-list'),
+    path('profiling/token/', RequestProfileTokenView.as_view(), name='request-profile-token'),
+    path('profiling/<str:profile_id>/', RequestProfileDownloadView.as_view(), name='request-profile-download'),
+]
@@ -11,3 +11,7 @@ class CoreConfig(AppConfig):
         Импортируем сигналы при запуске приложения
         """
         import core.signals  # noqa
+        from core import celery_metrics, db_connections, identity_map
+        db_connections.install()
+        celery_metrics.install()
+        identity_map.install()
@@ -0,0 +1,296 @@
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+from django.utils.functional import cached_property
+
+from core.monitoring import cache_hits_total, cache_misses_total
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class LocalLRU:
+    """
+    Ограниченный LRU-кэш в памяти процесса с коротким временем жизни записей.
+    Значения хранятся сериализованными, чтобы изменение полученного объекта
+    не портило закэшированное значение (как в LocMemCache).
+    """
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=_MISSING):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+        return pickle.loads(value)
+
+    def set(self, key, value, timeout=None):
+        # Запись в L1 не живет дольше, чем в L2
+        ttl = self.timeout if timeout is None else min(self.timeout, timeout)
+        if ttl <= 0:
+            self.delete(key)
+            return
+        value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        return self.get(key) is not _MISSING
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TwoLevelCache(BaseCache):
+    """
+    Двухуровневый кэш: L1 - LRU в памяти процесса с коротким TTL,
+    L2 - другой кэш Django (обычно django-redis).
+
+    Каждое изменение публикуется в Redis pub/sub, и остальные процессы
+    удаляют ключ из своего L1, поэтому устаревшие данные живут в L1
+    миллисекунды, а не весь TTL. Если L2 не Redis, работает без рассылки.
+
+    Настройки (OPTIONS):
+        L2_ALIAS - алиас кэша второго уровня в CACHES
+        L1_MAX_ENTRIES - максимальное количество записей в L1
+        L1_TIMEOUT - время жизни записи в L1 в секундах
+        INVALIDATION_CHANNEL - канал Redis pub/sub для инвалидации
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.l2_alias = options.get('L2_ALIAS', 'redis')
+        self.channel = options.get('INVALIDATION_CHANNEL', 'cache_invalidation')
+        self.l1 = LocalLRU(
+            max_entries=options.get('L1_MAX_ENTRIES', 5000),
+            timeout=options.get('L1_TIMEOUT', 5)
+        )
+        self.node_id = uuid.uuid4().hex
+        self.stats = {'l1_hits': 0, 'l1_misses': 0, 'l2_hits': 0, 'l2_misses': 0}
+        self._subscriber_pid = None
+        self._subscriber_lock = threading.Lock()
+
+    @cached_property
+    def l2(self):
+        return caches[self.l2_alias]
+
+    @cached_property
+    def redis(self):
+        """Клиент Redis кэша L2 или None, если L2 не django-redis"""
+        try:
+            from django_redis import get_redis_connection
+            return get_redis_connection(self.l2_alias)
+        except (ImportError, NotImplementedError):
+            logger.warning(f"Cache '{self.l2_alias}' is not Redis, L1 invalidation is local only")
+            return None
+
+    # Метрики
+
+    def _record(self, tier, hit, count=1):
+        if not count:
+            return
+        if hit:
+            self.stats[f'{tier}_hits'] += count
+            cache_hits_total.labels(cache_type=tier).inc(count)
+        else:
+            self.stats[f'{tier}_misses'] += count
+            cache_misses_total.labels(cache_type=tier).inc(count)
+
+    def hit_ratio(self):
+        """Доля попаданий по уровням за время жизни процесса"""
+        ratios = {}
+        for tier in ('l1', 'l2'):
+            total = self.stats[f'{tier}_hits'] + self.stats[f'{tier}_misses']
+            ratios[tier] = self.stats[f'{tier}_hits'] / total if total else 0.0
+        return ratios
+
+    # Инвалидация между процессами
+
+    def _ensure_subscriber(self):
+        pid = os.getpid()
+        if self._subscriber_pid == pid:
+            return
+        with self._subscriber_lock:
+            if self._subscriber_pid == pid:
+                return
+            # После fork L1 и подписка родителя недействительны
+            self.l1.clear()
+            self._subscriber_pid = pid
+            if self.redis is not None:
+                threading.Thread(target=self._listen, name='cache-invalidation', daemon=True).start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    self.handle_invalidation(message['data'])
+            except Exception as e:
+                # Пока подписки нет, сообщения теряются - сбрасываем L1 целиком
+                logger.warning(f"Cache invalidation subscriber error: {str(e)}")
+                self.l1.clear()
+                time.sleep(1)
+
+    def handle_invalidation(self, data):
+        """Обрабатывает сообщение об инвалидации от другого процесса"""
+        message = json.loads(data)
+        if message['node'] == self.node_id:
+            return
+        if message['keys'] is None:
+            self.l1.clear()
+        else:
+            self.l1.delete_many(message['keys'])
+
+    def _publish(self, keys):
+        if self.redis is None:
+            return
+        try:
+            self.redis.publish(self.channel, json.dumps({'node': self.node_id, 'keys': keys}))
+        except Exception as e:
+            logger.warning(f"Cache invalidation publish error: {str(e)}")
+
+    def _invalidate(self, keys):
+        self.l1.delete_many(keys)
+        self._publish(keys)
+
+    # API кэша Django
+
+    def _l1_timeout(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        return None if timeout is None else timeout - time.time()
+
+    def get(self, key, default=None, version=None):
+        self._ensure_subscriber()
+        local_key = self.make_and_validate_key(key, version=version)
+        value = self.l1.get(local_key)
+        if value is not _MISSING:
+            self._record('l1', True)
+            return value
+        self._record('l1', False)
+
+        value = self.l2.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            self._record('l2', False)
+            return default
+        self._record('l2', True)
+        self.l1.set(local_key, value)
+        return value
+
+    def get_many(self, keys, version=None):
+        self._ensure_subscriber()
+        result = {}
+        missing = []
+        for key in keys:
+            value = self.l1.get(self.make_and_validate_key(key, version=version))
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                result[key] = value
+        self._record('l1', True, len(result))
+        self._record('l1', False, len(missing))
+
+        if missing:
+            found = self.l2.get_many(missing, version=version)
+            self._record('l2', True, len(found))
+            self._record('l2', False, len(missing) - len(found))
+            for key, value in found.items():
+                self.l1.set(self.make_and_validate_key(key, version=version), value)
+            result.update(found)
+        return result
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._ensure_subscriber()
+        local_key = self.make_and_validate_key(key, version=version)
+        self.l2.set(key, value, timeout=timeout, version=version)
+        self._publish([local_key])
+        self.l1.set(local_key, value, self._l1_timeout(timeout))
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        self._ensure_subscriber()
+        failed = self.l2.set_many(data, timeout=timeout, version=version)
+        local_keys = {key: self.make_and_validate_key(key, version=version) for key in data}
+        self._publish(list(local_keys.values()))
+        l1_timeout = self._l1_timeout(timeout)
+        for key, value in data.items():
+            if key not in failed:
+                self.l1.set(local_keys[key], value, l1_timeout)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._ensure_subscriber()
+        added = self.l2.add(key, value, timeout=timeout, version=version)
+        if added:
+            self._invalidate([self.make_and_validate_key(key, version=version)])
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.l2.touch(key, timeout=timeout, version=version)
+
+    def delete(self, key, version=None):
+        self._ensure_subscriber()
+        deleted = self.l2.delete(key, version=version)
+        self._invalidate([self.make_and_validate_key(key, version=version)])
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        self._ensure_subscriber()
+        keys = list(keys)
+        self.l2.delete_many(keys, version=version)
+        self._invalidate([self.make_and_validate_key(key, version=version) for key in keys])
+
+    def has_key(self, key, version=None):
+        if self.make_and_validate_key(key, version=version) in self.l1:
+            return True
+        return self.l2.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self._ensure_subscriber()
+        value = self.l2.incr(key, delta, version=version)
+        self._invalidate([self.make_and_validate_key(key, version=version)])
+        return value
+
+    def clear(self):
+        self._ensure_subscriber()
+        self.l2.clear()
+        self.l1.clear()
+        self._publish(None)
+
+    def close(self, **kwargs):
+        self.l2.close(**kwargs)
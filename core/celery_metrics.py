@@ -0,0 +1,195 @@
+"""
+Метрики задач Celery по сигналам (без изменения кода задач).
+
+- celery_task_runtime_seconds: время выполнения задачи
+- celery_task_queue_wait_seconds: ожидание в очереди от публикации до старта
+  (время публикации кладется в заголовок сообщения published_at)
+- celery_tasks_total: завершения по состояниям success, failure
+  (исключение), retry и error - задача вернула {'status': 'error'},
+  как задачи courses.tasks, которые перехватывают исключения сами
+- celery_task_db_queries / celery_task_db_seconds: SQL-запросы задачи
+
+Задача дольше CELERY_SLOW_TASK_SECONDS пишется в лог вместе с аргументами.
+
+Каждый процесс воркера отдает метрики на первом свободном порту из
+CELERY_METRICS_PORTS (при prefork - главный процесс и каждый дочерний),
+поэтому Prometheus должен опрашивать весь диапазон.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from prometheus_client import Counter, Histogram, start_http_server
+
+logger = logging.getLogger(__name__)
+
+TASK_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+celery_task_runtime_seconds = Histogram(
+    'celery_task_runtime_seconds',
+    'Celery task execution time in seconds',
+    ['task'],
+    buckets=TASK_BUCKETS
+)
+
+celery_task_queue_wait_seconds = Histogram(
+    'celery_task_queue_wait_seconds',
+    'Time between task publish and start of execution in seconds',
+    ['task', 'queue'],
+    buckets=TASK_BUCKETS
+)
+
+celery_tasks_total = Counter(
+    'celery_tasks_total',
+    'Total number of finished Celery tasks',
+    ['task', 'state']
+)
+
+celery_task_db_queries = Histogram(
+    'celery_task_db_queries',
+    'Number of SQL queries per Celery task',
+    ['task'],
+    buckets=QUERY_BUCKETS
+)
+
+celery_task_db_seconds = Histogram(
+    'celery_task_db_seconds',
+    'Time spent in SQL queries per Celery task in seconds',
+    ['task'],
+    buckets=TASK_BUCKETS
+)
+
+# Стек выполняемых задач потока: eager-задача может запуститься внутри другой
+_local = threading.local()
+
+
+class TaskState:
+    def __init__(self, task_id):
+        self.task_id = task_id
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+
+
+def _stack():
+    if not hasattr(_local, 'tasks'):
+        _local.tasks = []
+    return _local.tasks
+
+
+def count_query(execute, sql, params, many, context):
+    """Обертка выполнения SQL: время и число запросов текущей задачи"""
+    tasks = _stack()
+    if not tasks:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        state = tasks[-1]
+        state.queries += 1
+        state.db_time += time.perf_counter() - started
+
+
+def on_connection_created(sender, connection, **kwargs):
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+def on_before_task_publish(sender=None, headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault('published_at', time.time())
+
+
+def get_queue(request):
+    delivery_info = getattr(request, 'delivery_info', None) or {}
+    return delivery_info.get('routing_key') or 'default'
+
+
+def on_task_prerun(sender=None, task_id=None, task=None, **kwargs):
+    _stack().append(TaskState(task_id))
+    published_at = task.request.get('published_at') if task is not None else None
+    if published_at is not None:
+        celery_task_queue_wait_seconds.labels(task=task.name, queue=get_queue(task.request)).observe(
+            max(0.0, time.time() - float(published_at))
+        )
+
+
+def on_task_postrun(sender=None, task_id=None, task=None, args=None, kwargs=None, retval=None, state=None, **extra):
+    tasks = _stack()
+    if not tasks or tasks[-1].task_id != task_id:
+        return
+    current = tasks.pop()
+    runtime = time.perf_counter() - current.started
+    name = task.name
+
+    celery_task_runtime_seconds.labels(task=name).observe(runtime)
+    celery_task_db_queries.labels(task=name).observe(current.queries)
+    celery_task_db_seconds.labels(task=name).observe(current.db_time)
+    if state == 'SUCCESS':
+        is_error = isinstance(retval, dict) and retval.get('status') == 'error'
+        celery_tasks_total.labels(task=name, state='error' if is_error else 'success').inc()
+
+    threshold = getattr(settings, 'CELERY_SLOW_TASK_SECONDS', 10)
+    if runtime >= threshold:
+        logger.warning(
+            f"Slow task {name}[{task_id}]: {runtime:.2f}s, {current.queries} queries "
+            f"({current.db_time:.2f}s in DB), args={_truncate(args)}, kwargs={_truncate(kwargs)}"
+        )
+
+
+def on_task_failure(sender=None, **kwargs):
+    celery_tasks_total.labels(task=sender.name, state='failure').inc()
+
+
+def on_task_retry(sender=None, **kwargs):
+    celery_tasks_total.labels(task=sender.name, state='retry').inc()
+
+
+def _truncate(value, limit=500):
+    text = repr(value)
+    return text if len(text) <= limit else text[:limit] + '...'
+
+
+def get_metrics_ports():
+    """Порты из CELERY_METRICS_PORTS ("9200-9231"); пустое значение - без экспорта"""
+    value = getattr(settings, 'CELERY_METRICS_PORTS', '')
+    if not value:
+        return range(0)
+    start, _, end = str(value).partition('-')
+    return range(int(start), int(end or start) + 1)
+
+
+def start_metrics_server():
+    for port in get_metrics_ports():
+        try:
+            start_http_server(port)
+        except OSError:
+            continue
+        logger.info(f"Celery metrics exported on port {port}")
+        return port
+    if get_metrics_ports():
+        logger.warning("No free port for Celery metrics in CELERY_METRICS_PORTS")
+    return None
+
+
+def on_worker_process_started(sender=None, **kwargs):
+    start_metrics_server()
+
+
+def install():
+    """Подключает обработчики сигналов Django и Celery"""
+    connection_created.connect(on_connection_created, dispatch_uid='core.celery_metrics.created')
+
+    from celery import signals
+    signals.before_task_publish.connect(on_before_task_publish, dispatch_uid='core.celery_metrics.publish')
+    signals.task_prerun.connect(on_task_prerun, dispatch_uid='core.celery_metrics.prerun')
+    signals.task_postrun.connect(on_task_postrun, dispatch_uid='core.celery_metrics.postrun')
+    signals.task_failure.connect(on_task_failure, dispatch_uid='core.celery_metrics.failure')
+    signals.task_retry.connect(on_task_retry, dispatch_uid='core.celery_metrics.retry')
+    # Главный процесс воркера и каждый дочерний процесс prefork
+    signals.worker_init.connect(on_worker_process_started, dispatch_uid='core.celery_metrics.worker_init')
+    signals.worker_process_init.connect(on_worker_process_started, dispatch_uid='core.celery_metrics.process_init')
@@ -0,0 +1,78 @@
+"""
+Очереди Celery, маршрутизация задач и пресеты воркеров.
+
+Очереди (CELERY_TASK_QUEUES):
+    realtime    - задачи, которых ждет пользователь (по событиям курса,
+                  записи на курс); очередь по умолчанию
+    analytics   - периодические пересчеты каталога и рекомендаций
+    maintenance - очистка и обслуживание данных
+    bulk        - долгие задачи по всем курсам, порциями
+
+Маршруты задаются в CELERY_TASK_ROUTES, лимиты - в CELERY_TASK_ANNOTATIONS.
+Приоритет внутри очереди: для Redis 0 - наивысший, 9 - наинизший.
+
+Каждая очередь обслуживается своим воркером (CELERY_WORKER_PRESETS),
+поэтому ночной пересчет не занимает процессы, которые нужны realtime:
+    python manage.py celery_worker realtime
+"""
+from django.conf import settings
+from django.db import transaction
+
+# Задачи, которые с аргументами course_ids обновляют несколько курсов
+# по событию пользователя, а без них - пересчитывают все курсы
+INCREMENTAL_TASKS = {
+    'courses.tasks.rebuild_related_courses': 'course_ids',
+}
+
+
+def route_task(name, args, kwargs, options, task=None, **kw):
+    """
+    Маршрутизация по аргументам: инкрементальный вызов идет в realtime,
+    полный пересчет - по статическому маршруту из CELERY_TASK_ROUTES
+    """
+    argument = INCREMENTAL_TASKS.get(name)
+    if argument and (kwargs or {}).get(argument) is not None:
+        return {'queue': 'realtime', 'priority': 3}
+    return None
+
+
+def queue_next_chunk(task, kwargs):
+    """
+    Ставит следующую порцию задачи отдельным сообщением после коммита,
+    чтобы между порциями воркер брал другие задачи. Возвращает False без
+    брокера (task_always_eager): apply_async выполнил бы порцию внутри
+    текущей, и задача продолжает порции в своем цикле, без рекурсии
+    """
+    if task.app.conf.task_always_eager:
+        return False
+    transaction.on_commit(lambda: task.apply_async(kwargs=kwargs))
+    return True
+
+
+def get_worker_preset(name):
+    presets = getattr(settings, 'CELERY_WORKER_PRESETS', {})
+    if name not in presets:
+        raise ValueError(f'Unknown Celery worker preset: {name}')
+    return presets[name]
+
+
+def get_worker_argv(name, concurrency=None, loglevel='info'):
+    """Аргументы командной строки `celery worker` для пресета"""
+    preset = get_worker_preset(name)
+    argv = [
+        'worker',
+        '--queues', ','.join(preset['queues']),
+        '--hostname', f'{name}@%h',
+        '--concurrency', str(concurrency or preset['concurrency']),
+        '--prefetch-multiplier', str(preset.get('prefetch_multiplier', 1)),
+        '--loglevel', loglevel,
+        # Свободный процесс берет следующую задачу, не дожидаясь остальных
+        '-O', 'fair',
+    ]
+    if preset.get('max_tasks_per_child'):
+        argv += ['--max-tasks-per-child', str(preset['max_tasks_per_child'])]
+    if preset.get('time_limit'):
+        argv += ['--time-limit', str(preset['time_limit'])]
+    if preset.get('soft_time_limit'):
+        argv += ['--soft-time-limit', str(preset['soft_time_limit'])]
+    return argv
@@ -0,0 +1,184 @@
+"""
+Компактное кодирование закэшированных данных.
+
+Вместо pickle моделей Django в кэш пишутся версионированные схемой кортежи
+полей, упакованные msgpack и сжатые zstd при превышении порога размера.
+При чтении из кортежей восстанавливаются экземпляры моделей так же, как это
+делает pickle (без __init__ и сигналов pre_init/post_init), поэтому
+вызывающий код работает с теми же объектами, что и раньше.
+"""
+import datetime
+import decimal
+import logging
+import uuid
+import zlib
+
+import msgpack
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.base import ModelState
+
+try:
+    import zstandard
+except ImportError:  # сжатие необязательно
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Первый байт данных - формат
+RAW = b'\x01'
+ZSTD = b'\x02'
+
+COMPRESS_THRESHOLD = getattr(settings, 'CACHE_CODEC_COMPRESS_THRESHOLD', 1024)
+COMPRESS_LEVEL = 3
+
+# Коды расширений msgpack для типов, которых нет в msgpack
+EXT_DATETIME = 1
+EXT_DATE = 2
+EXT_DECIMAL = 3
+EXT_UUID = 4
+EXT_TIME = 5
+
+
+def _default(value):
+    if isinstance(value, datetime.datetime):
+        return msgpack.ExtType(EXT_DATETIME, value.isoformat().encode())
+    if isinstance(value, datetime.date):
+        return msgpack.ExtType(EXT_DATE, value.isoformat().encode())
+    if isinstance(value, datetime.time):
+        return msgpack.ExtType(EXT_TIME, value.isoformat().encode())
+    if isinstance(value, decimal.Decimal):
+        return msgpack.ExtType(EXT_DECIMAL, str(value).encode())
+    if isinstance(value, uuid.UUID):
+        return msgpack.ExtType(EXT_UUID, value.bytes)
+    if hasattr(value, 'name') and hasattr(value, 'storage'):
+        # FieldFile/ImageFieldFile хранятся как путь
+        return value.name
+    raise TypeError(f'Cannot encode {type(value).__name__}')
+
+
+def _ext_hook(code, data):
+    if code == EXT_DATETIME:
+        return datetime.datetime.fromisoformat(data.decode())
+    if code == EXT_DATE:
+        return datetime.date.fromisoformat(data.decode())
+    if code == EXT_TIME:
+        return datetime.time.fromisoformat(data.decode())
+    if code == EXT_DECIMAL:
+        return decimal.Decimal(data.decode())
+    if code == EXT_UUID:
+        return uuid.UUID(bytes=data)
+    return msgpack.ExtType(code, data)
+
+
+def dumps(value, compress_threshold=None):
+    """Упаковывает значение в msgpack, сжимая большие данные zstd"""
+    threshold = COMPRESS_THRESHOLD if compress_threshold is None else compress_threshold
+    data = msgpack.packb(value, default=_default, use_bin_type=True)
+    if zstandard is not None and len(data) > threshold:
+        return ZSTD + zstandard.ZstdCompressor(level=COMPRESS_LEVEL).compress(data)
+    return RAW + data
+
+
+def loads(data):
+    """Распаковывает значение, упакованное dumps"""
+    header, payload = data[:1], data[1:]
+    if header == ZSTD:
+        payload = zstandard.ZstdDecompressor().decompress(payload)
+    elif header != RAW:
+        raise ValueError('Unknown cache codec format')
+    return msgpack.unpackb(payload, ext_hook=_ext_hook, raw=False, strict_map_key=False)
+
+
+class ModelSchema:
+    """
+    Схема кодирования экземпляров модели в кортежи значений полей.
+    related - вложенные схемы для уже загруженных связей (FK и обратных one-to-one).
+    Имя схемы (модель, version и контрольная сумма списка полей) записывается
+    вместе с данными: после изменения полей старые записи кэша считаются промахом.
+    """
+
+    def __init__(self, model, fields=None, related=None, version=1):
+        self.model = model
+        self.fields = fields or [field.attname for field in model._meta.concrete_fields]
+        self.related = related or {}
+        self.version = version
+        signature = ','.join(self.fields + [f'{name}({schema.name})' for name, schema in self.related.items()])
+        self.name = f'{model._meta.label_lower}:{version}:{zlib.crc32(signature.encode()):08x}'
+
+    def dump(self, instance):
+        if instance is None:
+            return None
+        row = [getattr(instance, field) for field in self.fields]
+        for name, schema in self.related.items():
+            row.append(schema.dump(getattr(instance, name, None)))
+        return row
+
+    def load(self, row):
+        if row is None:
+            return None
+        # Как model_unpickle: без __init__ и сигналов инициализации.
+        # Поля, не вошедшие в схему, остаются отложенными и догружаются при обращении
+        instance = self.model.__new__(self.model)
+        instance.__dict__.update(zip(self.fields, row))
+        instance._state = ModelState()
+        instance._state.adding = False
+        for (name, schema), related_row in zip(self.related.items(), row[len(self.fields):]):
+            related = schema.load(related_row)
+            if related is not None:
+                setattr(instance, name, related)
+        return instance
+
+    def dump_many(self, instances):
+        return [self.dump(instance) for instance in instances]
+
+    def load_many(self, rows):
+        return [self.load(row) for row in rows]
+
+
+def pack(schema, value, many=False):
+    """Кодирует экземпляр или список экземпляров по схеме с меткой версии"""
+    data = schema.dump_many(value) if many else schema.dump(value)
+    return dumps([schema.name, data])
+
+
+def unpack(schema, data, many=False):
+    """
+    Восстанавливает экземпляры из данных pack. Возвращает None, если данные
+    записаны другой версией схемы или повреждены.
+    """
+    try:
+        name, rows = loads(data)
+    except Exception as e:
+        logger.warning(f"Cannot decode cached payload: {str(e)}")
+        return None
+    if name != schema.name:
+        return None
+    return schema.load_many(rows) if many else schema.load(rows)
+
+
+def cache_get(schema, key, many=False):
+    """Читает из кэша значение, записанное cache_set. None - промах"""
+    data = cache.get(key)
+    if not isinstance(data, bytes):
+        return None
+    return unpack(schema, data, many=many)
+
+
+def cache_set(schema, key, value, timeout, many=False):
+    cache.set(key, pack(schema, value, many=many), timeout)
+
+
+def cache_get_many(schema, keys, many=False):
+    """Пакетное чтение: {ключ: значение} только для найденных и декодированных ключей"""
+    result = {}
+    for key, data in cache.get_many(keys).items():
+        if isinstance(data, bytes):
+            value = unpack(schema, data, many=many)
+            if value is not None:
+                result[key] = value
+    return result
+
+
+def cache_set_many(schema, values, timeout, many=False):
+    cache.set_many({key: pack(schema, value, many=many) for key, value in values.items()}, timeout)
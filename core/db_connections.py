@@ -0,0 +1,116 @@
+"""
+Управление соединениями с БД для веб-воркеров и воркеров Celery.
+
+Режимы (DB_CONNECTION_MODE для веба, CELERY_DB_CONNECTION_MODE для Celery):
+    none       - соединение закрывается после каждого запроса/задачи
+    persistent - соединение живет DB_CONN_MAX_AGE секунд, перед повторным
+                 использованием проверяется (CONN_HEALTH_CHECKS)
+    pooled     - каждый процесс воркера держит соединение все время жизни
+                 (CONN_MAX_AGE=None) с проверкой перед задачей; для множества
+                 коротких задач установка соединения исчезает из их времени
+
+Метрики Prometheus: сколько соединений открыто и сколько раз соединение
+было переиспользовано в начале запроса или задачи.
+"""
+import logging
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+db_connections_opened_total = Counter(
+    'db_connections_opened_total',
+    'Total number of opened database connections',
+    ['alias']
+)
+
+db_connections_reused_total = Counter(
+    'db_connections_reused_total',
+    'Total number of requests and tasks that started with an open database connection',
+    ['alias', 'context']
+)
+
+db_connections_open = Gauge(
+    'db_connections_open',
+    'Number of open database connections in this process',
+    ['alias']
+)
+
+
+def get_conn_max_age(mode):
+    if mode == 'none':
+        return 0
+    if mode == 'pooled':
+        return None
+    if mode == 'persistent':
+        return getattr(settings, 'DB_CONN_MAX_AGE', 60)
+    raise ValueError(f'Unknown database connection mode: {mode}')
+
+
+def apply_connection_mode(mode):
+    """
+    Применяет режим ко всем базам. Уже открытые соединения закрываются,
+    новые будут созданы с новыми настройками
+    """
+    conn_max_age = get_conn_max_age(mode)
+    for alias in connections:
+        settings_dict = connections.settings[alias]
+        settings_dict['CONN_MAX_AGE'] = conn_max_age
+        settings_dict['CONN_HEALTH_CHECKS'] = mode != 'none'
+
+    for connection in connections.all(initialized_only=True):
+        connection.close()
+        connection.settings_dict['CONN_MAX_AGE'] = conn_max_age
+        connection.settings_dict['CONN_HEALTH_CHECKS'] = mode != 'none'
+
+
+def on_connection_created(sender, connection, **kwargs):
+    db_connections_opened_total.labels(alias=connection.alias).inc()
+
+
+def on_unit_started(context):
+    """
+    Начало запроса или задачи: закрываем устаревшие соединения
+    и считаем те, что будут переиспользованы
+    """
+    for connection in connections.all(initialized_only=True):
+        # Открытую транзакцию (например, в тестах) не трогаем
+        if not connection.in_atomic_block:
+            connection.close_if_unusable_or_obsolete()
+        is_open = connection.connection is not None
+        if is_open:
+            db_connections_reused_total.labels(alias=connection.alias, context=context).inc()
+        db_connections_open.labels(alias=connection.alias).set(int(is_open))
+
+
+def on_request_started(sender, **kwargs):
+    on_unit_started('web')
+
+
+def on_task_prerun(sender=None, task=None, **kwargs):
+    # Eager-задачи выполняются внутри вызывающего запроса
+    if getattr(getattr(task, 'request', None), 'is_eager', False):
+        return
+    on_unit_started('celery')
+
+
+def on_worker_init(sender=None, **kwargs):
+    # Настройки меняются до fork, поэтому действуют во всех дочерних процессах.
+    # Унаследованные после fork соединения закрывает Django-fixup Celery
+    mode = getattr(settings, 'CELERY_DB_CONNECTION_MODE', 'pooled')
+    apply_connection_mode(mode)
+    logger.info(f"Celery database connection mode: {mode}")
+
+
+def install():
+    """Подключает обработчики сигналов Django и Celery"""
+    connection_created.connect(on_connection_created, dispatch_uid='core.db_connections.created')
+    request_started.connect(on_request_started, dispatch_uid='core.db_connections.request_started')
+
+    from celery import signals
+    signals.worker_init.connect(on_worker_init, dispatch_uid='core.db_connections.worker_init')
+    signals.task_prerun.connect(on_task_prerun, dispatch_uid='core.db_connections.task_prerun')
@@ -0,0 +1,201 @@
+"""
+Маршрутизация чтения на реплики БД с гарантией read-your-writes.
+
+Чтение уходит на реплики только там, где это явно разрешено:
+в веб-запросах (ReplicaPinningMiddleware) и в задачах, обернутых use_replica.
+Всё остальное (миграции, shell, обычные задачи Celery) читает с primary.
+После записи клиент на DATABASE_PRIMARY_PIN_SECONDS закрепляется за primary
+(cookie для браузера и флаг в кэше для API-клиентов), чтобы не увидеть
+устаревшие данные из-за задержки репликации.
+"""
+import hashlib
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'db_primary_until'
+PIN_CACHE_PREFIX = 'db_primary_pin_'
+
+# Режим чтения с реплик: None - только primary, REQUEST - до первой записи в запросе,
+# EXPLICIT - весь блок use_replica (вызывающий код согласен на устаревшие данные)
+REQUEST = 'request'
+EXPLICIT = 'explicit'
+
+_replica_reads = ContextVar('replica_reads', default=None)
+_wrote = ContextVar('db_wrote', default=False)
+
+
+def get_replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+def get_pin_seconds():
+    return getattr(settings, 'DATABASE_PRIMARY_PIN_SECONDS', 5)
+
+
+@contextmanager
+def use_replica(enabled=True):
+    """
+    Разрешает (или запрещает) чтение с реплик внутри блока.
+    В отличие от веб-запросов, запись в блоке не переключает чтение на primary
+    """
+    token = _replica_reads.set(EXPLICIT if enabled else None)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def replica_reads(func):
+    """Декоратор для задач, которым допустимо читать данные с задержкой репликации"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with use_replica():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """
+    Роутер: запись всегда в primary, чтение - на случайную реплику,
+    если это разрешено в текущем контексте и нет открытой транзакции.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+        if not replicas or not _replica_reads.get():
+            return DEFAULT_DB_ALIAS
+        # Внутри транзакции читаем свои же незафиксированные изменения
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        # После записи в запросе чтение до его конца тоже идет с primary
+        if _replica_reads.get() == REQUEST:
+            _replica_reads.set(None)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики получают схему через репликацию
+        if db in get_replicas():
+            return False
+        return None
+
+
+class ReplicaPinningMiddleware:
+    """
+    Разрешает чтение с реплик для безопасных запросов и закрепляет
+    клиента за primary на короткое время после записи.
+    Работает и в синхронной, и в асинхронной цепочке middleware: под ASGI
+    async-представления не переводятся из-за нее в поток.
+    """
+
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def get_client_key(request):
+        """Идентификатор клиента для флага в кэше: токен API или сессия"""
+        credential = request.headers.get('Authorization') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        if not credential:
+            return None
+        return PIN_CACHE_PREFIX + hashlib.sha1(credential.encode()).hexdigest()
+
+    @staticmethod
+    def has_pin_cookie(request):
+        try:
+            return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def is_pinned(self, request, client_key):
+        if self.has_pin_cookie(request):
+            return True
+        return client_key is not None and cache.get(client_key) is not None
+
+    async def ais_pinned(self, request, client_key):
+        if self.has_pin_cookie(request):
+            return True
+        return client_key is not None and await cache.aget(client_key) is not None
+
+    def should_pin(self, request, wrote):
+        return wrote or request.method not in self.SAFE_METHODS
+
+    @staticmethod
+    def set_pin_cookie(response):
+        pin_seconds = get_pin_seconds()
+        response.set_cookie(
+            PIN_COOKIE,
+            str(time.time() + pin_seconds),
+            max_age=pin_seconds,
+            httponly=True,
+            samesite='Lax'
+        )
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        client_key = self.get_client_key(request)
+        allow_replica = request.method in self.SAFE_METHODS and not self.is_pinned(request, client_key)
+
+        replica_token = _replica_reads.set(REQUEST if allow_replica else None)
+        wrote_token = _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            wrote = _wrote.get()
+        finally:
+            _replica_reads.reset(replica_token)
+            _wrote.reset(wrote_token)
+
+        if self.should_pin(request, wrote):
+            self.set_pin_cookie(response)
+            if client_key is not None:
+                cache.set(client_key, 1, get_pin_seconds())
+
+        return response
+
+    async def __acall__(self, request):
+        # Запросы ORM из sync_to_async видят контекст запроса, а изменения
+        # _wrote и _replica_reads asgiref возвращает обратно в корутину
+        client_key = self.get_client_key(request)
+        allow_replica = request.method in self.SAFE_METHODS and not await self.ais_pinned(request, client_key)
+
+        replica_token = _replica_reads.set(REQUEST if allow_replica else None)
+        wrote_token = _wrote.set(False)
+        try:
+            response = await self.get_response(request)
+            wrote = _wrote.get()
+        finally:
+            _replica_reads.reset(replica_token)
+            _wrote.reset(wrote_token)
+
+        if self.should_pin(request, wrote):
+            self.set_pin_cookie(response)
+            if client_key is not None:
+                await cache.aset(client_key, 1, get_pin_seconds())
+
+        return response
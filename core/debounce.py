@@ -0,0 +1,103 @@
+"""
+Постановка задач пересчета с подавлением дублей (debounce).
+
+Серия событий по одному объекту (записи на курс, отзывы, правки курса)
+сворачивается в один запуск задачи: первый вызов ставит маркер
+debounce:<задача>:<аргументы> и проверку через QUIET_SECONDS, каждый
+следующий только обновляет время последнего события. Задача запускается,
+когда события затихли на QUIET_SECONDS, но не позже MAX_DELAY_SECONDS
+от первого события серии.
+
+Маркеры хранятся в кэше TASK_DEBOUNCE['CACHE_ALIAS'] (Redis при заданном
+REDIS_CACHE_URL). С локальным кэшем дубли подавляются только в пределах
+процесса. Задачи должны быть идемпотентны: при истечении маркера возможен
+лишний запуск, а при недоступном брокере - пропуск серии.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'CACHE_ALIAS': 'default',
+    'QUIET_SECONDS': 30,
+    'MAX_DELAY_SECONDS': 300,
+    'TASKS': {},
+}
+
+
+def get_config(task_name=None):
+    config = {**DEFAULTS, **getattr(settings, 'TASK_DEBOUNCE', {})}
+    if task_name:
+        config.update(config['TASKS'].get(task_name, {}))
+    return config
+
+
+def get_key(task_name, kwargs):
+    arguments = ':'.join(f'{name}={kwargs[name]}' for name in sorted(kwargs))
+    return f'debounce:{task_name}:{arguments}'
+
+
+def _marker_timeout(config):
+    # Маркер переживает самую долгую серию; если проверка потерялась,
+    # он истечет и следующее событие начнет новую серию
+    return config['MAX_DELAY_SECONDS'] + 2 * config['QUIET_SECONDS'] + 60
+
+
+def debounced_enqueue(task, kwargs):
+    """Ставит task(**kwargs) с подавлением дублей после коммита текущей транзакции"""
+    transaction.on_commit(lambda: enqueue_now(task, kwargs))
+
+
+def enqueue_now(task, kwargs):
+    """Возвращает True, если событие начало новую серию и запуск запланирован"""
+    from core.tasks import run_debounced
+
+    config = get_config(task.name)
+    if run_debounced.app.conf.task_always_eager:
+        task.apply(kwargs=kwargs)
+        return True
+
+    cache = caches[config['CACHE_ALIAS']]
+    key = get_key(task.name, kwargs)
+    now = time.time()
+    timeout = _marker_timeout(config)
+
+    cache.set(f'{key}:last', now, timeout)
+    if not cache.add(key, now, timeout):
+        return False
+
+    try:
+        run_debounced.apply_async(args=[task.name, kwargs], countdown=config['QUIET_SECONDS'], retry=False)
+    except Exception:
+        # Брокер недоступен: следующая попытка не раньше чем через QUIET_SECONDS,
+        # чтобы каждое событие не ждало таймаут соединения
+        cache.set(key, now, config['QUIET_SECONDS'])
+        logger.warning(f"Failed to enqueue debounced task {task.name} {kwargs}", exc_info=True)
+        return False
+    return True
+
+
+def get_wait(task_name, kwargs):
+    """
+    Сколько секунд еще ждать до запуска. При 0 маркер снимается: события
+    после этого начнут новую серию, а уже закоммиченные увидит запуск
+    """
+    config = get_config(task_name)
+    cache = caches[config['CACHE_ALIAS']]
+    key = get_key(task_name, kwargs)
+
+    first = cache.get(key)
+    if first is None:
+        return 0
+    last = cache.get(f'{key}:last', first)
+    wait = min(last + config['QUIET_SECONDS'], first + config['MAX_DELAY_SECONDS']) - time.time()
+    if wait > 0:
+        return wait
+
+    cache.delete(key)
+    return 0
@@ -0,0 +1,264 @@
+"""
+Карта идентичности и мемоизация в пределах запроса или задачи Celery.
+
+Внутри области (IdentityMapMiddleware для запроса, сигналы Celery для задачи):
+- объект, загруженный по внешнему ключу (review.user, profile.user,
+  course.category), берется из карты по (модель, pk), если уже загружался
+  в этой области; повторная загрузка не идет в БД
+- get(model, pk) загружает объект через ту же карту
+- методы моделей с @memoize вычисляются один раз на (объект, аргументы)
+
+Карта хранит только модели из IDENTITY_MAP['MODELS'] (пользователи,
+профили, курсы, категории, роли); связи с другими моделями загружаются
+как обычно. Запись такой модели (post_save, post_delete, m2m_changed)
+убирает объект из карты и сбрасывает все мемоизированные результаты,
+поэтому @memoize-методы должны зависеть только от этих моделей. Сигналы
+подключаются с sender каждой модели: получатель post_delete без sender
+отключил бы быстрое удаление (DELETE без загрузки объектов) для всех
+моделей, например при очистке логов аналитики.
+Если запись была внутри транзакции, до ее завершения новые значения не
+запоминаются: после отката в карте не останется незакоммиченных данных.
+Изменения через QuerySet.update() сигналов не посылают - после них нужен clear().
+
+Вне области все работает как без карты.
+"""
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.models.fields.related_descriptors import ForwardManyToOneDescriptor
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+_current = ContextVar('identity_map', default=None)
+
+# Метки моделей, которые хранятся в карте (заполняется в install)
+_models = frozenset()
+
+
+def is_tracked(model):
+    return model._meta.label in _models
+
+
+class IdentityMap:
+    def __init__(self):
+        self.instances = {}
+        self.memo = {}
+        self.dirty_aliases = set()
+        self.hits = 0
+
+    @staticmethod
+    def get_key(model, pk):
+        return model._meta.label, pk
+
+    def can_store(self):
+        """Не запоминаем, пока не завершилась транзакция, в которой была запись"""
+        return not any(connections[alias].in_atomic_block for alias in self.dirty_aliases)
+
+    def lookup(self, model, pk):
+        if not is_tracked(model):
+            return None
+        instance = self.instances.get(self.get_key(model, pk))
+        if instance is not None:
+            self.hits += 1
+        return instance
+
+    def add(self, instance):
+        if instance is not None and instance.pk is not None and is_tracked(type(instance)) and self.can_store():
+            self.instances[self.get_key(type(instance), instance.pk)] = instance
+        return instance
+
+    def on_write(self, instance, using):
+        if instance.pk is not None:
+            self.instances.pop(self.get_key(type(instance), instance.pk), None)
+        self.memo.clear()
+        if using and connections[using].in_atomic_block:
+            self.dirty_aliases.add(using)
+
+    def clear(self):
+        self.instances.clear()
+        self.memo.clear()
+
+
+def get_current():
+    return _current.get()
+
+
+@contextmanager
+def scope():
+    """Область карты; вложенная область использует внешнюю"""
+    current = _current.get()
+    if current is not None:
+        yield current
+        return
+
+    token = _current.set(IdentityMap())
+    try:
+        yield _current.get()
+    finally:
+        _current.reset(token)
+
+
+def get(model, pk):
+    """Объект по первичному ключу: из карты или одним запросом"""
+    current = _current.get()
+    if current is None:
+        return model._default_manager.get(pk=pk)
+    instance = current.lookup(model, pk)
+    if instance is None:
+        instance = current.add(model._default_manager.get(pk=pk))
+    return instance
+
+
+def add(instance):
+    """Кладет уже загруженный объект в карту текущей области"""
+    current = _current.get()
+    if current is not None:
+        current.add(instance)
+    return instance
+
+
+def clear():
+    current = _current.get()
+    if current is not None:
+        current.clear()
+
+
+def memoize(method):
+    """Кэширует результат метода модели в текущей области по (объект, аргументы)"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        current = _current.get()
+        if current is None or self.pk is None:
+            return method(self, *args, **kwargs)
+
+        key = (self._meta.label, self.pk, method.__qualname__, args, tuple(sorted(kwargs.items())))
+        try:
+            value = current.memo[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # Нехэшируемые аргументы - без мемоизации
+            return method(self, *args, **kwargs)
+        else:
+            current.hits += 1
+            return value
+
+        value = method(self, *args, **kwargs)
+        if current.can_store():
+            current.memo[key] = value
+        return value
+    return wrapper
+
+
+_load_related = ForwardManyToOneDescriptor.get_object
+
+
+def _get_related_object(descriptor, instance):
+    """Загрузка по внешнему ключу через карту текущей области"""
+    current = _current.get()
+    field = descriptor.field
+    if current is None or not field.target_field.primary_key:
+        return _load_related(descriptor, instance)
+
+    model = field.remote_field.model
+    if not is_tracked(model):
+        return _load_related(descriptor, instance)
+    related = current.lookup(model, getattr(instance, field.attname))
+    if related is None:
+        related = current.add(_load_related(descriptor, instance))
+    return related
+
+
+def on_model_write(sender, instance, using=None, **kwargs):
+    current = _current.get()
+    if current is not None:
+        current.on_write(instance, using)
+
+
+class IdentityMapMiddleware:
+    """
+    Открывает область карты идентичности на время запроса.
+    В асинхронной цепочке область открывается в корутине запроса:
+    sync_to_async копирует контекст, поэтому ORM в потоке видит ту же карту
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not get_config()['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with scope():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with scope():
+            return await self.get_response(request)
+
+
+_task_tokens = {}
+
+
+def on_task_prerun(sender=None, task_id=None, **kwargs):
+    # Eager-задача внутри запроса или другой задачи использует внешнюю область
+    if _current.get() is None:
+        _task_tokens[task_id] = _current.set(IdentityMap())
+
+
+def on_task_postrun(sender=None, task_id=None, **kwargs):
+    token = _task_tokens.pop(task_id, None)
+    if token is not None:
+        _current.reset(token)
+
+
+DEFAULTS = {
+    'ENABLED': True,
+    'MODELS': (
+        'accounts.User',
+        'accounts.Profile',
+        'courses.Category',
+        'courses.Course',
+        'courses.CourseUserRole',
+    ),
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'IDENTITY_MAP', {})}
+
+
+def install():
+    """Подключает карту к загрузке по внешним ключам, сигналам моделей и Celery"""
+    global _models
+    config = get_config()
+    if not config['ENABLED']:
+        return
+    ForwardManyToOneDescriptor.get_object = _get_related_object
+
+    models = [apps.get_model(label) for label in config['MODELS']]
+    _models = frozenset(model._meta.label for model in models)
+    for model in models:
+        label = model._meta.label
+        post_save.connect(on_model_write, sender=model, dispatch_uid=f'core.identity_map.save.{label}')
+        post_delete.connect(on_model_write, sender=model, dispatch_uid=f'core.identity_map.delete.{label}')
+        for field in model._meta.local_many_to_many:
+            m2m_changed.connect(
+                on_model_write, sender=field.remote_field.through, dispatch_uid=f'core.identity_map.m2m.{label}.{field.name}'
+            )
+
+    from celery import signals
+    signals.task_prerun.connect(on_task_prerun, dispatch_uid='core.identity_map.prerun')
+    signals.task_postrun.connect(on_task_postrun, dispatch_uid='core.identity_map.postrun')
@@ -0,0 +1,32 @@
+import shlex
+
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+
+from core.celery_queues import get_worker_argv
+
+
+class Command(BaseCommand):
+    help = 'Запускает воркер Celery с пресетом очереди (CELERY_WORKER_PRESETS)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('preset', help='Пресет: ' + ', '.join(settings.CELERY_WORKER_PRESETS))
+        parser.add_argument('--concurrency', type=int, help='Число процессов вместо значения пресета')
+        parser.add_argument('--loglevel', default='info')
+        parser.add_argument(
+            '--print', action='store_true',
+            help='Только вывести команду celery (для systemd, Docker, Procfile)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            argv = get_worker_argv(options['preset'], options['concurrency'], options['loglevel'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['print']:
+            self.stdout.write(shlex.join(['celery', '-A', 'ustat'] + argv))
+            return
+
+        from ustat.celery import app
+        app.worker_main(argv)
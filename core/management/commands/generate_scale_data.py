@@ -0,0 +1,87 @@
+import multiprocessing
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from core.scale_data import SCALES, ScaleDataGenerator, run_chunk
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует детерминированный набор данных заданного масштаба для нагрузочного тестирования '
+        '(bulk_create пакетами, без сигналов, счетчики пересчитываются в конце)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=list(SCALES), default='small', help='Пресет объема данных')
+        parser.add_argument('--seed', type=int, default=42, help='Зерно генератора: одинаковый seed - одинаковые данные')
+        parser.add_argument('--workers', type=int, default=1, help='Число процессов генерации')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Строк в одном INSERT')
+        for name in ('teachers', 'students', 'courses', 'enrollments', 'reviews', 'analytics-logs'):
+            parser.add_argument(f'--{name}', type=int, help='Переопределить значение пресета')
+
+    def handle(self, *args, **options):
+        generator = ScaleDataGenerator(
+            scale=options['scale'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            teachers=options['teachers'],
+            students=options['students'],
+            courses=options['courses'],
+            enrollments=options['enrollments'],
+            reviews=options['reviews'],
+            analytics_logs=options['analytics_logs'],
+        )
+        if generator.already_generated():
+            raise CommandError(f"Данные с seed={options['seed']} уже сгенерированы")
+
+        workers = max(options['workers'], 1)
+        if workers > 1 and connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING('SQLite не поддерживает параллельную запись, используется 1 процесс'))
+            workers = 1
+
+        started = time.perf_counter()
+        generator.prepare()
+        self._report('prepare', {}, time.perf_counter() - started)
+
+        totals = Counter()
+        for phase, chunks in generator.get_tasks():
+            phase_started = time.perf_counter()
+            counts = self._run_phase(generator, phase, chunks, workers)
+            self._report(phase, counts, time.perf_counter() - phase_started)
+            totals.update(counts)
+
+        phase_started = time.perf_counter()
+        generator.reset_sequences()
+        counters = generator.recalculate_counters()
+        self._report('counters', counters, time.perf_counter() - phase_started)
+
+        elapsed = time.perf_counter() - started
+        rows = sum(totals.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано {rows} строк за {elapsed:.1f} с ({rows / elapsed:.0f} строк/с)'
+        ))
+
+    def _run_phase(self, generator, phase, chunks, workers):
+        counts = Counter()
+        if workers == 1:
+            for start, stop in chunks:
+                counts.update(generator.generate(phase, start, stop))
+            return counts
+
+        # Дочерние процессы не должны наследовать открытые соединения родителя
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = [executor.submit(run_chunk, generator, phase, start, stop) for start, stop in chunks]
+            for future in futures:
+                counts.update(future.result())
+        return counts
+
+    def _report(self, phase, counts, elapsed):
+        rows = sum(counts.values()) if phase != 'counters' else 0
+        details = ', '.join(f'{name}={value}' for name, value in counts.items())
+        rate = f', {rows / elapsed:.0f} строк/с' if rows and elapsed else ''
+        self.stdout.write(f'{phase}: {elapsed:.2f} с{rate}' + (f' ({details})' if details else ''))
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import outbox
+
+
+class Command(BaseCommand):
+    help = 'Отдельный процесс relay: доставляет события outbox пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Обработать готовые события и выйти')
+        parser.add_argument('--interval', type=float, default=1.0, help='Пауза при пустой очереди, секунд')
+
+    def handle(self, *args, **options):
+        while True:
+            total, has_more = outbox.relay()
+            if total:
+                self.stdout.write(f'Доставлено событий: {total}')
+            if options['once'] and not has_more:
+                return
+            if not has_more:
+                time.sleep(options['interval'])
@@ -0,0 +1,40 @@
+import sqlite3
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Локальная имитация реплики: периодически копирует SQLite-файл primary '
+        'в файл реплики, создавая задержку репликации'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--replica', default='replica', help='Алиас реплики в DATABASES')
+        parser.add_argument('--lag', type=float, default=2.0, help='Задержка репликации в секундах')
+        parser.add_argument('--once', action='store_true', help='Скопировать один раз и выйти')
+
+    def sync(self, primary_path, replica_path):
+        source = sqlite3.connect(primary_path)
+        target = sqlite3.connect(replica_path)
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+
+    def handle(self, *args, **options):
+        replica = options['replica']
+        if replica not in connections.databases:
+            raise CommandError(f'База {replica} не настроена (задайте SQLITE_REPLICA_PATH)')
+
+        primary_path = connections[DEFAULT_DB_ALIAS].settings_dict['NAME']
+        replica_path = connections[replica].settings_dict['NAME']
+
+        while True:
+            self.sync(primary_path, replica_path)
+            if options['once']:
+                self.stdout.write(self.style.SUCCESS(f'Реплика {replica} синхронизирована'))
+                return
+            time.sleep(options['lag'])
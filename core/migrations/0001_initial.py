@@ -0,0 +1,34 @@
+# Generated by Django 4.2.18 on 2026-10-19 17:17
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(max_length=100, verbose_name='Тип события')),
+                ('payload', models.JSONField(default=dict, verbose_name='Данные')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает'), ('done', 'Обработано'), ('failed', 'Ошибка')], default='pending', max_length=10, verbose_name='Статус')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Попытки')),
+                ('last_error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата создания')),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Доступно с')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата обработки')),
+            ],
+            options={
+                'verbose_name': 'Событие outbox',
+                'verbose_name_plural': 'События outbox',
+                'indexes': [models.Index(fields=['status', 'available_at', 'id'], name='core_outbox_status_7b7738_idx'), models.Index(fields=['status', 'processed_at'], name='core_outbox_status_6e84ce_idx')],
+            },
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib import admin
+from django.utils import timezone
 
 class BaseModel(models.Model):
     """Базовая модель с общими полями"""
@@ -9,6 +10,40 @@ class BaseModel(models.Model):
     class Meta:
         abstract = True
 
+class OutboxEvent(models.Model):
+    """
+    Доменное событие, записанное в транзакции изменения данных.
+    Побочные эффекты выполняет relay (core/outbox.py) после коммита
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Ожидает'),
+        (STATUS_DONE, 'Обработано'),
+        (STATUS_FAILED, 'Ошибка'),
+    ]
+
+    event_type = models.CharField('Тип события', max_length=100)
+    payload = models.JSONField('Данные', default=dict)
+    status = models.CharField('Статус', max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField('Попытки', default=0)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created_at = models.DateTimeField('Дата создания', default=timezone.now)
+    available_at = models.DateTimeField('Доступно с', default=timezone.now)
+    processed_at = models.DateTimeField('Дата обработки', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Событие outbox'
+        verbose_name_plural = 'События outbox'
+        indexes = [
+            models.Index(fields=['status', 'available_at', 'id']),  # Выборка пачки relay
+            models.Index(fields=['status', 'processed_at']),  # Очистка обработанных
+        ]
+
+    def __str__(self):
+        return f'{self.event_type} #{self.pk}'
+
 class BaseAdminConfig:
     """Базовая конфигурация для админки"""
     @classmethod
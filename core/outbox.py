@@ -0,0 +1,184 @@
+"""
+Транзакционный outbox доменных событий.
+
+publish() пишет событие в таблицу OutboxEvent в текущей транзакции:
+если она откатится, события не будет, и побочные эффекты (сброс кэша,
+пересчет счетчиков) не выполнятся раньше коммита.
+
+Relay забирает события пачками (SELECT ... FOR UPDATE SKIP LOCKED, поэтому
+несколько relay не берут одни и те же события), группирует по типу и
+вызывает каждый обработчик один раз на пачку со списком payload. Пачка
+отмечается обработанной в той же транзакции: при падении relay события
+будут доставлены повторно (at-least-once), обработчики должны быть
+идемпотентны. Ошибка обработчика откладывает события его типа с растущей
+задержкой, после MAX_ATTEMPTS событие получает статус failed.
+
+Relay запускается задачей core.tasks.relay_outbox после коммита (с подавлением
+дублей, core/debounce.py), периодически из beat или отдельным процессом:
+    python manage.py relay_outbox
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from prometheus_client import Counter, Histogram
+
+from core.models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BATCH_SIZE': 500,
+    'MAX_BATCHES': 20,
+    'MAX_ATTEMPTS': 10,
+    'RETRY_BASE_SECONDS': 5,
+    'RETRY_MAX_SECONDS': 3600,
+    'RETENTION_HOURS': 24,
+}
+
+outbox_events_total = Counter(
+    'outbox_events_total',
+    'Total number of relayed outbox events',
+    ['event_type', 'state']
+)
+
+outbox_delivery_lag_seconds = Histogram(
+    'outbox_delivery_lag_seconds',
+    'Time between outbox event creation and its dispatch in seconds',
+    ['event_type'],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600)
+)
+
+_handlers = defaultdict(list)
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'OUTBOX', {})}
+
+
+def handler(event_type):
+    """Регистрирует обработчик пачки событий: func(payloads)"""
+    def decorator(func):
+        _handlers[event_type].append(func)
+        return func
+    return decorator
+
+
+def publish(event_type, **payload):
+    """Записывает событие в текущей транзакции и будит relay после коммита"""
+    from core.debounce import debounced_enqueue
+    from core.tasks import relay_outbox
+
+    event = OutboxEvent.objects.create(event_type=event_type, payload=payload)
+    debounced_enqueue(relay_outbox, {})
+    return event
+
+
+def publish_many(event_type, payloads):
+    """Пачка событий одного типа одним INSERT (для bulk-операций без сигналов)"""
+    from core.debounce import debounced_enqueue
+    from core.tasks import relay_outbox
+
+    events = OutboxEvent.objects.bulk_create(
+        [OutboxEvent(event_type=event_type, payload=payload) for payload in payloads]
+    )
+    if events:
+        debounced_enqueue(relay_outbox, {})
+    return events
+
+
+def dispatch(events):
+    """Вызывает обработчики по типам. Возвращает {id события: ошибка} для неудачных"""
+    by_type = defaultdict(list)
+    for event in events:
+        by_type[event.event_type].append(event)
+
+    failed = {}
+    for event_type, group in by_type.items():
+        payloads = [event.payload for event in group]
+        for func in _handlers.get(event_type, []):
+            try:
+                func(payloads)
+            except Exception as e:
+                logger.exception(f"Outbox handler {func.__name__} failed for {len(group)} {event_type} events")
+                for event in group:
+                    failed.setdefault(event.id, f'{func.__name__}: {e!r}')
+    return failed
+
+
+def get_retry_delay(attempts, config):
+    return timedelta(seconds=min(config['RETRY_BASE_SECONDS'] * 2 ** (attempts - 1), config['RETRY_MAX_SECONDS']))
+
+
+def relay_batch(config=None):
+    """Забирает и обрабатывает одну пачку. Возвращает число событий в пачке"""
+    config = config or get_config()
+    with transaction.atomic():
+        now = timezone.now()
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxEvent.STATUS_PENDING, available_at__lte=now)
+            .order_by('id')[:config['BATCH_SIZE']]
+        )
+        if not events:
+            return 0
+
+        failed = dispatch(events)
+        now = timezone.now()
+
+        retried = []
+        for event in events:
+            if event.id not in failed:
+                outbox_events_total.labels(event_type=event.event_type, state='done').inc()
+                outbox_delivery_lag_seconds.labels(event_type=event.event_type).observe(
+                    (now - event.created_at).total_seconds()
+                )
+                continue
+
+            event.attempts += 1
+            event.last_error = failed[event.id][:2000]
+            if event.attempts >= config['MAX_ATTEMPTS']:
+                event.status = OutboxEvent.STATUS_FAILED
+                event.processed_at = now
+            else:
+                event.available_at = now + get_retry_delay(event.attempts, config)
+            state = 'failed' if event.status == OutboxEvent.STATUS_FAILED else 'retry'
+            outbox_events_total.labels(event_type=event.event_type, state=state).inc()
+            retried.append(event)
+
+        OutboxEvent.objects.filter(
+            id__in=[event.id for event in events if event.id not in failed]
+        ).update(status=OutboxEvent.STATUS_DONE, processed_at=now)
+        OutboxEvent.objects.bulk_update(retried, ['attempts', 'last_error', 'status', 'available_at', 'processed_at'])
+
+    return len(events)
+
+
+def relay(max_batches=None):
+    """
+    Обрабатывает пачки, пока есть готовые события, но не больше MAX_BATCHES.
+    Возвращает (число событий, остались ли необработанные)
+    """
+    config = get_config()
+    max_batches = max_batches or config['MAX_BATCHES']
+
+    total = 0
+    for _ in range(max_batches):
+        count = relay_batch(config)
+        total += count
+        if count < config['BATCH_SIZE']:
+            return total, False
+    return total, True
+
+
+def purge(hours=None):
+    """Удаляет обработанные события старше RETENTION_HOURS; failed остаются для разбора"""
+    hours = get_config()['RETENTION_HOURS'] if hours is None else hours
+    deleted, _ = OutboxEvent.objects.filter(
+        status=OutboxEvent.STATUS_DONE,
+        processed_at__lt=timezone.now() - timedelta(hours=hours)
+    ).delete()
+    return deleted
@@ -0,0 +1,340 @@
+"""
+Профилирование отдельных запросов в продакшене.
+
+ProfilingMiddleware включает семплирующий профилировщик для доли
+запросов (PROFILING['SAMPLE_RATE']) или для запроса с подписанным
+заголовком (токен выдает staff через /api/profiling/token/). Профилировщик -
+фоновый поток, который каждые INTERVAL_MS мс снимает стек потока запроса
+(sys._current_frames), поэтому код запроса не инструментируется.
+
+Под ASGI middleware остается асинхронной. Поток событийного цикла
+выполняет и другие запросы, поэтому учитываются только снимки, в стеке
+которых есть корутина этого запроса. В такой профиль не попадают код,
+выполняемый через sync_to_async в другом потоке, и отдельные задачи
+asyncio (create_task, корутины внутри asyncio.gather).
+
+Результат хранится в формате collapsed stacks ("a;b;c 12"), который
+понимают flamegraph.pl, speedscope и inferno: в каталоге или в Redis,
+не больше MAX_PROFILES_PER_ENDPOINT профилей на эндпоинт.
+
+Если запрос не выбран, middleware только проверяет заголовок
+(и бросает random при SAMPLE_RATE > 0); при ENABLED=False она не
+подключается вовсе.
+"""
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    'SAMPLE_RATE': 0.0,
+    'INTERVAL_MS': 5,
+    'HEADER': 'X-Profile-Token',
+    'TOKEN_MAX_AGE': 3600,
+    'STORAGE': 'local',
+    'DIRECTORY': None,
+    'REDIS_URL': None,
+    'KEY_PREFIX': 'ustat:profiles:',
+    'MAX_PROFILES_PER_ENDPOINT': 20,
+    'MAX_STACK_DEPTH': 128,
+}
+
+TOKEN_SALT = 'core.profiling'
+PROFILE_ID_RE = re.compile(r'^\d+-[0-9a-f]{8}$')
+
+
+def get_config():
+    config = {**DEFAULTS, **getattr(settings, 'PROFILING', {})}
+    if not config['DIRECTORY']:
+        config['DIRECTORY'] = os.path.join(settings.BASE_DIR, 'profiles')
+    return config
+
+
+def make_token():
+    """Токен для заголовка, включающего профилирование запроса"""
+    return signing.dumps('profile', salt=TOKEN_SALT)
+
+
+def check_token(token):
+    try:
+        return signing.loads(token, salt=TOKEN_SALT, max_age=get_config()['TOKEN_MAX_AGE']) == 'profile'
+    except signing.BadSignature:
+        return False
+
+
+class SamplingProfiler:
+    """
+    Снимает стек одного потока с заданным интервалом в фоновом потоке.
+    С owner_frame учитываются только стеки, которые проходят через этот кадр
+    (корутина запроса в потоке событийного цикла)
+    """
+
+    def __init__(self, thread_id, interval, max_depth=128, owner_frame=None):
+        self.thread_id = thread_id
+        self.owner_frame = owner_frame
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+        self._roots = tuple(sorted({os.path.join(str(settings.BASE_DIR), ''), *(
+            os.path.join(path, '') for path in sys.path if path and os.path.isdir(path)
+        )}, key=len, reverse=True))
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None and self._owns(frame):
+                self.stacks[self._stack(frame)] += 1
+                self.samples += 1
+
+    def _owns(self, frame):
+        if self.owner_frame is None:
+            return True
+        while frame is not None:
+            if frame is self.owner_frame:
+                return True
+            frame = frame.f_back
+        return False
+
+    def _frame_name(self, code):
+        filename = code.co_filename
+        for root in self._roots:
+            if filename.startswith(root):
+                filename = filename[len(root):]
+                break
+        name = getattr(code, 'co_qualname', code.co_name)
+        return f'{name} ({filename}:{code.co_firstlineno})'.replace(';', ':')
+
+    def _stack(self, frame):
+        names = []
+        while frame is not None and len(names) < self.max_depth:
+            names.append(self._frame_name(frame.f_code))
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+    def folded(self):
+        """Стеки в формате collapsed stacks, самые частые первыми"""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+def endpoint_key(endpoint):
+    return re.sub(r'[^\w.-]+', '_', endpoint).strip('_') or 'root'
+
+
+class LocalProfileStorage:
+    """Профили в файлах <DIRECTORY>/<эндпоинт>/<id>.json"""
+
+    def __init__(self, directory, max_per_endpoint):
+        self.directory = directory
+        self.max_per_endpoint = max_per_endpoint
+
+    def save(self, profile):
+        directory = os.path.join(self.directory, endpoint_key(profile['endpoint']))
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"{profile['id']}.json"), 'w', encoding='utf-8') as f:
+            json.dump(profile, f, ensure_ascii=False)
+
+        # id начинается с времени в мс, поэтому сортировка имен - сортировка по времени
+        names = sorted(name for name in os.listdir(directory) if name.endswith('.json'))
+        for name in names[:-self.max_per_endpoint]:
+            os.remove(os.path.join(directory, name))
+
+    def list(self):
+        profiles = []
+        if not os.path.isdir(self.directory):
+            return profiles
+        for endpoint in os.listdir(self.directory):
+            directory = os.path.join(self.directory, endpoint)
+            for name in os.listdir(directory):
+                profile = self._read(os.path.join(directory, name))
+                if profile is not None:
+                    profile.pop('folded', None)
+                    profiles.append(profile)
+        return sorted(profiles, key=lambda profile: profile['id'], reverse=True)
+
+    def get(self, profile_id):
+        if not os.path.isdir(self.directory):
+            return None
+        for endpoint in os.listdir(self.directory):
+            profile = self._read(os.path.join(self.directory, endpoint, f'{profile_id}.json'))
+            if profile is not None:
+                return profile
+        return None
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            # Файл мог удалить другой процесс при ротации
+            return None
+
+
+class RedisProfileStorage:
+    """
+    Профили в Redis: <prefix>profile:<id> - JSON профиля,
+    <prefix>endpoint:<эндпоинт> - sorted set id по времени,
+    <prefix>endpoints - множество эндпоинтов
+    """
+
+    def __init__(self, client, prefix, max_per_endpoint):
+        self.client = client
+        self.prefix = prefix
+        self.max_per_endpoint = max_per_endpoint
+
+    def save(self, profile):
+        index = f"{self.prefix}endpoint:{endpoint_key(profile['endpoint'])}"
+        pipe = self.client.pipeline()
+        pipe.set(f"{self.prefix}profile:{profile['id']}", json.dumps(profile, ensure_ascii=False))
+        pipe.zadd(index, {profile['id']: profile['timestamp']})
+        pipe.sadd(f'{self.prefix}endpoints', index)
+        pipe.zrange(index, 0, -self.max_per_endpoint - 1)
+        pipe.zremrangebyrank(index, 0, -self.max_per_endpoint - 1)
+        stale = pipe.execute()[3]
+        if stale:
+            self.client.delete(*(f"{self.prefix}profile:{profile_id.decode()}" for profile_id in stale))
+
+    def list(self):
+        ids = []
+        for index in self.client.smembers(f'{self.prefix}endpoints'):
+            ids.extend(profile_id.decode() for profile_id in self.client.zrange(index, 0, -1))
+        if not ids:
+            return []
+        profiles = []
+        for value in self.client.mget([f'{self.prefix}profile:{profile_id}' for profile_id in ids]):
+            if value is not None:
+                profile = json.loads(value)
+                profile.pop('folded', None)
+                profiles.append(profile)
+        return sorted(profiles, key=lambda profile: profile['id'], reverse=True)
+
+    def get(self, profile_id):
+        value = self.client.get(f'{self.prefix}profile:{profile_id}')
+        return json.loads(value) if value is not None else None
+
+
+_redis_clients = {}
+
+
+def get_storage():
+    config = get_config()
+    if config['STORAGE'] == 'redis':
+        url = config['REDIS_URL']
+        if url not in _redis_clients:
+            import redis
+            _redis_clients[url] = redis.Redis.from_url(url)
+        return RedisProfileStorage(_redis_clients[url], config['KEY_PREFIX'], config['MAX_PROFILES_PER_ENDPOINT'])
+    return LocalProfileStorage(config['DIRECTORY'], config['MAX_PROFILES_PER_ENDPOINT'])
+
+
+class ProfilingMiddleware:
+    """Семплирующее профилирование выбранных запросов (см. описание модуля)"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        config = get_config()
+        if not config['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = config['SAMPLE_RATE']
+        self.header = config['HEADER']
+        self.interval = config['INTERVAL_MS'] / 1000
+        self.max_depth = config['MAX_STACK_DEPTH']
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def should_profile(self, request):
+        token = request.headers.get(self.header)
+        if token is not None:
+            return check_token(token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        profiler = SamplingProfiler(threading.get_ident(), self.interval, self.max_depth)
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.stop()
+        profile = self.build_profile(request, response, profiler, time.perf_counter() - started)
+        return self.save_profile(response, profile)
+
+    async def __acall__(self, request):
+        if not self.should_profile(request):
+            return await self.get_response(request)
+
+        profiler = SamplingProfiler(
+            threading.get_ident(), self.interval, self.max_depth, owner_frame=sys._getframe()
+        )
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            # join фонового потока занимает не больше одного интервала
+            profiler.stop()
+        profile = self.build_profile(request, response, profiler, time.perf_counter() - started)
+        return await sync_to_async(self.save_profile)(response, profile)
+
+    def build_profile(self, request, response, profiler, duration):
+        match = request.resolver_match
+        now = time.time()
+        return {
+            'id': f'{int(now * 1000)}-{uuid.uuid4().hex[:8]}',
+            'endpoint': (match.view_name or match.route) if match else request.path,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+            'samples': profiler.samples,
+            'interval_ms': self.interval * 1000,
+            'timestamp': now,
+            'created_at': timezone.now().isoformat(),
+            'folded': profiler.folded(),
+        }
+
+    @staticmethod
+    def save_profile(response, profile):
+        try:
+            get_storage().save(profile)
+        except Exception:
+            # Профилирование не должно ломать запрос
+            logger.warning('Failed to save request profile', exc_info=True)
+            return response
+
+        response['X-Profile-Id'] = profile['id']
+        return response
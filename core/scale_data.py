@@ -0,0 +1,413 @@
+"""
+Детерминированная генерация синтетических данных промышленного объема
+для нагрузочного тестирования (команда generate_scale_data).
+
+Отличия от демо-команд:
+- строки создаются через bulk_create пакетами, пароль хэшируется один раз;
+- сигналы (профили, аналитика, рейтинги) не срабатывают, поэтому профили
+  и CourseAnalytics создаются явно, а денормализованные счетчики
+  пересчитываются один раз в конце;
+- первичные ключи назначаются заранее, поэтому части данных можно
+  генерировать в разных процессах без обмена id;
+- каждая часть (chunk) использует свой генератор случайных чисел,
+  зависящий только от seed и номера части: результат не зависит
+  от числа процессов.
+"""
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, models, transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from accounts.models import Profile, User
+from courses.models import (
+    AnalyticsLog, Category, Course, CourseAnalytics, CourseUserRole, Enrollment,
+    Lesson, Module, Review, Tag
+)
+
+SCALES = {
+    'tiny': {
+        'categories': 3, 'tags': 5, 'teachers': 5, 'students': 50, 'courses': 10,
+        'modules_per_course': 2, 'lessons_per_module': 2,
+        'enrollments': 150, 'reviews': 40, 'analytics_logs': 300,
+    },
+    'small': {
+        'categories': 10, 'tags': 20, 'teachers': 50, 'students': 2_000, 'courses': 200,
+        'modules_per_course': 3, 'lessons_per_module': 4,
+        'enrollments': 20_000, 'reviews': 4_000, 'analytics_logs': 40_000,
+    },
+    'medium': {
+        'categories': 20, 'tags': 50, 'teachers': 500, 'students': 50_000, 'courses': 2_000,
+        'modules_per_course': 4, 'lessons_per_module': 5,
+        'enrollments': 250_000, 'reviews': 50_000, 'analytics_logs': 500_000,
+    },
+    'large': {
+        'categories': 30, 'tags': 100, 'teachers': 2_000, 'students': 300_000, 'courses': 10_000,
+        'modules_per_course': 5, 'lessons_per_module': 5,
+        'enrollments': 1_000_000, 'reviews': 200_000, 'analytics_logs': 2_000_000,
+    },
+}
+
+PASSWORD = 'loadtest123'
+
+# Размеры частей фиксированы: от них зависит разбиение случайных последовательностей
+USERS_CHUNK = 5_000
+COURSES_CHUNK = 500
+STUDENTS_CHUNK = 1_000
+
+ENROLLMENT_STATUSES = (('active', 70), ('completed', 20), ('dropped', 10))
+RATINGS = ((5, 50), (4, 30), (3, 12), (2, 5), (1, 3))
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """Позволяет задать значения полей auto_now_add при bulk_create"""
+    saved = [(field, field.auto_now_add) for field in fields]
+    for field, _ in saved:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in saved:
+            field.auto_now_add = value
+
+
+def _weighted(rng, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+
+class ScaleDataGenerator:
+    """
+    Генератор набора данных заданного масштаба. Экземпляр передается
+    в дочерние процессы, поэтому хранит только простые значения.
+    """
+
+    def __init__(self, scale='small', seed=42, batch_size=2_000, **overrides):
+        if scale not in SCALES:
+            raise ValueError(f'Неизвестный масштаб: {scale}')
+        self.scale = scale
+        self.seed = seed
+        self.batch_size = batch_size
+        self.sizes = {**SCALES[scale], **{key: value for key, value in overrides.items() if value is not None}}
+        self.prefix = f'load{seed}'
+        self.now = timezone.now().replace(microsecond=0)
+        self.password = None
+        self.bases = {}
+        self.category_ids = []
+        self.tag_ids = []
+        self._course_prices = None
+
+    # Подготовка (в основном процессе)
+
+    def already_generated(self):
+        return User.objects.filter(email=self.user_email(0)).exists()
+
+    def prepare(self):
+        """Хэш пароля, категории, теги и базовые id для каждой таблицы с явными ключами"""
+        self.password = make_password(PASSWORD)
+
+        categories = [
+            Category(name=f'Категория {i + 1}', slug=f'{self.prefix}-category-{i}', description='Сгенерировано')
+            for i in range(self.sizes['categories'])
+        ]
+        self.category_ids = [category.pk for category in self._bulk_create_with_ids(Category, categories)]
+        tags = [Tag(name=f'Тег {i + 1}', slug=f'{self.prefix}-tag-{i}') for i in range(self.sizes['tags'])]
+        self.tag_ids = [tag.pk for tag in self._bulk_create_with_ids(Tag, tags)]
+
+        for name, model in (('user', User), ('course', Course), ('module', Module)):
+            self.bases[name] = (model.objects.aggregate(max_id=Max('id'))['max_id'] or 0) + 1
+
+    def _bulk_create_with_ids(self, model, objects):
+        base = (model.objects.aggregate(max_id=Max('id'))['max_id'] or 0) + 1
+        for offset, obj in enumerate(objects):
+            obj.pk = base + offset
+        return model.objects.bulk_create(objects, batch_size=self.batch_size)
+
+    def get_tasks(self):
+        """Фазы генерации: внутри фазы части независимы и могут идти параллельно"""
+        users = self.sizes['teachers'] + self.sizes['students']
+        return [
+            ('users', [(start, min(start + USERS_CHUNK, users)) for start in range(0, users, USERS_CHUNK)]),
+            ('courses', [
+                (start, min(start + COURSES_CHUNK, self.sizes['courses']))
+                for start in range(0, self.sizes['courses'], COURSES_CHUNK)
+            ]),
+            ('activity', [
+                (start, min(start + STUDENTS_CHUNK, self.sizes['students']))
+                for start in range(0, self.sizes['students'], STUDENTS_CHUNK)
+            ]),
+        ]
+
+    # Детерминированные атрибуты
+
+    def rng(self, phase, start):
+        return random.Random(f'{self.seed}:{phase}:{start}')
+
+    def user_email(self, index):
+        return f'{self.prefix}-user-{index}@example.com'
+
+    def teacher_id(self, index):
+        return self.bases['user'] + index
+
+    def student_id(self, index):
+        return self.bases['user'] + self.sizes['teachers'] + index
+
+    def course_price(self, index):
+        if self._course_prices is None:
+            rng = self.rng('prices', 0)
+            self._course_prices = [
+                Decimal(0) if rng.random() < 0.2 else Decimal(rng.randrange(500, 15_000, 100))
+                for _ in range(self.sizes['courses'])
+            ]
+        return self._course_prices[index]
+
+    def random_past(self, rng, days=365):
+        return self.now - timedelta(seconds=rng.randrange(days * 24 * 3600))
+
+    # Фазы
+
+    def generate(self, phase, start, stop):
+        """Генерирует часть [start, stop) фазы в одной транзакции; возвращает число строк по моделям"""
+        with transaction.atomic():
+            return getattr(self, f'_generate_{phase}')(start, stop)
+
+    def _generate_users(self, start, stop):
+        rng = self.rng('users', start)
+        teachers = self.sizes['teachers']
+        users, profiles = [], []
+        for index in range(start, stop):
+            is_teacher = index < teachers
+            user = User(
+                id=self.bases['user'] + index,
+                email=self.user_email(index),
+                password=self.password,
+                first_name=f'Имя{index}',
+                last_name=f'Фамилия{index}',
+                role='teacher' if is_teacher else 'student',
+                is_verified=is_teacher or rng.random() < 0.5,
+                date_joined=self.random_past(rng, days=730),
+            )
+            users.append(user)
+            profiles.append(Profile(
+                user_id=user.id,
+                bio='Преподаватель платформы' if is_teacher else '',
+                language='ru',
+                custom_url=f'{self.prefix}-teacher-{index}' if is_teacher else None,
+            ))
+
+        User.objects.bulk_create(users, batch_size=self.batch_size)
+        Profile.objects.bulk_create(profiles, batch_size=self.batch_size)
+        return {'users': len(users), 'profiles': len(profiles)}
+
+    def _generate_courses(self, start, stop):
+        rng = self.rng('courses', start)
+        modules_per_course = self.sizes['modules_per_course']
+        lessons_per_module = self.sizes['lessons_per_module']
+        courses, roles, course_tags, analytics, modules, lessons = [], [], [], [], [], []
+
+        for index in range(start, stop):
+            course_id = self.bases['course'] + index
+            price = self.course_price(index)
+            status = _weighted(rng, (('published', 85), ('draft', 10), ('archived', 5)))
+            created_at = self.random_past(rng, days=730)
+            courses.append(Course(
+                id=course_id,
+                title=f'Курс {index + 1}',
+                slug=f'{self.prefix}-course-{index}',
+                description='Описание курса. ' * 20,
+                excerpt='Краткое описание курса',
+                category_id=rng.choice(self.category_ids),
+                price=price,
+                type='free' if not price else 'paid',
+                difficulty=rng.choice(('beginner', 'intermediate', 'advanced')),
+                language=_weighted(rng, (('ru', 70), ('ky', 20), ('en', 10))),
+                status=status,
+                created_at=created_at,
+                published_at=created_at + timedelta(days=1) if status != 'draft' else None,
+            ))
+            roles.append(CourseUserRole(
+                course_id=course_id,
+                user_id=self.teacher_id(rng.randrange(self.sizes['teachers'])),
+                role='teacher',
+                is_primary=True,
+                permissions=CourseUserRole.DEFAULT_PERMISSIONS['teacher'],
+            ))
+            for tag_id in rng.sample(self.tag_ids, min(3, len(self.tag_ids))):
+                course_tags.append(Course.tags.through(course_id=course_id, tag_id=tag_id))
+            analytics.append(CourseAnalytics(course_id=course_id))
+
+            for position in range(modules_per_course):
+                module_id = self.bases['module'] + index * modules_per_course + position
+                modules.append(Module(id=module_id, course_id=course_id, title=f'Модуль {position + 1}', order=position))
+                for order in range(lessons_per_module):
+                    lessons.append(Lesson(
+                        module_id=module_id,
+                        title=f'Урок {order + 1}',
+                        content_type=rng.choice(('video', 'text', 'test')),
+                        content='<p>Содержание урока</p>',
+                        order=order,
+                        duration_minutes=rng.randrange(5, 60),
+                    ))
+
+        with explicit_timestamps(Course._meta.get_field('created_at')):
+            Course.objects.bulk_create(courses, batch_size=self.batch_size)
+        CourseUserRole.objects.bulk_create(roles, batch_size=self.batch_size)
+        Course.tags.through.objects.bulk_create(course_tags, batch_size=self.batch_size)
+        CourseAnalytics.objects.bulk_create(analytics, batch_size=self.batch_size)
+        Module.objects.bulk_create(modules, batch_size=self.batch_size)
+        Lesson.objects.bulk_create(lessons, batch_size=self.batch_size)
+        return {
+            'courses': len(courses), 'course_roles': len(roles), 'modules': len(modules), 'lessons': len(lessons)
+        }
+
+    def _generate_activity(self, start, stop):
+        """Зачисления, отзывы и события аналитики студентов [start, stop)"""
+        rng = self.rng('activity', start)
+        sizes = self.sizes
+        courses = sizes['courses']
+        enrollments_per_student = sizes['enrollments'] / sizes['students']
+        review_probability = min(1.0, sizes['reviews'] / max(sizes['enrollments'], 1))
+        # Кроме просмотров на зачисление приходятся покупка (~80% курсов платные),
+        # завершение (~20%) и оценка; остаток бюджета логов - просмотры
+        views_per_enrollment = max(
+            0.0, sizes['analytics_logs'] / max(sizes['enrollments'], 1) - 1.0 - review_probability
+        )
+
+        enrollments, reviews, logs = [], [], []
+        for index in range(start, stop):
+            student_id = self.student_id(index)
+            count = min(courses, int(rng.expovariate(1 / enrollments_per_student) + 0.5))
+            chosen = set()
+            while len(chosen) < count:
+                # Квадрат равномерного распределения: первые курсы популярнее
+                chosen.add(int(courses * rng.random() ** 2))
+
+            for course_index in sorted(chosen):
+                course_id = self.bases['course'] + course_index
+                enrolled_at = self.random_past(rng)
+                status = _weighted(rng, ENROLLMENT_STATUSES)
+                completed_at = enrolled_at + timedelta(days=rng.randrange(1, 90)) if status == 'completed' else None
+                enrollments.append(Enrollment(
+                    student_id=student_id,
+                    course_id=course_id,
+                    enrolled_at=enrolled_at,
+                    status=status,
+                    completed_at=completed_at,
+                    progress=100 if status == 'completed' else rng.randrange(0, 100),
+                    last_accessed=completed_at or enrolled_at + timedelta(days=rng.randrange(0, 30)),
+                ))
+
+                price = self.course_price(course_index)
+                if price:
+                    logs.append(AnalyticsLog(
+                        course_id=course_id, user_id=student_id, event_type='purchase',
+                        timestamp=enrolled_at, data={'amount': str(price)}
+                    ))
+                for _ in range(int(rng.expovariate(1 / views_per_enrollment) + 0.5) if views_per_enrollment else 0):
+                    logs.append(AnalyticsLog(
+                        course_id=course_id, user_id=student_id, event_type='view',
+                        timestamp=self.random_past(rng, days=60), data={}
+                    ))
+                if completed_at:
+                    logs.append(AnalyticsLog(
+                        course_id=course_id, user_id=student_id, event_type='complete',
+                        timestamp=completed_at, data={}
+                    ))
+                if rng.random() < review_probability:
+                    rating = _weighted(rng, RATINGS)
+                    reviewed_at = (completed_at or enrolled_at) + timedelta(days=rng.randrange(0, 14))
+                    reviews.append(Review(
+                        course_id=course_id, user_id=student_id, rating=rating,
+                        text='Отзыв о курсе', created_at=reviewed_at, updated_at=reviewed_at
+                    ))
+                    logs.append(AnalyticsLog(
+                        course_id=course_id, user_id=student_id, event_type='rate',
+                        timestamp=reviewed_at, data={'rating': rating}
+                    ))
+
+        Enrollment.objects.bulk_create(enrollments, batch_size=self.batch_size)
+        Review.objects.bulk_create(reviews, batch_size=self.batch_size)
+        with explicit_timestamps(AnalyticsLog._meta.get_field('timestamp')):
+            AnalyticsLog.objects.bulk_create(logs, batch_size=self.batch_size)
+        return {'enrollments': len(enrollments), 'reviews': len(reviews), 'analytics_logs': len(logs)}
+
+    # Завершение (в основном процессе)
+
+    def reset_sequences(self):
+        """После вставки явных id сдвигает последовательности (PostgreSQL)"""
+        statements = connection.ops.sequence_reset_sql(no_style(), [User, Course, Module, Category, Tag])
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+    def recalculate_counters(self):
+        """Денормализованные счетчики, которые обычно поддерживают сигналы"""
+        from courses.services.counters import CourseCountersService
+        from courses.services.ratings import CourseRatingService
+
+        result = {
+            'lessons': CourseCountersService.recalculate_all(batch_size=self.batch_size),
+            'ratings': CourseRatingService.recalculate_all(batch_size=self.batch_size),
+            'students': CourseCountersService.recalculate_student_stats_all(batch_size=self.batch_size),
+            'analytics': self.recalculate_analytics(),
+        }
+        for category in Category.objects.filter(pk__in=self.category_ids):
+            category.update_counts()
+        return result
+
+    def recalculate_analytics(self):
+        """CourseAnalytics сгенерированных курсов из логов и отзывов"""
+        course_ids = range(self.bases['course'], self.bases['course'] + self.sizes['courses'])
+        events = {
+            row['course_id']: row
+            for row in AnalyticsLog.objects.filter(course_id__in=course_ids).order_by().values('course_id').annotate(
+                views=Count('id', filter=Q(event_type='view')),
+                completions=Count('id', filter=Q(event_type='complete')),
+                purchases=Count('id', filter=Q(event_type='purchase')),
+            )
+        }
+        ratings = {
+            row['course_id']: row
+            for row in Review.objects.filter(course_id__in=course_ids).order_by().values('course_id').annotate(
+                total=Count('id'),
+                rating_sum=models.Sum('rating'),
+            )
+        }
+
+        analytics = list(CourseAnalytics.objects.filter(course_id__in=course_ids))
+        for item in analytics:
+            row = events.get(item.course_id, {})
+            item.views_count = row.get('views', 0)
+            item.completion_count = row.get('completions', 0)
+            item.completion_rate = (
+                min(Decimal(100), Decimal(item.completion_count * 100) / item.views_count).quantize(Decimal('0.01'))
+                if item.views_count else Decimal(0)
+            )
+            item.revenue = self.course_price(item.course_id - self.bases['course']) * row.get('purchases', 0)
+            rating = ratings.get(item.course_id, {})
+            item.total_ratings = rating.get('total', 0)
+            item.rating_sum = rating.get('rating_sum') or 0
+            item.average_rating = (
+                (Decimal(item.rating_sum) / item.total_ratings).quantize(Decimal('0.01'))
+                if item.total_ratings else Decimal(0)
+            )
+
+        CourseAnalytics.objects.bulk_update(
+            analytics,
+            ['views_count', 'completion_count', 'completion_rate', 'revenue', 'total_ratings', 'rating_sum',
+             'average_rating'],
+            batch_size=self.batch_size
+        )
+        return len(analytics)
+
+
+def run_chunk(generator, phase, start, stop):
+    """Точка входа дочернего процесса"""
+    return generator.generate(phase, start, stop)
@@ -1,6 +1,9 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.core.cache import cache
+from django.conf import settings
+from core import outbox
+from core.api.security import principal_cache
+from courses.events import COURSE_ANALYTICS_CHANGED
 from courses.models import Course, CourseAnalytics
 
 @receiver(post_save, sender=Course)
@@ -12,9 +15,21 @@ def create_course_analytics(sender, instance, created, **kwargs):
         CourseAnalytics.objects.create(course=instance)
 
 @receiver([post_save, post_delete], sender=CourseAnalytics)
-def invalidate_course_analytics_cache(sender, instance, **kwargs):
+def invalidate_course_analytics_cache(sender, instance, created=False, **kwargs):
     """
-    Инвалидирует кэш аналитики при изменении
+    Инвалидирует кэш аналитики после коммита изменения (через outbox).
+    Новая строка с нулевыми счетчиками ответ не меняет: для курса без
+    аналитики отдаются те же нули. Счетчики событий меняются через
+    CourseAnalyticsService.record_event без сигналов
     """
-    cache_key = f'course_analytics:{instance.course.id}'
-    cache.delete(cache_key)
+    if created:
+        return
+    outbox.publish(COURSE_ANALYTICS_CHANGED, course_id=instance.course_id)
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def invalidate_user_principal(sender, instance, **kwargs):
+    """
+    Сбрасывает закэшированного принципала JWT при изменении пользователя
+    (смена роли, блокировка, отзыв токенов)
+    """
+    principal_cache.invalidate(instance.pk)
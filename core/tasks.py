@@ -0,0 +1,39 @@
+from celery import current_app, shared_task
+from typing import Any, Dict
+
+from core import debounce
+
+
+@shared_task(ignore_result=True)
+def run_debounced(task_name: str, kwargs: Dict[str, Any]) -> None:
+    """
+    Проверка серии событий (core/debounce.py): пока события идут,
+    проверка откладывается, после затихания ставится сама задача
+    """
+    wait = debounce.get_wait(task_name, kwargs)
+    if wait > 0:
+        run_debounced.apply_async(args=[task_name, kwargs], countdown=wait)
+        return
+
+    current_app.tasks[task_name].apply_async(kwargs=kwargs)
+
+
+@shared_task(ignore_result=True)
+def relay_outbox() -> None:
+    """Доставляет события outbox (core/outbox.py); при остатке ставит себя снова"""
+    from core import outbox
+
+    _, has_more = outbox.relay()
+    if has_more:
+        relay_outbox.apply_async()
+
+
+@shared_task
+def purge_outbox() -> Dict[str, Any]:
+    """Удаляет обработанные события outbox"""
+    from core import outbox
+
+    return {
+        'status': 'success',
+        'deleted_count': outbox.purge()
+    }
@@ -0,0 +1,93 @@
+import json
+import pytest
+from django.core.cache import caches
+from core.cache import LocalLRU, TwoLevelCache
+
+
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'l2': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'l2'},
+}
+
+
+class TestLocalLRU:
+    def test_eviction_and_ttl(self):
+        """Тест вытеснения и истечения записей L1"""
+        lru = LocalLRU(max_entries=2, timeout=60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        assert 'a' in lru and 'b' not in lru
+
+        lru.set('d', 4, timeout=0)
+        assert 'd' not in lru
+
+    def test_values_are_copied(self):
+        """Тест защиты закэшированного значения от изменения"""
+        lru = LocalLRU(max_entries=10, timeout=60)
+        lru.set('list', [1])
+        lru.get('list').append(2)
+        assert lru.get('list') == [1]
+
+
+class TestTwoLevelCache:
+    @pytest.fixture
+    def cache(self, settings):
+        settings.CACHES = CACHES
+        caches['l2'].clear()
+        return TwoLevelCache(None, {'OPTIONS': {'L2_ALIAS': 'l2', 'L1_TIMEOUT': 60}})
+
+    def test_read_through(self, cache):
+        """Тест чтения из L2 с заполнением L1"""
+        caches['l2'].set('key', 'value')
+
+        assert cache.get('key') == 'value'
+        assert cache.get('key') == 'value'
+        assert cache.stats == {'l1_hits': 1, 'l1_misses': 1, 'l2_hits': 1, 'l2_misses': 0}
+        assert cache.hit_ratio() == {'l1': 0.5, 'l2': 1.0}
+
+    def test_write_and_delete(self, cache):
+        """Тест записи в оба уровня и удаления"""
+        cache.set_many({'a': 1, 'b': 2})
+        assert caches['l2'].get('a') == 1
+        assert cache.get_many(['a', 'b', 'c']) == {'a': 1, 'b': 2}
+
+        cache.delete('a')
+        assert cache.get('a') is None
+        assert caches['l2'].get('a') is None
+
+    def test_invalidation_from_other_process(self, cache):
+        """Тест удаления ключа из L1 по сообщению другого процесса"""
+        cache.set('key', 'old')
+        caches['l2'].set('key', 'new')
+        assert cache.get('key') == 'old'
+
+        local_key = cache.make_key('key')
+        cache.handle_invalidation(json.dumps({'node': 'other', 'keys': [local_key]}))
+        assert cache.get('key') == 'new'
+
+        # Собственные сообщения процесса игнорируются
+        cache.handle_invalidation(json.dumps({'node': cache.node_id, 'keys': None}))
+        assert cache.l1.get(local_key) == 'new'
+
+
+class TestCacheResponse:
+    def test_key_per_user(self):
+        """Тест: закэшированный ответ одного пользователя не отдается другому"""
+        from types import SimpleNamespace
+        from django.core.cache import cache
+        from core.api.base import cache_response
+
+        class View:
+            @cache_response(timeout=60, key_prefix='test_response')
+            def retrieve(self, request):
+                return {'user': request.user.pk}
+
+        def make_request(user_id):
+            user = SimpleNamespace(pk=user_id, is_authenticated=True)
+            return SimpleNamespace(user=user, path='/courses/1/analytics/', query_params={})
+
+        cache.clear()
+        assert View().retrieve(make_request(1)) == {'user': 1}
+        assert View().retrieve(make_request(2)) == {'user': 2}
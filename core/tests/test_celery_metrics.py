@@ -0,0 +1,63 @@
+import logging
+
+import pytest
+from prometheus_client import REGISTRY
+from core import celery_metrics
+from courses.tasks import cleanup_old_analytics_logs, update_course_analytics
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.django_db
+class TestTaskMetrics:
+    def test_success_is_recorded(self):
+        """Тест времени выполнения, числа SQL-запросов и успешного завершения"""
+        task = cleanup_old_analytics_logs.name
+        runs = sample('celery_task_runtime_seconds_count', task=task)
+        successes = sample('celery_tasks_total', task=task, state='success')
+        queries = sample('celery_task_db_queries_sum', task=task)
+
+        cleanup_old_analytics_logs.apply(kwargs={'days': 30})
+
+        assert sample('celery_task_runtime_seconds_count', task=task) == runs + 1
+        assert sample('celery_tasks_total', task=task, state='success') == successes + 1
+        assert sample('celery_task_db_queries_sum', task=task) > queries
+
+    def test_error_status_is_recorded(self):
+        """Тест: задача, вернувшая status=error, считается ошибкой, а не успехом"""
+        task = update_course_analytics.name
+        errors = sample('celery_tasks_total', task=task, state='error')
+        successes = sample('celery_tasks_total', task=task, state='success')
+
+        update_course_analytics.apply(args=[999999])
+
+        assert sample('celery_tasks_total', task=task, state='error') == errors + 1
+        assert sample('celery_tasks_total', task=task, state='success') == successes
+
+    def test_slow_task_is_logged(self, settings, caplog):
+        """Тест: задача дольше порога пишется в лог с аргументами"""
+        settings.CELERY_SLOW_TASK_SECONDS = 0
+        with caplog.at_level(logging.WARNING, logger='core.celery_metrics'):
+            cleanup_old_analytics_logs.apply(kwargs={'days': 30})
+
+        assert 'Slow task courses.tasks.cleanup_old_analytics_logs' in caplog.text
+        assert "kwargs={'days': 30}" in caplog.text
+
+
+def test_publish_sets_timestamp_header():
+    """Тест: при публикации в заголовки кладется время отправки"""
+    headers = {}
+    celery_metrics.on_before_task_publish(headers=headers)
+    assert isinstance(headers['published_at'], float)
+
+
+def test_metrics_ports(settings):
+    """Тест разбора диапазона портов экспортера"""
+    settings.CELERY_METRICS_PORTS = '9200-9203'
+    assert list(celery_metrics.get_metrics_ports()) == [9200, 9201, 9202, 9203]
+    settings.CELERY_METRICS_PORTS = '9300'
+    assert list(celery_metrics.get_metrics_ports()) == [9300]
+    settings.CELERY_METRICS_PORTS = ''
+    assert not celery_metrics.get_metrics_ports()
@@ -0,0 +1,47 @@
+import pytest
+from django.core.management import call_command
+from ustat.celery import app
+from core.celery_queues import get_worker_argv
+
+
+def route(name, **kwargs):
+    options = app.amqp.router.route({}, name, (), kwargs)
+    return options['queue'].name, options.get('priority')
+
+
+class TestTaskRouting:
+    def test_static_routes(self):
+        """Тест: периодические и массовые задачи не попадают в realtime"""
+        assert route('courses.tasks.update_course_analytics', course_id=1) == ('realtime', 3)
+        assert route('courses.tasks.update_course_rank_scores') == ('analytics', 2)
+        assert route('courses.tasks.recalculate_course_ratings') == ('bulk', 6)
+        assert route('courses.tasks.cleanup_old_analytics_logs') == ('maintenance', 9)
+
+    def test_incremental_call_goes_to_realtime(self):
+        """Тест: пересчет похожих для нескольких курсов идет в realtime, полный - в bulk"""
+        assert route('courses.tasks.rebuild_related_courses', course_ids=[1, 2]) == ('realtime', 3)
+        assert route('courses.tasks.rebuild_related_courses') == ('bulk', 6)
+
+    def test_default_queue(self):
+        """Тест: задача без маршрута идет в очередь по умолчанию"""
+        assert route('ustat.celery.debug_task')[0] == 'realtime'
+
+
+class TestWorkerPresets:
+    def test_worker_argv(self):
+        """Тест аргументов воркера для пресета"""
+        argv = get_worker_argv('bulk', concurrency=4)
+        assert argv[:3] == ['worker', '--queues', 'bulk']
+        assert argv[argv.index('--concurrency') + 1] == '4'
+        assert argv[argv.index('--prefetch-multiplier') + 1] == '1'
+        assert '--time-limit' in argv
+
+    def test_unknown_preset(self):
+        """Тест ошибки для неизвестного пресета"""
+        with pytest.raises(ValueError):
+            get_worker_argv('video')
+
+    def test_command_prints_worker_command(self, capsys):
+        """Тест вывода команды воркера"""
+        call_command('celery_worker', 'realtime', '--print')
+        assert capsys.readouterr().out.startswith('celery -A ustat worker --queues realtime')
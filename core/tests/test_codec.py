@@ -0,0 +1,50 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.utils import timezone
+from accounts.models import Profile, User
+from core import codec
+from courses.models import Course, CourseUserRole
+
+
+class TestCodec:
+    def test_roundtrip_and_compression(self):
+        """Тест упаковки типов Django и сжатия больших данных"""
+        now = timezone.now()
+        value = {'when': now, 'day': now.date(), 'price': Decimal('19.90'), 'text': 'курс' * 1000}
+
+        data = codec.dumps(value)
+        assert data[:1] == codec.ZSTD
+        assert codec.loads(data) == value
+        assert codec.dumps([1, 2])[:1] == codec.RAW
+
+    def test_model_schema(self):
+        """Тест восстановления экземпляров моделей со связями"""
+        course = Course(id=7, title='Python', slug='python', price=Decimal('10.00'),
+                        published_at=timezone.now() - timedelta(days=1))
+        schema = codec.ModelSchema(Course)
+
+        restored = codec.unpack(schema, codec.pack(schema, [course], many=True), many=True)[0]
+        assert restored.pk == 7 and restored.title == 'Python'
+        assert restored.price == Decimal('10.00')
+        assert restored.published_at == course.published_at
+        assert not restored._state.adding
+
+        user = User(id=1, email='teacher@example.com', role='teacher')
+        user.profile = Profile(id=3, user_id=1, bio='Био')
+        role = CourseUserRole(id=5, course_id=7, user=user, role='teacher', permissions={'can_edit_content': True})
+        role_schema = codec.ModelSchema(
+            CourseUserRole,
+            related={'user': codec.ModelSchema(User, fields=['id', 'email', 'role'],
+                                               related={'profile': codec.ModelSchema(Profile)})}
+        )
+
+        restored = codec.unpack(role_schema, codec.pack(role_schema, role))
+        assert restored.permissions == {'can_edit_content': True}
+        assert restored.user.email == 'teacher@example.com'
+        assert restored.user.profile.bio == 'Био'
+
+    def test_schema_mismatch_is_miss(self):
+        """Тест промаха при изменении схемы"""
+        data = codec.pack(codec.ModelSchema(User, fields=['id', 'email']), User(id=1, email='a@b.c'))
+        assert codec.unpack(codec.ModelSchema(User, fields=['id', 'email', 'role']), data) is None
+        assert codec.unpack(codec.ModelSchema(User, fields=['id', 'email']), b'broken') is None
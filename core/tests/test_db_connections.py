@@ -0,0 +1,49 @@
+import pytest
+from django.db import connection, connections
+from core import db_connections
+
+
+@pytest.fixture
+def restore_connection_settings():
+    saved = {alias: dict(connections.settings[alias]) for alias in connections}
+    yield
+    for alias, settings_dict in saved.items():
+        connections.settings[alias].update(settings_dict)
+        connections[alias].settings_dict.update(settings_dict)
+
+
+def sample(metric, **labels):
+    return metric.labels(**labels)._value.get()
+
+
+class TestConnectionModes:
+    def test_conn_max_age(self, settings):
+        """Тест времени жизни соединения для каждого режима"""
+        settings.DB_CONN_MAX_AGE = 30
+        assert db_connections.get_conn_max_age('none') == 0
+        assert db_connections.get_conn_max_age('persistent') == 30
+        assert db_connections.get_conn_max_age('pooled') is None
+        with pytest.raises(ValueError):
+            db_connections.get_conn_max_age('unknown')
+
+    def test_apply_pooled_mode(self, restore_connection_settings):
+        """Тест переключения воркера в режим постоянных соединений"""
+        db_connections.apply_connection_mode('pooled')
+
+        assert connections.settings['default']['CONN_MAX_AGE'] is None
+        assert connections.settings['default']['CONN_HEALTH_CHECKS'] is True
+        assert connection.settings_dict['CONN_MAX_AGE'] is None
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConnectionMetrics:
+    def test_reuse_is_counted(self, restore_connection_settings):
+        """Тест учета переиспользованных соединений в начале задачи"""
+        db_connections.apply_connection_mode('persistent')
+        connection.ensure_connection()
+        before = sample(db_connections.db_connections_reused_total, alias='default', context='celery')
+
+        db_connections.on_unit_started('celery')
+
+        assert sample(db_connections.db_connections_reused_total, alias='default', context='celery') == before + 1
+        assert sample(db_connections.db_connections_open, alias='default') == 1
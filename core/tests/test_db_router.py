@@ -0,0 +1,117 @@
+import time
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.http import HttpResponse
+from django.test import RequestFactory
+from core.db_router import (
+    PIN_COOKIE, ReplicaPinningMiddleware, ReplicaRouter, replica_reads, use_replica
+)
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.DATABASE_REPLICAS = ['replica']
+    settings.DATABASE_PRIMARY_PIN_SECONDS = 5
+
+
+class TestReplicaRouter:
+    router = ReplicaRouter()
+
+    def test_primary_by_default(self, replicas):
+        """Тест чтения с primary вне запросов и явных блоков"""
+        assert self.router.db_for_read(None) == 'default'
+
+    def test_explicit_replica_reads(self, replicas):
+        """Тест явного разрешения чтения с реплик в задачах"""
+        @replica_reads
+        def task():
+            first = self.router.db_for_read(None)
+            # Запись в явном блоке не отключает чтение с реплик
+            self.router.db_for_write(None)
+            return first, self.router.db_for_read(None)
+
+        assert task() == ('replica', 'replica')
+        with use_replica(False):
+            assert self.router.db_for_read(None) == 'default'
+
+    def test_no_replicas_configured(self, settings):
+        """Тест работы без реплик"""
+        settings.DATABASE_REPLICAS = []
+        with use_replica():
+            assert self.router.db_for_read(None) == 'default'
+
+    def test_allow_migrate(self, replicas):
+        assert self.router.allow_migrate('replica', 'courses') is False
+        assert self.router.allow_migrate('default', 'courses') is None
+
+
+class TestReplicaPinningMiddleware:
+    router = ReplicaRouter()
+
+    def make_middleware(self, write=False):
+        reads = []
+
+        def view(request):
+            if write:
+                self.router.db_for_write(None)
+            reads.append(self.router.db_for_read(None))
+            return HttpResponse()
+
+        return ReplicaPinningMiddleware(view), reads
+
+    def test_reads_go_to_replica(self, replicas):
+        """Тест чтения с реплики для безопасного запроса"""
+        middleware, reads = self.make_middleware()
+        response = middleware(RequestFactory().get('/courses/'))
+
+        assert reads == ['replica']
+        assert PIN_COOKIE not in response.cookies
+
+    def test_pin_after_write(self, replicas):
+        """Тест закрепления клиента за primary после записи"""
+        middleware, reads = self.make_middleware(write=True)
+        response = middleware(RequestFactory().post('/courses/', HTTP_AUTHORIZATION='Bearer token'))
+        assert reads == ['default']
+        assert float(response.cookies[PIN_COOKIE].value) > time.time()
+
+        # Следующий запрос того же API-клиента (без cookie) читает с primary по флагу в кэше
+        middleware, reads = self.make_middleware()
+        middleware(RequestFactory().get('/courses/', HTTP_AUTHORIZATION='Bearer token'))
+        assert reads == ['default']
+
+        # Другой клиент по-прежнему читает с реплики
+        middleware, reads = self.make_middleware()
+        middleware(RequestFactory().get('/courses/', HTTP_AUTHORIZATION='Bearer other'))
+        assert reads == ['replica']
+
+    def test_pin_cookie(self, replicas):
+        """Тест закрепления браузера по cookie"""
+        middleware, reads = self.make_middleware()
+        request = RequestFactory().get('/courses/')
+        request.COOKIES[PIN_COOKIE] = str(time.time() + 5)
+        middleware(request)
+
+        assert reads == ['default']
+
+    def test_async_chain(self, replicas):
+        """Тест: в асинхронной цепочке middleware остается асинхронным, запись из потока закрепляет клиента"""
+        reads = []
+
+        async def view(request):
+            reads.append(self.router.db_for_read(None))
+            # ORM в async-представлениях выполняется через sync_to_async
+            await sync_to_async(self.router.db_for_write)(None)
+            reads.append(self.router.db_for_read(None))
+            return HttpResponse()
+
+        middleware = ReplicaPinningMiddleware(view)
+        assert iscoroutinefunction(middleware)
+
+        request = RequestFactory().get('/api/async/courses/', HTTP_AUTHORIZATION='Bearer async')
+        response = async_to_sync(middleware)(request)
+        assert reads == ['replica', 'default']
+        assert PIN_COOKIE in response.cookies
+
+        reads.clear()
+        async_to_sync(middleware)(RequestFactory().get('/api/async/courses/', HTTP_AUTHORIZATION='Bearer async'))
+        assert reads[0] == 'default'
@@ -0,0 +1,84 @@
+import pytest
+from django.core.cache import cache
+from core import debounce
+from core.tasks import run_debounced
+from courses.tasks import update_course_student_stats
+
+TASK = update_course_student_stats.name
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(debounce.time, 'time', lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def scheduled(settings, monkeypatch):
+    settings.TASK_DEBOUNCE = {'QUIET_SECONDS': 10, 'MAX_DELAY_SECONDS': 60}
+    cache.clear()
+    calls = []
+    monkeypatch.setattr(run_debounced, 'apply_async', lambda args, countdown, **kw: calls.append((args, countdown)))
+    return calls
+
+
+class TestDebounce:
+    def test_burst_is_collapsed(self, clock, scheduled):
+        """Тест: серия событий по курсу планирует одну проверку"""
+        results = [debounce.enqueue_now(update_course_student_stats, {'course_id': 1}) for _ in range(3)]
+        debounce.enqueue_now(update_course_student_stats, {'course_id': 2})
+
+        assert results == [True, False, False]
+        assert scheduled == [([TASK, {'course_id': 1}], 10), ([TASK, {'course_id': 2}], 10)]
+
+    def test_waits_for_quiet_period(self, clock, scheduled):
+        """Тест: запуск после затихания событий, затем новая серия"""
+        debounce.enqueue_now(update_course_student_stats, {'course_id': 1})
+        clock[0] += 5
+        debounce.enqueue_now(update_course_student_stats, {'course_id': 1})
+
+        clock[0] += 7
+        assert debounce.get_wait(TASK, {'course_id': 1}) == pytest.approx(3)
+        clock[0] += 3
+        assert debounce.get_wait(TASK, {'course_id': 1}) == 0
+
+        assert debounce.enqueue_now(update_course_student_stats, {'course_id': 1})
+
+    def test_max_delay(self, clock, scheduled):
+        """Тест: непрерывный поток событий не откладывает запуск дольше MAX_DELAY_SECONDS"""
+        for _ in range(12):
+            debounce.enqueue_now(update_course_student_stats, {'course_id': 1})
+            clock[0] += 5
+
+        assert debounce.get_wait(TASK, {'course_id': 1}) == 0
+
+    def test_broker_error_backoff(self, settings, monkeypatch):
+        """Тест: при недоступном брокере события серии не повторяют попытку"""
+        settings.TASK_DEBOUNCE = {'QUIET_SECONDS': 10}
+        cache.clear()
+        attempts = []
+
+        def fail(*args, **kwargs):
+            attempts.append(args)
+            raise ConnectionError('broker is down')
+
+        monkeypatch.setattr(run_debounced, 'apply_async', fail)
+        assert not debounce.enqueue_now(update_course_student_stats, {'course_id': 1})
+        assert not debounce.enqueue_now(update_course_student_stats, {'course_id': 1})
+        assert len(attempts) == 1
+
+    def test_check_task_runs_target(self, clock, scheduled, monkeypatch):
+        """Тест: проверка после затихания ставит саму задачу"""
+        started = []
+        monkeypatch.setattr(update_course_student_stats, 'apply_async', lambda kwargs: started.append(kwargs))
+
+        debounce.enqueue_now(update_course_student_stats, {'course_id': 1})
+        clock[0] += 4
+        run_debounced(TASK, {'course_id': 1})
+        assert started == []
+        assert scheduled[-1] == ([TASK, {'course_id': 1}], pytest.approx(6))
+
+        clock[0] += 6
+        run_debounced(TASK, {'course_id': 1})
+        assert started == [{'course_id': 1}]
@@ -0,0 +1,141 @@
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.db import transaction
+from django.db.models.deletion import Collector
+from django.http import HttpResponse
+from django.test import RequestFactory
+from accounts.models import Profile, User
+from core import identity_map
+from core.api.security import JWTAuthentication
+from core.models import OutboxEvent
+from courses.models import AnalyticsLog, Category, Course, Module
+from courses.services.teachers import TeacherLoader
+
+
+@pytest.fixture
+def category():
+    return Category.objects.create(name='Programming', slug='programming')
+
+
+@pytest.fixture
+def course_ids(category):
+    return [
+        Course.objects.create(title=f'Course {i}', slug=f'course-{i}', description='Описание', category=category).pk
+        for i in range(2)
+    ]
+
+
+@pytest.mark.django_db
+class TestIdentityMap:
+    def test_related_loads_share_instance(self, course_ids, django_assert_num_queries):
+        """Тест: объект по внешнему ключу загружается один раз за область"""
+        courses = list(Course.objects.filter(pk__in=course_ids))
+        with identity_map.scope() as current:
+            with django_assert_num_queries(1):
+                assert courses[0].category is courses[1].category
+            assert current.hits == 1
+
+    def test_without_scope(self, course_ids, django_assert_num_queries):
+        """Тест: вне области каждый объект загружает связь сам"""
+        courses = list(Course.objects.filter(pk__in=course_ids))
+        with django_assert_num_queries(2):
+            assert courses[0].category == courses[1].category
+
+    def test_write_evicts_instance(self, course_ids, category, django_assert_num_queries):
+        """Тест: после записи объект и результаты методов загружаются заново"""
+        with identity_map.scope() as current:
+            first = Course.objects.get(pk=course_ids[0]).category
+            first.description = 'Новое описание'
+            first.save()
+            assert current.memo == {}
+
+            second = Course.objects.get(pk=course_ids[1])
+            with django_assert_num_queries(1):
+                assert second.category is not first
+
+    def test_memoize(self, course_ids, monkeypatch):
+        """Тест: метод с @memoize вычисляется один раз на объект в области"""
+        calls = []
+        monkeypatch.setattr(TeacherLoader, 'get_primary_teacher', lambda self, course_id: calls.append(course_id))
+        course = Course.objects.get(pk=course_ids[0])
+
+        with identity_map.scope():
+            course.get_primary_teacher()
+            course.get_primary_teacher()
+        course.get_primary_teacher()
+
+        assert calls == [course.pk, course.pk]
+
+    def test_untracked_model_not_stored(self, course_ids):
+        """Тест: модели вне MODELS в карту не попадают"""
+        module = Module.objects.create(course_id=course_ids[0], title='Введение')
+        with identity_map.scope() as current:
+            identity_map.add(module)
+            identity_map.add(module.course)
+            assert list(current.instances) == [('courses.Course', course_ids[0])]
+
+    def test_fast_delete(self):
+        """Тест: сигналы карты не отключают быстрое удаление других моделей"""
+        collector = Collector(using='default')
+        assert collector.can_fast_delete(AnalyticsLog.objects.all())
+        assert collector.can_fast_delete(OutboxEvent.objects.all())
+
+    def test_principal_user_is_shared(self, django_assert_num_queries):
+        """Тест: profile.user в запросе берется из карты после аутентификации"""
+        user = User.objects.create_user(email='teacher@example.com', password='x')
+        token = JWTAuthentication.generate_token(user)
+        with identity_map.scope():
+            request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+            principal, _ = JWTAuthentication().authenticate(request)
+            with django_assert_num_queries(1):
+                profile = Profile.objects.get(user_id=user.pk)
+                assert profile.user is principal
+
+    def test_middleware_scope(self):
+        """Тест: middleware открывает область только на время запроса"""
+        seen = []
+
+        def view(request):
+            seen.append(identity_map.get_current())
+            return HttpResponse()
+
+        identity_map.IdentityMapMiddleware(view)(RequestFactory().get('/'))
+        assert isinstance(seen[0], identity_map.IdentityMap)
+        assert identity_map.get_current() is None
+
+    def test_async_middleware_scope(self):
+        """Тест: в асинхронной цепочке ORM в потоке видит карту запроса"""
+        seen = []
+
+        async def view(request):
+            seen.append(identity_map.get_current())
+            seen.append(await sync_to_async(identity_map.get_current)())
+            return HttpResponse()
+
+        middleware = identity_map.IdentityMapMiddleware(view)
+        assert iscoroutinefunction(middleware)
+
+        async_to_sync(middleware)(RequestFactory().get('/'))
+        assert isinstance(seen[0], identity_map.IdentityMap)
+        assert seen[1] is seen[0]
+
+    def test_task_scope(self):
+        """Тест области задачи Celery"""
+        identity_map.on_task_prerun(task_id='task-1')
+        assert identity_map.get_current() is not None
+        identity_map.on_task_postrun(task_id='task-1')
+        assert identity_map.get_current() is None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_rolled_back_write_is_not_remembered(course_ids, category):
+    """Тест: данные из откаченной транзакции не остаются в карте"""
+    with identity_map.scope():
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                category.name = 'Черновик'
+                category.save()
+                assert Course.objects.get(pk=course_ids[0]).category.name == 'Черновик'
+                raise RuntimeError
+
+        assert Course.objects.get(pk=course_ids[1]).category.name == 'Programming'
@@ -0,0 +1,123 @@
+import pytest
+from datetime import timedelta
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
+from core import outbox
+from core.models import OutboxEvent
+from courses.models import AnalyticsLog, Category, Course, CourseAnalytics
+from courses.tasks import update_course_analytics
+
+
+@pytest.fixture
+def handled(settings):
+    settings.OUTBOX = {'BATCH_SIZE': 2, 'MAX_ATTEMPTS': 2, 'RETRY_BASE_SECONDS': 5}
+    calls = []
+    outbox._handlers['test.event'].append(calls.append)
+    yield calls
+    del outbox._handlers['test.event']
+
+
+@pytest.mark.django_db
+class TestOutboxRelay:
+    def test_rolled_back_event_is_not_stored(self, handled):
+        """Тест: событие откатывается вместе с транзакцией"""
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                outbox.publish('test.event', course_id=1)
+                raise RuntimeError
+
+        assert not OutboxEvent.objects.exists()
+
+    def test_relay_in_batches(self, handled):
+        """Тест: обработчик получает payload пачкой, события отмечаются обработанными"""
+        for course_id in range(5):
+            outbox.publish('test.event', course_id=course_id)
+        outbox.publish('unknown.event')
+
+        assert outbox.relay() == (6, False)
+        assert handled == [
+            [{'course_id': 0}, {'course_id': 1}],
+            [{'course_id': 2}, {'course_id': 3}],
+            [{'course_id': 4}],
+        ]
+        assert not OutboxEvent.objects.exclude(status=OutboxEvent.STATUS_DONE).exists()
+        assert outbox.relay(max_batches=1) == (0, False)
+
+    def test_failed_handler_is_retried(self, handled):
+        """Тест повторной доставки с задержкой и статуса failed после MAX_ATTEMPTS"""
+        def broken(payloads):
+            raise ValueError('index is down')
+
+        handled.clear()
+        outbox._handlers['test.event'].append(broken)
+        event = outbox.publish('test.event', course_id=1)
+
+        outbox.relay()
+        event.refresh_from_db()
+        assert event.status == OutboxEvent.STATUS_PENDING
+        assert event.attempts == 1
+        assert 'index is down' in event.last_error
+        assert event.available_at > timezone.now()
+
+        # Событие не берется до истечения задержки
+        assert outbox.relay() == (0, False)
+
+        OutboxEvent.objects.update(available_at=timezone.now())
+        outbox.relay()
+        event.refresh_from_db()
+        assert event.status == OutboxEvent.STATUS_FAILED
+        assert len(handled) == 2
+
+    def test_purge(self, handled):
+        """Тест удаления старых обработанных событий"""
+        outbox.publish('test.event', course_id=1)
+        outbox.publish('test.event', course_id=2)
+        outbox.relay()
+        OutboxEvent.objects.filter(payload__course_id=1).update(processed_at=timezone.now() - timedelta(hours=48))
+
+        assert outbox.purge(hours=24) == 1
+        assert OutboxEvent.objects.count() == 1
+
+    def test_relay_command(self, handled):
+        """Тест команды relay_outbox --once"""
+        outbox.publish('test.event', course_id=1)
+        call_command('relay_outbox', '--once')
+        assert handled == [[{'course_id': 1}]]
+
+
+@pytest.mark.django_db
+def test_course_cache_is_invalidated_by_relay():
+    """Тест: кэш курса сбрасывается только доставкой события"""
+    course = Course.objects.create(
+        title='Python Course', slug='python-course', description='Learn Python',
+        category=Category.objects.create(name='Programming', slug='programming')
+    )
+    outbox.relay()
+    cache.set(f'course_teachers_{course.id}', ['teacher'])
+
+    course.title = 'Python 3 Course'
+    course.save()
+    assert cache.get(f'course_teachers_{course.id}') == ['teacher']
+
+    outbox.relay()
+    assert cache.get(f'course_teachers_{course.id}') is None
+
+
+@pytest.mark.django_db
+def test_course_analytics_event_only_on_change():
+    """Тест: событие аналитики пишется только при изменении строки"""
+    course = Course.objects.create(
+        title='Python Course', slug='python-course', description='Learn Python',
+        category=Category.objects.create(name='Programming', slug='programming')
+    )
+    events = OutboxEvent.objects.filter(event_type='course_analytics.changed')
+    # Строка аналитики нового курса создается с нулями
+    assert not events.exists()
+
+    AnalyticsLog.objects.create(course=course, event_type='view', data={'event_type': 'view'})
+    update_course_analytics(course.id)
+    update_course_analytics(course.id)
+    assert events.count() == 1
+    assert CourseAnalytics.objects.get(course=course).views_count == 1
@@ -0,0 +1,152 @@
+import asyncio
+import time
+
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework.test import APIClient
+from accounts.models import User
+from core.profiling import (
+    LocalProfileStorage, ProfilingMiddleware, SamplingProfiler, check_token, make_token
+)
+
+
+@pytest.fixture
+def profiling(settings, tmp_path):
+    settings.PROFILING = {'ENABLED': True, 'SAMPLE_RATE': 0.0, 'DIRECTORY': str(tmp_path), 'INTERVAL_MS': 1}
+    return settings.PROFILING
+
+
+def slow_view(request):
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+    return HttpResponse('ok')
+
+
+class TestProfilingMiddleware:
+    def test_not_used_when_disabled(self, settings):
+        """Тест: выключенная middleware не подключается"""
+        settings.PROFILING = {'ENABLED': False}
+        with pytest.raises(MiddlewareNotUsed):
+            ProfilingMiddleware(slow_view)
+
+    def test_skips_unsampled_requests(self, profiling, tmp_path):
+        """Тест: без заголовка и при SAMPLE_RATE=0 профиль не снимается"""
+        response = ProfilingMiddleware(slow_view)(RequestFactory().get('/api/courses/'))
+        assert 'X-Profile-Id' not in response
+        assert list(tmp_path.iterdir()) == []
+
+    def test_rejects_invalid_token(self, profiling):
+        """Тест: неподписанный заголовок не включает профилирование"""
+        request = RequestFactory().get('/api/courses/', HTTP_X_PROFILE_TOKEN='forged')
+        assert 'X-Profile-Id' not in ProfilingMiddleware(slow_view)(request)
+        assert not check_token('forged')
+
+    def test_profiles_request_with_token(self, profiling):
+        """Тест: подписанный заголовок снимает профиль со стеками view"""
+        request = RequestFactory().get('/api/courses/', HTTP_X_PROFILE_TOKEN=make_token())
+        response = ProfilingMiddleware(slow_view)(request)
+
+        profile = LocalProfileStorage(profiling['DIRECTORY'], 20).get(response['X-Profile-Id'])
+        assert profile['endpoint'] == '/api/courses/'
+        assert profile['samples'] > 0
+        assert 'slow_view' in profile['folded']
+        stack, count = profile['folded'].splitlines()[0].rsplit(' ', 1)
+        assert int(count) > 0 and ';' in stack
+
+    def test_sample_rate(self, profiling):
+        """Тест: при SAMPLE_RATE=1 профилируется каждый запрос"""
+        profiling['SAMPLE_RATE'] = 1.0
+        response = ProfilingMiddleware(slow_view)(RequestFactory().get('/'))
+        assert 'X-Profile-Id' in response
+
+
+class TestLocalProfileStorage:
+    def test_retention_per_endpoint(self, tmp_path):
+        """Тест ограничения числа профилей на эндпоинт"""
+        storage = LocalProfileStorage(str(tmp_path), max_per_endpoint=2)
+        for i in range(4):
+            storage.save({'id': f'{1000 + i}-0000000{i}', 'endpoint': 'course-list', 'folded': ''})
+        storage.save({'id': '2000-0000000a', 'endpoint': 'course-detail', 'folded': ''})
+
+        assert [profile['id'] for profile in storage.list()] == [
+            '2000-0000000a', '1003-00000003', '1002-00000002'
+        ]
+        assert storage.get('1000-00000000') is None
+
+
+def test_async_profile(profiling):
+    """Тест: в асинхронной цепочке учитываются только стеки корутины запроса"""
+    async def busy():
+        for _ in range(5):
+            slow_view(None)
+            await asyncio.sleep(0)
+
+    async def view(request):
+        other = asyncio.ensure_future(other_request())
+        await busy()
+        await other
+        return HttpResponse('ok')
+
+    async def other_request():
+        # Отдельная задача в том же цикле событий, вне стека запроса
+        for _ in range(5):
+            slow_view(None)
+            await asyncio.sleep(0)
+
+    middleware = ProfilingMiddleware(view)
+    assert iscoroutinefunction(middleware)
+
+    request = RequestFactory().get('/api/async/courses/', HTTP_X_PROFILE_TOKEN=make_token())
+    response = async_to_sync(middleware)(request)
+
+    folded = LocalProfileStorage(profiling['DIRECTORY'], 20).get(response['X-Profile-Id'])['folded']
+    assert 'busy' in folded
+    assert 'other_request' not in folded
+
+
+def test_sampler_collects_stacks():
+    """Тест семплера: стеки потока в формате collapsed stacks"""
+    import threading
+    profiler = SamplingProfiler(threading.get_ident(), 0.001)
+    profiler.start()
+    slow_view(None)
+    profiler.stop()
+    assert profiler.samples > 0
+    assert 'slow_view' in profiler.folded()
+
+
+@pytest.mark.django_db
+class TestProfilingViews:
+    @pytest.fixture
+    def staff_client(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(email='admin@example.com', password='x', is_staff=True))
+        return client
+
+    def test_list_and_download(self, profiling, staff_client):
+        """Тест: staff получает токен, список и стеки профиля"""
+        token = staff_client.post('/api/profiling/token/').json()
+        response = APIClient().get('/api/courses/categories/', HTTP_X_PROFILE_TOKEN=token['token'])
+        profile_id = response['X-Profile-Id']
+
+        profiles = staff_client.get('/api/profiling/').json()
+        assert [profile['id'] for profile in profiles] == [profile_id]
+        assert profiles[0]['endpoint'] == 'category-list'
+        assert 'folded' not in profiles[0]
+
+        download = staff_client.get(f'/api/profiling/{profile_id}/')
+        assert download.status_code == 200
+        assert download['Content-Disposition'] == f'attachment; filename="{profile_id}.folded"'
+
+        assert staff_client.get('/api/profiling/1-deadbeef/').status_code == 404
+
+    def test_requires_staff(self, profiling):
+        """Тест: обычный пользователь не видит профили"""
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(email='user@example.com', password='x'))
+        assert client.get('/api/profiling/').status_code == 403
+        assert client.post('/api/profiling/token/').status_code == 403
@@ -0,0 +1,71 @@
+import pytest
+from django.core.management import CommandError, call_command
+from django.db.models import Count
+from accounts.models import Profile, User
+from courses.models import AnalyticsLog, Category, Course, CourseAnalytics, Enrollment, Review, Tag
+from core.scale_data import SCALES
+
+
+def _snapshot():
+    """Сгенерированные данные без зависимости от конкретных id"""
+    user_base = User.objects.order_by('id').values_list('id', flat=True).first()
+    course_base = Course.objects.order_by('id').values_list('id', flat=True).first()
+    return {
+        'enrollments': sorted(
+            (row[0] - user_base, row[1] - course_base, row[2])
+            for row in Enrollment.objects.values_list('student_id', 'course_id', 'status')
+        ),
+        'reviews': sorted(
+            (row[0] - user_base, row[1] - course_base, row[2])
+            for row in Review.objects.values_list('user_id', 'course_id', 'rating')
+        ),
+        'prices': list(Course.objects.order_by('id').values_list('price', flat=True)),
+    }
+
+
+@pytest.mark.django_db
+class TestGenerateScaleData:
+    def test_generates_tiny_scale(self):
+        """Тест объемов и денормализованных счетчиков после генерации"""
+        call_command('generate_scale_data', scale='tiny', seed=7)
+        sizes = SCALES['tiny']
+
+        assert User.objects.count() == sizes['teachers'] + sizes['students']
+        assert Profile.objects.count() == User.objects.count()
+        assert Course.objects.count() == sizes['courses']
+        assert CourseAnalytics.objects.count() == sizes['courses']
+        assert Enrollment.objects.exists()
+        assert User.objects.first().check_password('loadtest123')
+
+        expected_lessons = sizes['modules_per_course'] * sizes['lessons_per_module']
+        enrollments = dict(Enrollment.objects.values('course_id').annotate(n=Count('id')).values_list('course_id', 'n'))
+        reviews = dict(Review.objects.values('course_id').annotate(n=Count('id')).values_list('course_id', 'n'))
+        views = dict(
+            AnalyticsLog.objects.filter(event_type='view')
+            .values('course_id').annotate(n=Count('id')).values_list('course_id', 'n')
+        )
+        for course in Course.objects.select_related('analytics'):
+            assert course.total_lessons == expected_lessons
+            assert course.students_count == enrollments.get(course.id, 0)
+            assert course.reviews_count == reviews.get(course.id, 0)
+            assert course.analytics.views_count == views.get(course.id, 0)
+            assert course.analytics.total_ratings == reviews.get(course.id, 0)
+
+    def test_same_seed_gives_same_data(self):
+        """Тест детерминированности: одинаковый seed дает одинаковые данные"""
+        call_command('generate_scale_data', scale='tiny', seed=7)
+        first = _snapshot()
+
+        User.objects.all().delete()
+        Course.objects.all().delete()
+        Category.objects.all().delete()
+        Tag.objects.all().delete()
+
+        call_command('generate_scale_data', scale='tiny', seed=7)
+        assert _snapshot() == first
+
+    def test_rejects_existing_seed(self):
+        """Тест повторного запуска с тем же seed"""
+        call_command('generate_scale_data', scale='tiny', seed=7)
+        with pytest.raises(CommandError):
+            call_command('generate_scale_data', scale='tiny', seed=7)
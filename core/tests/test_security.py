@@ -0,0 +1,139 @@
+import pytest
+from datetime import timedelta
+import jwt
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory
+from accounts.models import User
+from core.api.security import JWTAuthentication, PrincipalCache, principal_cache, get_jwt_secret_key
+from courses.models import Category, Course, Enrollment
+
+
+class TestPrincipalCache:
+    def make_principal(self, user_id, token_version=0):
+        return {'id': user_id, 'token_version': token_version}
+
+    def test_lru_eviction(self):
+        """Тест вытеснения давно не использованных записей"""
+        cache = PrincipalCache(max_size=2, ttl=60)
+        cache.set(self.make_principal(1))
+        cache.set(self.make_principal(2))
+        cache.get(1, 0)
+        cache.set(self.make_principal(3))
+
+        assert cache.get(1, 0) is not None
+        assert cache.get(2, 0) is None
+        assert len(cache) == 2
+
+    def test_ttl_and_version(self):
+        """Тест истечения записи и промаха при другой версии токенов"""
+        cache = PrincipalCache(max_size=10, ttl=-1)
+        cache.set(self.make_principal(1))
+        assert cache.get(1, 0) is None
+
+        cache = PrincipalCache(max_size=10, ttl=60)
+        cache.set(self.make_principal(1, token_version=1))
+        assert cache.get(1, 0) is None
+
+    def test_shared_invalidation(self):
+        """Тест: сброс в одном процессе меняет общую версию для остальных"""
+        first, second = PrincipalCache(), PrincipalCache()
+        for local in (first, second):
+            local.set(self.make_principal(1), local.get_version(1))
+
+        first.invalidate(1)
+        assert second.get(1, 0, second.get_version(1)) is None
+
+
+@pytest.mark.django_db
+class TestJWTAuthentication:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        principal_cache.clear()
+
+    @pytest.fixture
+    def user(self):
+        return User.objects.create_user(email='teacher@example.com', password='testpass123', role='teacher')
+
+    def authenticate(self, token):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return JWTAuthentication().authenticate(request)
+
+    def test_cached_principal(self, user, django_assert_num_queries):
+        """Тест аутентификации без запросов к БД при повторных обращениях"""
+        token = JWTAuthentication.generate_token(user)
+        with django_assert_num_queries(1):
+            principal, _ = self.authenticate(token)
+        with django_assert_num_queries(0):
+            principal, _ = self.authenticate(token)
+
+        assert isinstance(principal, User)
+        assert principal.id == user.id
+        assert principal.role == 'teacher'
+        assert principal.email == 'teacher@example.com'
+        assert principal.is_authenticated
+        # Остальные поля модели отложены и загружаются при обращении
+        assert principal.phone == ''
+
+    def test_principal_in_orm(self, user):
+        """Тест: пользователь из кэша принимается фильтрами и внешними ключами ORM"""
+        principal, _ = self.authenticate(JWTAuthentication.generate_token(user))
+        category = Category.objects.create(name='Programming', slug='programming')
+        course = Course.objects.create(title='Python', slug='python', description='Описание', category=category)
+
+        enrollment = Enrollment.objects.create(student=principal, course=course)
+
+        assert list(Enrollment.objects.filter(student=principal)) == [enrollment]
+
+    def test_refresh_token_rejected(self, user):
+        """Тест: refresh-токен не принимается как access"""
+        token = jwt.encode(
+            {
+                'user_id': user.id,
+                'exp': int((timezone.now() + timedelta(hours=1)).timestamp()),
+                'token_type': 'refresh'
+            },
+            get_jwt_secret_key(),
+            algorithm='HS256'
+        )
+        assert self.authenticate(token) is None
+
+    def test_invalidation_on_save(self, user):
+        """Тест сброса кэша при смене роли"""
+        token = JWTAuthentication.generate_token(user)
+        self.authenticate(token)
+
+        user.role = 'producer'
+        user.save()
+
+        principal, _ = self.authenticate(token)
+        assert principal.role == 'producer'
+
+    def test_revoked_token(self, user):
+        """Тест отклонения отозванного токена"""
+        token = JWTAuthentication.generate_token(user)
+        self.authenticate(token)
+        user.revoke_tokens()
+
+        with pytest.raises(AuthenticationFailed):
+            self.authenticate(token)
+        principal, _ = self.authenticate(JWTAuthentication.generate_token(user))
+        assert principal.token_version == 1
+
+    def test_expired_token(self, user):
+        """Тест истекшего токена"""
+        token = jwt.encode(
+            {'user_id': user.id, 'exp': int((timezone.now() - timedelta(minutes=1)).timestamp()), 'ver': 0},
+            get_jwt_secret_key(),
+            algorithm='HS256'
+        )
+        with pytest.raises(AuthenticationFailed):
+            self.authenticate(token)
+
+    def test_simplejwt_access_token(self, user):
+        """Тест: access-токены simplejwt принимаются"""
+        from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+        principal, _ = self.authenticate(str(AccessToken.for_user(user)))
+        assert principal.pk == user.pk
+        assert self.authenticate(str(RefreshToken.for_user(user))) is None
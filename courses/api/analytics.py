@@ -2,12 +2,19 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status
 from django.utils import timezone
-from django.db.models import F, Sum, Avg
+from django.db.models import Avg, Count, FloatField, OuterRef, Subquery
+from django.db.models.fields.json import KT
+from django.db.models.functions import Cast, Coalesce
 from django.core.cache import cache
+from django.utils.decorators import method_decorator
 from core.api.base import CQRSViewSet, cache_response
 from core.monitoring import monitor_view, monitor_db_query
+from rest_framework.permissions import IsAuthenticated
+from courses.permissions import HasCoursePermission
+from courses.services.analytics import CourseAnalyticsService
+from courses.services.permissions import CoursePermissionService
 from courses.models import Course, CourseAnalytics, AnalyticsLog
-from courses.serializers import (
+from courses.api.serializers import (
     CourseAnalyticsSerializer,
     AnalyticsEventSerializer,
     CourseAnalyticsDetailSerializer
@@ -25,25 +32,51 @@ class CourseAnalyticsViewSet(CQRSViewSet):
     serializer_class = CourseAnalyticsSerializer
     query_serializer_class = CourseAnalyticsDetailSerializer
     command_serializer_class = AnalyticsEventSerializer
+    permission_classes = [IsAuthenticated, HasCoursePermission]
+    required_course_permission = 'can_view_analytics'
 
-    @monitor_view
+    def get_queryset(self):
+        """
+        Аналитика только по курсам, где у пользователя есть право ее просматривать
+        """
+        queryset = super().get_queryset()
+        if self.action in ['list', 'retrieve', 'analytics']:
+            queryset = self.with_monthly_stats(queryset)
+        if self.request.user.is_staff:
+            return queryset
+        return queryset.filter(
+            course_id__in=CoursePermissionService.get_course_ids(self.request.user, 'can_view_analytics')
+        )
+
+    @staticmethod
+    def with_monthly_stats(queryset):
+        """Просмотры и средняя оценка за 30 дней из лога - подзапросами, без JOIN по логу"""
+        logs = AnalyticsLog.objects.filter(
+            course_id=OuterRef('course_id'),
+            timestamp__gte=timezone.now() - timezone.timedelta(days=30)
+        ).order_by().values('course_id')
+        return queryset.annotate(
+            monthly_views=Coalesce(Subquery(
+                logs.filter(event_type='view').annotate(count=Count('id')).values('count')
+            ), 0),
+            monthly_rating=Subquery(
+                logs.filter(event_type='rate').annotate(
+                    rating=Avg(Cast(KT('data__rating'), FloatField()))
+                ).values('rating')
+            )
+        )
+
+    @method_decorator(monitor_view)
     @cache_response(timeout=300, key_prefix='course_analytics')
     @action(detail=True, methods=['get'])
     def analytics(self, request, pk=None) -> Response:
         """
         Получение аналитики по конкретному курсу
         """
+        # 404 и отказ в доступе - до перехвата остальных ошибок
+        analytics = self.get_object()
         try:
-            course = self.get_object()
-            analytics = self._get_course_analytics(course)
-            
-            return Response(analytics)
-            
-        except Course.DoesNotExist:
-            return Response(
-                {'error': 'Курс не найден'},
-                status=status.HTTP_404_NOT_FOUND
-            )
+            return Response(self._get_course_analytics(analytics))
         except Exception as e:
             logger.exception(f"Error getting course analytics: {str(e)}")
             return Response(
@@ -51,14 +84,14 @@ class CourseAnalyticsViewSet(CQRSViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-    @monitor_view
+    @method_decorator(monitor_view)
     @action(detail=True, methods=['post'])
     def update_analytics(self, request, pk=None) -> Response:
         """
         Обновление аналитики курса через события
         """
+        course = self.get_object().course
         try:
-            course = self.get_object()
             serializer = AnalyticsEventSerializer(data=request.data)
             
             if not serializer.is_valid():
@@ -76,11 +109,6 @@ class CourseAnalyticsViewSet(CQRSViewSet):
             
             return Response({'status': 'success'})
             
-        except Course.DoesNotExist:
-            return Response(
-                {'error': 'Курс не найден'},
-                status=status.HTTP_404_NOT_FOUND
-            )
         except Exception as e:
             logger.exception(f"Error updating course analytics: {str(e)}")
             return Response(
@@ -89,66 +117,19 @@ class CourseAnalyticsViewSet(CQRSViewSet):
             )
 
     @monitor_db_query
-    def _get_course_analytics(self, course: Course) -> Dict[str, Any]:
+    def _get_course_analytics(self, analytics: CourseAnalytics) -> Dict[str, Any]:
         """
         Получение агрегированной аналитики по курсу
+        (объект из get_queryset уже содержит статистику за месяц)
         """
-        analytics = CourseAnalytics.objects.filter(course=course).first()
-        
-        if not analytics:
-            return {
-                'views_count': 0,
-                'completion_rate': 0,
-                'average_rating': 0,
-                'revenue': 0
-            }
-            
-        # Получаем детальную статистику
-        logs = AnalyticsLog.objects.filter(
-            course=course,
-            timestamp__gte=timezone.now() - timezone.timedelta(days=30)
-        )
-        
-        monthly_stats = logs.aggregate(
-            total_views=Sum('views_count'),
-            avg_rating=Avg('rating')
-        )
-        
-        return {
-            'views_count': analytics.views_count,
-            'completion_rate': analytics.completion_rate,
-            'average_rating': analytics.average_rating,
-            'revenue': analytics.revenue,
-            'monthly_views': monthly_stats['total_views'] or 0,
-            'monthly_rating': monthly_stats['avg_rating'] or 0
-        }
+        data = CourseAnalyticsDetailSerializer(analytics).data
+        data.pop('id')
+        data.pop('course')
+        data['monthly_rating'] = data['monthly_rating'] or 0
+        return data
 
     def _process_analytics_event(self, course: Course, event_data: Dict[str, Any]):
         """
         Обработка события аналитики
         """
-        analytics, created = CourseAnalytics.objects.get_or_create(course=course)
-        event_type = event_data['event_type']
-        
-        # Создаем запись в логе
-        AnalyticsLog.objects.create(
-            course=course,
-            event_type=event_type,
-            user=self.request.user,
-            data=event_data
-        )
-        
-        # Обновляем агрегированные данные
-        if event_type == 'view':
-            analytics.views_count = F('views_count') + 1
-        elif event_type == 'complete':
-            analytics.completion_count = F('completion_count') + 1
-            analytics.completion_rate = (F('completion_count') * 100.0) / F('views_count')
-        elif event_type == 'rate':
-            analytics.total_ratings = F('total_ratings') + 1
-            analytics.rating_sum = F('rating_sum') + event_data['rating']
-            analytics.average_rating = F('rating_sum') / F('total_ratings')
-        elif event_type == 'purchase':
-            analytics.revenue = F('revenue') + event_data['amount']
-            
-        analytics.save()
+        CourseAnalyticsService.record_event(course, event_data, user=self.request.user)
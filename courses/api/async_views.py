@@ -0,0 +1,233 @@
+"""
+Асинхронные эндпоинты чтения каталога и аналитики курсов (ASGI).
+Независимые выборки (курс, статистика, преподаватели, отзывы, теги)
+выполняются одновременно через asyncio.gather.
+"""
+import asyncio
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.exceptions import NotAuthenticated, PermissionDenied
+
+from accounts.api.serializers import ProfileSerializer, UserSerializer
+from core.api.asynchronous import (
+    aauthenticate, aget_or_build, async_api_view, get_page_params, json_response
+)
+from courses.models import AnalyticsLog, Course, CourseAnalytics, Module, Review
+from courses.services import live_analytics
+from courses.services.permissions import CoursePermissionService
+from courses.services.teachers import TeacherLoader
+
+CATALOG_CACHE_PREFIX = 'async_catalog_'
+CATALOG_CACHE_TIMEOUT = 60
+
+CATALOG_FILTERS = ('category', 'language', 'difficulty', 'type')
+
+COURSE_LIST_FIELDS = (
+    'id', 'title', 'slug', 'excerpt', 'difficulty', 'language', 'type',
+    'price', 'currency', 'status', 'published_at'
+)
+COURSE_DETAIL_FIELDS = COURSE_LIST_FIELDS + (
+    'description', 'discount_price', 'duration', 'video_intro',
+    'students_count', 'reviews_count', 'average_rating', 'total_lessons'
+)
+CATEGORY_FIELDS = ('category__id', 'category__name', 'category__slug')
+
+ANALYTICS_FIELDS = ('id', 'views_count', 'completion_rate', 'average_rating', 'revenue')
+LIVE_SNAPSHOT_FIELDS = (
+    'views_count', 'completion_count', 'completion_rate', 'total_ratings',
+    'rating_sum', 'average_rating', 'revenue'
+)
+RECENT_EVENTS_DAYS = 30
+LATEST_REVIEWS = 5
+
+
+def _pop_category(row):
+    row['category'] = {
+        'id': row.pop('category__id'),
+        'name': row.pop('category__name'),
+        'slug': row.pop('category__slug'),
+    }
+    return row
+
+
+def _primary_teachers(request, course_ids):
+    """Основные преподаватели (TeacherLoader) в том же виде, что и в синхронном API"""
+    result = {}
+    for course_id, role in TeacherLoader().load_primary_teachers(course_ids).items():
+        profile = getattr(role.user, 'profile', None) if role else None
+        result[course_id] = ProfileSerializer(profile, context={'request': request}).data if profile else None
+    return result
+
+
+def _teachers(course_id):
+    return UserSerializer(TeacherLoader().get_teachers(course_id), many=True).data
+
+
+async def _load_tags(course_ids):
+    tags = {course_id: [] for course_id in course_ids}
+    rows = Course.tags.through.objects.filter(
+        course_id__in=course_ids
+    ).order_by('tag__name').values_list('course_id', 'tag__id', 'tag__name', 'tag__slug')
+    async for course_id, tag_id, name, slug in rows:
+        tags[course_id].append({'id': tag_id, 'name': name, 'slug': slug})
+    return tags
+
+
+async def _build_catalog_page(request, filters, page, page_size):
+    queryset = Course.objects.filter(status='published', **filters)
+    offset = (page - 1) * page_size
+    rows = [
+        _pop_category(row) async for row in queryset.order_by('-rank_score', 'id').values(
+            *COURSE_LIST_FIELDS, *CATEGORY_FIELDS
+        )[offset:offset + page_size]
+    ]
+    course_ids = [row['id'] for row in rows]
+
+    count, tags, teachers = await asyncio.gather(
+        queryset.acount(),
+        _load_tags(course_ids),
+        sync_to_async(_primary_teachers)(request, course_ids),
+    )
+    for row in rows:
+        row['tags'] = tags[row['id']]
+        row['teacher'] = teachers[row['id']]
+    return {'count': count, 'page': page, 'page_size': page_size, 'results': rows}
+
+
+@async_api_view
+async def course_list(request):
+    """Каталог опубликованных курсов: фильтры category (slug), language, difficulty, type"""
+    page, page_size = get_page_params(request)
+    params = {name: request.GET[name] for name in CATALOG_FILTERS if request.GET.get(name)}
+
+    filters = dict(params)
+    if 'category' in filters:
+        filters['category__slug'] = filters.pop('category')
+
+    cache_key = CATALOG_CACHE_PREFIX + urlencode(sorted({**params, 'page': page, 'page_size': page_size}.items()))
+    data = await aget_or_build(
+        cache_key,
+        CATALOG_CACHE_TIMEOUT,
+        lambda: _build_catalog_page(request, filters, page, page_size)
+    )
+    return json_response(data)
+
+
+async def _course_stats(slug):
+    stats = await CourseAnalytics.objects.filter(course__slug=slug).values(
+        'views_count', 'completion_count', 'completion_rate'
+    ).afirst()
+    return stats or {'views_count': 0, 'completion_count': 0, 'completion_rate': 0}
+
+
+async def _latest_reviews(slug):
+    return [
+        review async for review in Review.objects.filter(course__slug=slug).order_by('-created_at').values(
+            'id', 'rating', 'text', 'created_at', 'user__first_name', 'user__last_name'
+        )[:LATEST_REVIEWS]
+    ]
+
+
+async def _modules(slug):
+    return [
+        module async for module in Module.objects.filter(course__slug=slug).order_by('order').annotate(
+            lessons_count=Count('lessons')
+        ).values('id', 'title', 'order', 'lessons_count')
+    ]
+
+
+@async_api_view
+async def course_detail(request, slug):
+    """Карточка курса со статистикой, преподавателями, отзывами и программой"""
+    course, stats, reviews, modules = await asyncio.gather(
+        Course.objects.values(*COURSE_DETAIL_FIELDS, *CATEGORY_FIELDS).aget(slug=slug),
+        _course_stats(slug),
+        _latest_reviews(slug),
+        _modules(slug),
+    )
+    course = _pop_category(course)
+
+    # Теги и преподаватели загружаются по id курса
+    tags, teachers = await asyncio.gather(
+        _load_tags([course['id']]),
+        sync_to_async(_teachers)(course['id']),
+    )
+    course.update(
+        tags=tags[course['id']],
+        teachers=teachers,
+        stats=stats,
+        reviews=reviews,
+        modules=modules,
+    )
+    return json_response(course)
+
+
+def _check_analytics_permission(user, course_id):
+    if not user.is_staff and not CoursePermissionService.has_permission(user, course_id, 'can_view_analytics'):
+        raise PermissionDenied()
+
+
+async def _recent_events(course_id):
+    since = timezone.now() - timedelta(days=RECENT_EVENTS_DAYS)
+    rows = AnalyticsLog.objects.filter(
+        course_id=course_id,
+        timestamp__gte=since
+    ).order_by().values('event_type').annotate(count=Count('id'))
+    return {row['event_type']: row['count'] async for row in rows}
+
+
+async def _aget_analytics_course(request, slug, *fields):
+    """Курс по slug, если у пользователя есть право can_view_analytics"""
+    user = await aauthenticate(request)
+    if not user.is_authenticated:
+        raise NotAuthenticated()
+
+    course = await Course.objects.values('id', *fields).aget(slug=slug)
+    await sync_to_async(_check_analytics_permission)(user, course['id'])
+    return course
+
+
+@async_api_view
+async def course_analytics(request, slug):
+    """Аналитика курса для пользователей с правом can_view_analytics"""
+    course = await _aget_analytics_course(
+        request, slug, *(f'rating_{star}_count' for star in range(1, 6))
+    )
+
+    analytics, events = await asyncio.gather(
+        CourseAnalytics.objects.filter(course_id=course['id']).values(*ANALYTICS_FIELDS).afirst(),
+        _recent_events(course['id']),
+    )
+    data = {'course': course['id'], **(analytics or {})}
+    data['rating_distribution'] = {str(star): course[f'rating_{star}_count'] for star in range(5, 0, -1)}
+    data['recent_events'] = events
+    return json_response(data)
+
+
+@async_api_view
+async def course_analytics_stream(request, slug):
+    """
+    Поток SSE живой аналитики курса: снимок счетчиков, затем их приращения
+    не чаще раза в секунду. Заменяет периодический опрос аналитики
+    """
+    course = await _aget_analytics_course(request, slug)
+
+    async def load_snapshot():
+        snapshot = await CourseAnalytics.objects.filter(
+            course_id=course['id']
+        ).values(*LIVE_SNAPSHOT_FIELDS).afirst()
+        return {'course': course['id'], **(snapshot or {})}
+
+    response = StreamingHttpResponse(
+        live_analytics.stream(course['id'], load_snapshot),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Отключает буферизацию ответа в nginx
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,34 @@
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from courses.models import Course
+from courses.services.analytics import CourseAnalyticsService
+from .serializers import AnalyticsEventSerializer
+
+
+class AnalyticsEventView(APIView):
+    """
+    Прием событий аналитики курса.
+
+    Событие пишется в лог, агрегаты CourseAnalytics обновляются, а дельта
+    после коммита уходит открытым потокам живой аналитики (SSE).
+    Пользователь отправляет только просмотры. Завершения, оценки и покупки
+    принимаются от staff-аккаунтов сервисов обучения и оплаты.
+    """
+    permission_classes = [IsAuthenticated]
+    CLIENT_EVENTS = ('view',)
+
+    def post(self, request, slug):
+        serializer = AnalyticsEventSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        event_data = serializer.validated_data
+
+        if event_data['event_type'] not in self.CLIENT_EVENTS and not request.user.is_staff:
+            raise PermissionDenied('Событие этого типа принимается только от сервисов')
+
+        course = get_object_or_404(Course.objects.only('id'), slug=slug)
+        CourseAnalyticsService.record_event(course, event_data, user=request.user)
+        return Response(status=status.HTTP_202_ACCEPTED)
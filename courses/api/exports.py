@@ -0,0 +1,72 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+from core.api.asynchronous import aiter_in_thread
+from courses.services.exports import ExportService
+from courses.services.permissions import CoursePermissionService
+
+
+class ExportView(APIView):
+    """
+    Потоковая выгрузка логов аналитики (analytics-logs) или зачислений (enrollments).
+
+    Параметры: output=csv|jsonl, course (можно несколько), date_from, date_to,
+    event_type (логи) или status (зачисления), gzip=1.
+    Пользователь без is_staff получает только курсы, где у него есть право
+    can_view_analytics (логи) или can_manage_students (зачисления).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get_course_ids(self, request, permission):
+        try:
+            requested = [int(course_id) for course_id in request.query_params.getlist('course')]
+        except ValueError:
+            raise ValidationError({'course': 'Ожидается id курса'})
+
+        if request.user.is_staff:
+            return requested or None
+
+        allowed = CoursePermissionService.get_course_ids(request.user, permission)
+        if not requested:
+            return allowed
+        if not set(requested) <= set(allowed):
+            raise PermissionDenied('Нет доступа к выгрузке по одному из курсов')
+        return requested
+
+    def get(self, request, dataset):
+        try:
+            spec = ExportService.get_dataset(dataset)
+        except DjangoValidationError:
+            raise NotFound()
+
+        params = request.query_params
+        export_format = params.get('output', 'csv')
+        if export_format not in ExportService.FORMATS:
+            raise ValidationError({'output': f'Допустимые форматы: {", ".join(ExportService.FORMATS)}'})
+        compress = params.get('gzip') in ('1', 'true')
+
+        try:
+            queryset = ExportService.get_queryset(
+                dataset,
+                course_ids=self.get_course_ids(request, spec['permission']),
+                date_from=params.get('date_from'),
+                date_to=params.get('date_to'),
+                types=params.getlist(spec['type_field'])
+            )
+        except DjangoValidationError as e:
+            raise ValidationError(e.messages)
+
+        chunks = ExportService.stream(dataset, queryset, export_format, compress=compress)
+        if isinstance(request._request, ASGIRequest):
+            chunks = aiter_in_thread(chunks)
+
+        response = StreamingHttpResponse(
+            chunks,
+            content_type='application/gzip' if compress else ExportService.FORMATS[export_format]
+        )
+        filename = ExportService.get_filename(dataset, export_format, compress)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
@@ -1,6 +1,10 @@
+from decimal import Decimal
+
 from rest_framework import serializers
-from courses.models import Course, Module, Lesson, Announcement, Category, Tag
+from courses.models import AnalyticsLog, Course, CourseAnalytics, Module, Lesson, Announcement, Category, Tag
 from accounts.api.serializers import ProfileSerializer
+from courses.services.publication import CoursePublicationService
+from courses.services.teachers import TeacherLoader
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -29,8 +33,18 @@ class AnnouncementSerializer(serializers.ModelSerializer):
         model = Announcement
         fields = '__all__'
 
-class CourseSerializer(serializers.ModelSerializer):
-    teacher = ProfileSerializer(read_only=True)
+class PrimaryTeacherMixin:
+    """Профиль основного преподавателя, загружаемый пакетно для всего списка курсов"""
+
+    def get_teacher(self, obj):
+        role = TeacherLoader.for_serializer(self).get_primary_teacher(obj.pk)
+        profile = getattr(role.user, 'profile', None) if role else None
+        if profile is None:
+            return None
+        return ProfileSerializer(profile, context=self.context).data
+
+class CourseSerializer(PrimaryTeacherMixin, serializers.ModelSerializer):
+    teacher = serializers.SerializerMethodField()
     category = CategorySerializer(read_only=True)
     tags = TagSerializer(many=True, read_only=True)
     modules = ModuleSerializer(many=True, read_only=True)
@@ -40,14 +54,58 @@ class CourseSerializer(serializers.ModelSerializer):
         model = Course
         fields = '__all__'
 
-class CourseListSerializer(serializers.ModelSerializer):
+class CourseListSerializer(PrimaryTeacherMixin, serializers.ModelSerializer):
     """Сериализатор для списка курсов с меньшим количеством данных"""
-    teacher = ProfileSerializer(read_only=True)
+    teacher = serializers.SerializerMethodField()
     category = CategorySerializer(read_only=True)
     tags = TagSerializer(many=True, read_only=True)
 
     class Meta:
         model = Course
         fields = ('id', 'title', 'slug', 'excerpt', 'teacher', 'category', 
-                 'tags', 'difficulty_level', 'language', 'course_type', 
+                 'tags', 'difficulty', 'language', 'type', 
                  'price', 'currency', 'status', 'published_at')
+
+class CoursePublishBatchSerializer(serializers.Serializer):
+    """Список курсов для пакетной проверки и публикации"""
+    course_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=CoursePublicationService.MAX_BATCH_SIZE
+    )
+    dry_run = serializers.BooleanField(default=False)
+
+class CourseAnalyticsSerializer(serializers.ModelSerializer):
+    """
+    Аналитика курса. Пакет courses/serializers/ перекрыт модулем
+    courses/serializers.py, поэтому сериализаторы аналитики для API объявлены здесь
+    """
+    class Meta:
+        model = CourseAnalytics
+        fields = ['id', 'course', 'views_count', 'completion_rate', 'average_rating', 'revenue']
+        read_only_fields = fields
+
+
+class CourseAnalyticsDetailSerializer(CourseAnalyticsSerializer):
+    """Аналитика курса со статистикой за 30 дней (аннотации with_monthly_stats)"""
+    monthly_views = serializers.IntegerField(read_only=True)
+    monthly_rating = serializers.FloatField(read_only=True, allow_null=True)
+
+    class Meta(CourseAnalyticsSerializer.Meta):
+        fields = CourseAnalyticsSerializer.Meta.fields + ['monthly_views', 'monthly_rating']
+        read_only_fields = fields
+
+
+class AnalyticsEventSerializer(serializers.Serializer):
+    """Событие аналитики курса"""
+    event_type = serializers.ChoiceField(choices=AnalyticsLog.EVENT_TYPES)
+    timestamp = serializers.DateTimeField(required=False)
+    rating = serializers.IntegerField(required=False, min_value=1, max_value=5)
+    amount = serializers.DecimalField(required=False, max_digits=10, decimal_places=2, min_value=Decimal('0'))
+
+    def validate(self, data):
+        if data['event_type'] == 'rate' and 'rating' not in data:
+            raise serializers.ValidationError({'rating': 'Поле rating обязательно для события rate'})
+        if data['event_type'] == 'purchase' and 'amount' not in data:
+            raise serializers.ValidationError({'amount': 'Поле amount обязательно для события purchase'})
+        return data
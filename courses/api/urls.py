@@ -1,6 +1,8 @@
 from rest_framework.routers import DefaultRouter
 from django.urls import path, include
 from . import views
+from .events import AnalyticsEventView
+from .exports import ExportView
 
 router = DefaultRouter()
 router.register('categories', views.CategoryViewSet, basename='category')
@@ -11,5 +13,7 @@ router.register(r'modules/(?P<module_id>\d+)/lessons', views.LessonViewSet, base
 router.register(r'courses/(?P<course_slug>[\w-]+)/announcements', views.AnnouncementViewSet, basename='course-announcement')
 
 urlpatterns = [
+    path('exports/<str:dataset>/', ExportView.as_view(), name='course-export'),
+    path('courses/<slug:slug>/analytics/events/', AnalyticsEventView.as_view(), name='course-analytics-events'),
     path('', include(router.urls)),
 ]
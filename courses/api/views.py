@@ -1,10 +1,13 @@
 from rest_framework import viewsets, permissions, filters
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from courses.models import Course, Module, Lesson, Announcement, Category, Tag
+from courses.services.publication import CoursePublicationService
 from .serializers import (
     CourseSerializer, CourseListSerializer, ModuleSerializer,
     LessonSerializer, AnnouncementSerializer, CategorySerializer,
-    TagSerializer
+    TagSerializer, CoursePublishBatchSerializer
 )
 
 class CategoryViewSet(viewsets.ModelViewSet):
@@ -23,9 +26,10 @@ class CourseViewSet(viewsets.ModelViewSet):
     queryset = Course.objects.all()
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['category', 'tags', 'difficulty_level', 'language', 'course_type', 'status']
+    filterset_fields = ['category', 'tags', 'difficulty', 'language', 'type', 'status']
     search_fields = ['title', 'description']
-    ordering_fields = ['created_at', 'published_at', 'price']
+    ordering_fields = ['created_at', 'published_at', 'price', 'rank_score']
+    ordering = ['-rank_score']
     lookup_field = 'slug'
 
     def get_serializer_class(self):
@@ -39,6 +43,34 @@ class CourseViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(status='published')
         return queryset
 
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='publish-batch',
+        permission_classes=[permissions.IsAdminUser]
+    )
+    def publish_batch(self, request):
+        """
+        Проверка готовности и публикация списка курсов редактором.
+        Тело: {"course_ids": [...], "dry_run": false}; при dry_run курсы только проверяются.
+        Ответ: опубликованные (или готовые при dry_run) курсы и причины отказа по остальным
+        """
+        serializer = CoursePublishBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        result = CoursePublicationService.publish(**serializer.validated_data)
+        return Response({
+            'dry_run': serializer.validated_data['dry_run'],
+            'published': result['published'],
+            'failed': {
+                course_id: [
+                    {'code': code, 'message': CoursePublicationService.REASONS[code]}
+                    for code in reasons
+                ]
+                for course_id, reasons in result['failed'].items()
+            },
+        })
+
 class ModuleViewSet(viewsets.ModelViewSet):
     queryset = Module.objects.all()
     serializer_class = ModuleSerializer
@@ -0,0 +1,94 @@
+"""
+Доменные события курсов и их обработчики (core/outbox.py).
+
+События пишутся сигналами (courses/signals.py, core/signals.py) в транзакции
+изменения. Обработчик получает payload всей пачки событий одного типа,
+поэтому кэш сбрасывается одним delete_many, а пересчеты ставятся по одному
+на курс или категорию.
+"""
+from django.core.cache import cache
+
+from core import outbox
+from core.debounce import debounced_enqueue
+from .models import Course
+from .services.analytics import CourseAnalyticsService
+from .services.teachers import TeacherLoader
+from .tasks import update_category_counts, update_course_student_stats
+
+COURSE_CHANGED = 'course.changed'
+COURSE_ANALYTICS_CHANGED = 'course_analytics.changed'
+ENROLLMENT_CHANGED = 'enrollment.changed'
+REVIEW_CHANGED = 'review.changed'
+
+
+def _course_ids(payloads):
+    return sorted({payload['course_id'] for payload in payloads})
+
+
+def _schedule_category_counts(category_ids):
+    for category_id in sorted(set(category_ids) - {None}):
+        debounced_enqueue(update_category_counts, {'category_id': category_id})
+
+
+def _course_categories(course_ids):
+    return Course.objects.filter(pk__in=course_ids).values_list('category_id', flat=True)
+
+
+@outbox.handler(COURSE_CHANGED)
+def invalidate_course_cache(payloads):
+    keys = []
+    for course_id in _course_ids(payloads):
+        keys += [
+            f'course_details_{course_id}',
+            f'course_modules_{course_id}',
+            f'course_analytics:{course_id}',
+        ]
+        keys += TeacherLoader.get_cache_keys(course_id)
+        keys += CourseAnalyticsService.get_cache_keys(course_id)
+    cache.delete_many(keys)
+
+
+@outbox.handler(COURSE_CHANGED)
+def recount_changed_categories(payloads):
+    """Создание, удаление курса, смена категории или статуса"""
+    _schedule_category_counts(
+        category_id
+        for payload in payloads
+        for category_id in payload.get('category_ids', [])
+    )
+
+
+@outbox.handler(COURSE_ANALYTICS_CHANGED)
+def invalidate_course_analytics_cache(payloads):
+    cache.delete_many([f'course_analytics:{course_id}' for course_id in _course_ids(payloads)])
+
+
+@outbox.handler(ENROLLMENT_CHANGED)
+def invalidate_enrollment_cache(payloads):
+    keys = []
+    for course_id in _course_ids(payloads):
+        keys += CourseAnalyticsService.get_cache_keys(course_id)
+        keys.append(f'active_students_{course_id}')
+    cache.delete_many(keys)
+
+
+@outbox.handler(ENROLLMENT_CHANGED)
+def recount_student_stats(payloads):
+    course_ids = _course_ids(payloads)
+    for course_id in course_ids:
+        debounced_enqueue(update_course_student_stats, {'course_id': course_id})
+    _schedule_category_counts(_course_categories(course_ids))
+
+
+@outbox.handler(REVIEW_CHANGED)
+def invalidate_rating_cache(payloads):
+    keys = []
+    for course_id in _course_ids(payloads):
+        keys += CourseAnalyticsService.get_cache_keys(course_id)
+    cache.delete_many(keys)
+
+
+@outbox.handler(REVIEW_CHANGED)
+def recount_rated_categories(payloads):
+    """Средний рейтинг категории зависит от рейтингов ее курсов"""
+    _schedule_category_counts(_course_categories(_course_ids(payloads)))
@@ -0,0 +1,60 @@
+import sys
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from courses.services.exports import ExportService
+
+
+class Command(BaseCommand):
+    help = 'Потоковая выгрузка логов аналитики или зачислений в CSV/JSONL с постоянным расходом памяти'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=list(ExportService.DATASETS), help='Набор данных')
+        parser.add_argument('--format', dest='export_format', choices=list(ExportService.FORMATS), default='csv')
+        parser.add_argument('--course', type=int, action='append', dest='courses', help='id курса (можно несколько)')
+        parser.add_argument('--from', dest='date_from', help='Начало периода (ISO дата или дата-время)')
+        parser.add_argument('--to', dest='date_to', help='Конец периода включительно')
+        parser.add_argument(
+            '--type',
+            action='append',
+            dest='types',
+            help='event_type для логов или status для зачислений (можно несколько)'
+        )
+        parser.add_argument('--gzip', action='store_true', help='Сжимать на лету')
+        parser.add_argument('--chunk-size', type=int, default=ExportService.CHUNK_SIZE, help='Строк за одну выборку')
+        parser.add_argument('--output', '-o', help='Файл результата (по умолчанию stdout)')
+
+    def handle(self, *args, **options):
+        dataset = options['dataset']
+        try:
+            queryset = ExportService.get_queryset(
+                dataset,
+                course_ids=options['courses'],
+                date_from=options['date_from'],
+                date_to=options['date_to'],
+                types=options['types']
+            )
+        except ValidationError as e:
+            raise CommandError('; '.join(e.messages))
+
+        chunks = ExportService.stream(
+            dataset,
+            queryset,
+            options['export_format'],
+            compress=options['gzip'],
+            chunk_size=options['chunk_size']
+        )
+
+        output = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        written = 0
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+                written += len(chunk)
+        finally:
+            if options['output']:
+                output.close()
+            else:
+                output.flush()
+
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(f"Выгружено {written} байт в {options['output']}"))
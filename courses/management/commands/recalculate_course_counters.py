@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from courses.services.counters import CourseCountersService
+from courses.services.ratings import CourseRatingService
+
+
+class Command(BaseCommand):
+    help = 'Сверяет денормализованные счетчики курсов (уроки, длительность, рейтинг) с фактическими данными'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Размер пакета для bulk_update'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        fixed = CourseCountersService.recalculate_all(batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f'Исправлено счетчиков уроков: {fixed}'))
+
+        fixed = CourseRatingService.recalculate_all(batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f'Исправлено статистик рейтинга: {fixed}'))
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.18 on 2026-10-19 16:15
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def fill_rating_counters(apps, schema_editor):
+    """Заполняет счетчики рейтинга по существующим отзывам одним сгруппированным запросом"""
+    Course = apps.get_model('courses', 'Course')
+    Review = apps.get_model('courses', 'Review')
+
+    aggregates = {'total': Sum('rating')}
+    for star in range(1, 6):
+        aggregates[f'rating_{star}_count'] = Count('id', filter=Q(rating=star))
+
+    for row in Review.objects.order_by().values('course_id').annotate(**aggregates):
+        course_id = row.pop('course_id')
+        Course.objects.filter(pk=course_id).update(rating_sum=row.pop('total') or 0, **row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_alter_announcement_content_alter_course_description_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Оценок «1»'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Оценок «2»'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Оценок «3»'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Оценок «4»'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Оценок «5»'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, verbose_name='Сумма оценок'),
+        ),
+        migrations.RunPython(fill_rating_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.18 on 2026-10-19 16:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0003_course_rating_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='rank_score',
+            field=models.FloatField(default=0, help_text='Периодически пересчитывается задачей update_course_rank_scores', verbose_name='Оценка ранжирования'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['status', '-rank_score'], name='courses_cou_status_13bb4e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['category', 'status', '-rank_score'], name='courses_cou_categor_d0e7fa_idx'),
+        ),
+    ]
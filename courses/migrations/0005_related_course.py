@@ -0,0 +1,33 @@
+# Generated by Django 4.2.18 on 2026-10-19 16:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_course_rank_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedCourse',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='Позиция')),
+                ('score', models.FloatField(default=0, verbose_name='Степень похожести')),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата расчета')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_links', to='courses.course')),
+                ('related_course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.course')),
+            ],
+            options={
+                'verbose_name': 'Похожий курс',
+                'verbose_name_plural': 'Похожие курсы',
+                'ordering': ['course', 'rank'],
+                'indexes': [models.Index(fields=['course', 'rank'], name='courses_rel_course__db575d_idx')],
+                'unique_together': {('course', 'related_course')},
+            },
+        ),
+    ]
@@ -4,12 +4,12 @@ from django.core.validators import MinValueValidator, MaxValueValidator, FileExt
 from django.conf import settings
 from django_ckeditor_5.fields import CKEditor5Field
 from django.core.exceptions import ValidationError
-from django.db.models import Avg, Count, Q
+from django.db.models import Avg, Q
 from django.utils import timezone
 from django.urls import reverse
 from django.utils.text import slugify
-from django.core.cache import cache
 from accounts.models import User
+from core.identity_map import memoize
 from core.models import BaseModel
 
 def validate_video_url(value):
@@ -116,7 +116,7 @@ class Category(BaseModel):
         return Course.objects.filter(
             category__in=self.get_descendants(include_self=True),
             status='published'
-        ).order_by('-students_count')[:limit]
+        ).order_by('-rank_score')[:limit]
 
 class Tag(BaseModel):
     name = models.CharField('Название', max_length=50)
@@ -342,7 +342,18 @@ class Course(BaseModel):
         validators=[MinValueValidator(0), MaxValueValidator(5)],
         default=0
     )
+    rating_sum = models.PositiveIntegerField('Сумма оценок', default=0)
+    rating_1_count = models.PositiveIntegerField('Оценок «1»', default=0)
+    rating_2_count = models.PositiveIntegerField('Оценок «2»', default=0)
+    rating_3_count = models.PositiveIntegerField('Оценок «3»', default=0)
+    rating_4_count = models.PositiveIntegerField('Оценок «4»', default=0)
+    rating_5_count = models.PositiveIntegerField('Оценок «5»', default=0)
     total_lessons = models.PositiveIntegerField('Всего уроков', default=0)
+    rank_score = models.FloatField(
+        'Оценка ранжирования',
+        default=0,
+        help_text='Периодически пересчитывается задачей update_course_rank_scores'
+    )
     completion_rate = models.DecimalField(
         'Процент завершения',
         max_digits=5,
@@ -360,6 +371,8 @@ class Course(BaseModel):
             models.Index(fields=['-average_rating', '-students_count']),
             models.Index(fields=['price', 'category']),
             models.Index(fields=['published_at', 'status']),
+            models.Index(fields=['status', '-rank_score']),
+            models.Index(fields=['category', 'status', '-rank_score']),
         ]
 
     def __str__(self):
@@ -368,52 +381,27 @@ class Course(BaseModel):
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
-            
-        # Инвалидируем кеш при сохранении
-        cache_keys = [
-            f'course_details_{self.id}',
-            f'course_modules_{self.id}',
-            f'course_teachers_{self.id}',
-            f'course_analytics_{self.id}',
-        ]
-        cache.delete_many(cache_keys)
-        
+        # Кеш курса сбрасывается после коммита событием outbox (courses/events.py)
         super().save(*args, **kwargs)
 
     def get_absolute_url(self):
         """Получает URL курса"""
         return reverse('course_detail', kwargs={'slug': self.slug})
 
+    @memoize
     def get_primary_teacher(self):
-        """Возвращает основного преподавателя курса"""
-        cache_key = f'course_primary_teacher_{self.id}'
-        teacher = cache.get(cache_key)
-        
-        if teacher is None:
-            teacher = self.user_roles.filter(
-                role='teacher',
-                is_primary=True
-            ).select_related('user').first()
-            
-            if teacher:
-                cache.set(cache_key, teacher, 3600)  # кешируем на 1 час
-                
-        return teacher
-
+        """
+        Возвращает роль основного преподавателя курса.
+        Для списков курсов используйте TeacherLoader, чтобы загрузить всех сразу
+        """
+        from .services.teachers import TeacherLoader
+        return TeacherLoader().get_primary_teacher(self.id)
+
+    @memoize
     def get_teachers(self):
-        """Возвращает всех преподавателей курса"""
-        cache_key = f'course_teachers_{self.id}'
-        teachers = cache.get(cache_key)
-        
-        if teachers is None:
-            teachers = User.objects.filter(
-                course_roles__course=self,
-                course_roles__role='teacher'
-            ).distinct()
-            
-            cache.set(cache_key, list(teachers), 3600)  # кешируем на 1 час
-            
-        return teachers
+        """Возвращает список всех преподавателей курса"""
+        from .services.teachers import TeacherLoader
+        return TeacherLoader().get_teachers(self.id)
 
     def get_primary_producer(self):
         """Возвращает основного продюсера курса"""
@@ -459,30 +447,28 @@ class Course(BaseModel):
         ).delete()
 
     def get_total_lessons(self):
-        """Возвращает общее количество уроков"""
-        if self.total_lessons > 0:
-            return self.total_lessons
-            
-        self.total_lessons = sum(
-            module.lessons.count() 
-            for module in self.modules.all()
-        )
-        self.save(update_fields=['total_lessons'])
-        
+        """
+        Возвращает общее количество уроков.
+        Счетчик поддерживается сигналами Module/Lesson (courses/signals.py)
+        и сверяется командой recalculate_course_counters
+        """
         return self.total_lessons
 
     def update_rating_stats(self):
-        """Обновляет статистику рейтинга"""
-        from django.db.models import Avg, Count
-        
-        stats = self.reviews.aggregate(
-            avg_rating=Avg('rating'),
-            count=Count('id')
-        )
-        
-        self.average_rating = stats['avg_rating'] or 0
-        self.reviews_count = stats['count']
-        self.save(update_fields=['average_rating', 'reviews_count'])
+        """
+        Полностью пересчитывает статистику рейтинга по отзывам.
+        В обычном режиме статистика поддерживается инкрементально сигналами Review
+        """
+        from courses.services.ratings import CourseRatingService
+
+        CourseRatingService.recalculate(self)
+
+    def get_rating_distribution(self):
+        """Возвращает распределение оценок по звездам из сохраненных счетчиков"""
+        return {
+            str(star): getattr(self, f'rating_{star}_count')
+            for star in range(5, 0, -1)
+        }
 
     def update_student_stats(self):
         """Обновляет статистику студентов"""
@@ -496,7 +482,10 @@ class Course(BaseModel):
         self.save(update_fields=['students_count', 'completion_rate'])
 
     def is_ready_for_publication(self):
-        """Проверяет, готов ли курс к публикации"""
+        """
+        Проверяет, готов ли курс к публикации.
+        Для списка курсов используйте CoursePublicationService.get_errors
+        """
         return all([
             self.modules.exists(),  # есть хотя бы один модуль
             self.get_total_lessons() > 0,  # есть уроки
@@ -505,6 +494,46 @@ class Course(BaseModel):
             self.get_primary_teacher()  # есть основной преподаватель
         ])
 
+class RelatedCourse(models.Model):
+    """Предвычисленный список похожих курсов (заполняется задачей rebuild_related_courses)"""
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='related_links')
+    related_course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField('Позиция')
+    score = models.FloatField('Степень похожести', default=0)
+    computed_at = models.DateTimeField('Дата расчета', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Похожий курс'
+        verbose_name_plural = 'Похожие курсы'
+        ordering = ['course', 'rank']
+        unique_together = ['course', 'related_course']
+        indexes = [
+            models.Index(fields=['course', 'rank']),
+        ]
+
+    def __str__(self):
+        return f'{self.course} → {self.related_course} ({self.score:.3f})'
+
+class CourseRecommendation(models.Model):
+    """Персональные рекомендации курсов (заполняются задачей train_course_recommendations)"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='course_recommendations')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField('Позиция')
+    score = models.FloatField('Оценка', default=0)
+    computed_at = models.DateTimeField('Дата расчета', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Рекомендация курса'
+        verbose_name_plural = 'Рекомендации курсов'
+        ordering = ['user', 'rank']
+        unique_together = ['user', 'course']
+        indexes = [
+            models.Index(fields=['user', 'rank']),
+        ]
+
+    def __str__(self):
+        return f'{self.user} → {self.course} ({self.score:.3f})'
+
 class Module(BaseModel):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='modules')
     title = models.CharField('Название', max_length=200)
@@ -579,8 +608,8 @@ class Review(BaseModel):
         if not self.pk:
             self.created_at = timezone.now()
         self.updated_at = timezone.now()
+        # Статистику рейтинга курса обновляют сигналы (courses/signals.py)
         super().save(*args, **kwargs)
-        self.course.update_rating_stats()
 
 class Announcement(BaseModel):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='announcements')
@@ -1,4 +1,5 @@
 from rest_framework import permissions
+from .services.permissions import CoursePermissionService
 
 class IsTeacherOrReadOnly(permissions.BasePermission):
     """
@@ -23,11 +24,8 @@ class IsTeacherOrReadOnly(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
             
-        # Проверяем, является ли пользователь преподавателем курса
-        if hasattr(obj, 'course'):
-            course = obj.course
-        else:
-            course = obj
+        # Проверяем право редактирования по карте прав пользователя (без запроса на каждый курс)
+        course_id = get_course_id(obj)
             
         return (
             request.user and
@@ -36,7 +34,33 @@ class IsTeacherOrReadOnly(permissions.BasePermission):
                 request.user.role == 'producer' or
                 (
                     request.user.role == 'teacher' and
-                    course.get_primary_teacher() == request.user
+                    CoursePermissionService.has_permission(request.user, course_id, 'can_edit_content')
                 )
             )
         )
+
+
+class HasCoursePermission(permissions.BasePermission):
+    """
+    Доступ к объектам курса по праву из CourseUserRole.
+    Требуемое право задается атрибутом view.required_course_permission.
+    """
+
+    def has_object_permission(self, request, view, obj):
+        if request.user and request.user.is_staff:
+            return True
+
+        permission = getattr(view, 'required_course_permission', None)
+        if permission is None:
+            return True
+
+        return CoursePermissionService.has_permission(request.user, get_course_id(obj), permission)
+
+
+def get_course_id(obj):
+    """id курса для самого курса или связанного с ним объекта"""
+    if hasattr(obj, 'course_id'):
+        return obj.course_id
+    if hasattr(obj, 'module'):
+        return obj.module.course_id
+    return obj.pk
@@ -92,13 +92,7 @@ class CourseSerializer(serializers.ModelSerializer):
     def get_rating_stats(self, obj):
         """Получение статистики по рейтингам"""
         stats = {
-            'total_ratings': obj.reviews.count(),
-            'rating_distribution': {
-                '5': obj.reviews.filter(rating=5).count(),
-                '4': obj.reviews.filter(rating=4).count(),
-                '3': obj.reviews.filter(rating=3).count(),
-                '2': obj.reviews.filter(rating=2).count(),
-                '1': obj.reviews.filter(rating=1).count(),
-            }
+            'total_ratings': obj.reviews_count,
+            'rating_distribution': obj.get_rating_distribution()
         }
         return stats
@@ -1,9 +1,25 @@
 from .analytics import CourseAnalyticsService
+from .counters import CourseCountersService
 from .course_manager import CourseManager
 from .enrollment_manager import EnrollmentManager
+from .exports import ExportService
+from .permissions import CoursePermissionService
+from .ranking import CourseRankingService
+from .ratings import CourseRatingService
+from .recommendations import RecommendationService
+from .related import RelatedCoursesService
+from .teachers import TeacherLoader
 
 __all__ = [
     'CourseAnalyticsService',
+    'CourseCountersService',
     'CourseManager',
-    'EnrollmentManager'
+    'EnrollmentManager',
+    'ExportService',
+    'CoursePermissionService',
+    'CourseRankingService',
+    'CourseRatingService',
+    'RecommendationService',
+    'RelatedCoursesService',
+    'TeacherLoader'
 ]
@@ -1,7 +1,13 @@
-from django.db.models import Avg, Count, Sum, Q
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Avg, Count, F, Sum, Q
+from django.db.models.functions import Greatest, Least
 from django.core.cache import cache
 from django.utils import timezone
 from datetime import timedelta
+from core import outbox
+from courses.models import AnalyticsLog, CourseAnalytics
+from courses.services import live_analytics
 
 class CourseAnalyticsService:
     CACHE_PREFIX = 'course_analytics_'
@@ -133,10 +139,66 @@ class CourseAnalyticsService:
         return timezone.now() + timedelta(days=days_to_complete)
 
     @classmethod
-    def invalidate_cache(cls, course):
-        """Инвалидирует кеш для курса"""
-        cache_keys = [
-            cls.get_cache_key(course.id, 'avg_rating'),
-            cls.get_cache_key(course.id, 'statistics')
+    def get_cache_keys(cls, course_id):
+        return [
+            cls.get_cache_key(course_id, 'avg_rating'),
+            cls.get_cache_key(course_id, 'statistics')
         ]
-        cache.delete_many(cache_keys)
+
+    @classmethod
+    def invalidate_cache(cls, course):
+        """
+        Инвалидирует кеш для курса. При изменении курса, записей и отзывов
+        кеш сбрасывается после коммита обработчиками outbox (courses/events.py)
+        """
+        cache.delete_many(cls.get_cache_keys(course.id))
+
+    @classmethod
+    def record_event(cls, course, event_data, user=None):
+        """
+        Прием события аналитики (AnalyticsEventSerializer): запись в лог,
+        обновление агрегатов CourseAnalytics и дельта для живых дашбордов.
+        Агрегаты меняются одним UPDATE с F(): одновременные события разных
+        типов не затирают счетчики друг друга, сигналы post_save не посылаются
+        """
+        from courses.events import COURSE_ANALYTICS_CHANGED
+
+        event_type = event_data['event_type']
+
+        # Создаем запись в логе
+        AnalyticsLog.objects.create(
+            course=course,
+            event_type=event_type,
+            user=user,
+            # Decimal и datetime из сериализатора - в виде строк JSON
+            data=json.loads(json.dumps(event_data, cls=DjangoJSONEncoder))
+        )
+
+        # Обновляем агрегированные данные. В одном UPDATE F() ссылается
+        # на значения до изменения, поэтому производные поля считаются от новых
+        changes = {'updated_at': timezone.now()}
+        if event_type == 'view':
+            changes['views_count'] = F('views_count') + 1
+        elif event_type == 'complete':
+            changes['completion_count'] = F('completion_count') + 1
+            changes['completion_rate'] = Least(
+                (F('completion_count') + 1) * 100.0 / Greatest(F('views_count'), 1), 100
+            )
+        elif event_type == 'rate':
+            changes['total_ratings'] = F('total_ratings') + 1
+            changes['rating_sum'] = F('rating_sum') + event_data['rating']
+            changes['average_rating'] = (F('rating_sum') + event_data['rating']) * 1.0 / (F('total_ratings') + 1)
+        elif event_type == 'purchase':
+            changes['revenue'] = F('revenue') + event_data['amount']
+
+        analytics = CourseAnalytics.objects.filter(course=course)
+        if not analytics.update(**changes):
+            # Строка создается сигналом при создании курса; для старых курсов - здесь
+            CourseAnalytics.objects.get_or_create(course=course)
+            analytics.update(**changes)
+
+        # Кэш аналитики - одно событие outbox на прием
+        outbox.publish(COURSE_ANALYTICS_CHANGED, course_id=course.id)
+
+        # Дельта для открытых живых дашбордов (после коммита)
+        live_analytics.publish(course.id, live_analytics.event_delta(event_type, event_data))
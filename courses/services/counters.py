@@ -0,0 +1,95 @@
+from decimal import Decimal, ROUND_HALF_UP
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Greatest
+from courses.models import Course, Enrollment, Lesson
+
+
+class CourseCountersService:
+    """Сервис для поддержки денормализованных счетчиков курса (уроки и длительность)"""
+
+    @staticmethod
+    def apply_delta(course_filter, lessons=0, duration=0):
+        """
+        Атомарно изменяет total_lessons и duration курса через F()-выражения.
+        course_filter - параметры фильтра, например {'pk': 1} или {'modules': 5}
+        """
+        if not lessons and not duration:
+            return 0
+
+        updates = {}
+        if lessons:
+            updates['total_lessons'] = Greatest(F('total_lessons') + lessons, 0)
+        if duration:
+            updates['duration'] = Greatest(F('duration') + duration, 0)
+
+        # update() не вызывает Course.save, поэтому кеш курса не сбрасывается
+        return Course.objects.filter(**course_filter).update(**updates)
+
+    @classmethod
+    def apply_module_delta(cls, module_id, lessons=0, duration=0):
+        """Изменяет счетчики курса, которому принадлежит модуль"""
+        return cls.apply_delta({'modules': module_id}, lessons, duration)
+
+    @staticmethod
+    def get_module_totals(module_id):
+        """Возвращает количество уроков и суммарную длительность модуля"""
+        totals = Lesson.objects.filter(module_id=module_id).aggregate(
+            lessons=Count('id'),
+            duration=Sum('duration_minutes')
+        )
+        return totals['lessons'], totals['duration'] or 0
+
+    @staticmethod
+    def recalculate_all(batch_size=500):
+        """
+        Сверяет счетчики всех курсов с фактическими данными одним сгруппированным запросом.
+        Возвращает количество исправленных курсов.
+        """
+        totals = {
+            row['module__course_id']: (row['lessons'], row['duration'] or 0)
+            for row in Lesson.objects.order_by().values('module__course_id').annotate(
+                lessons=Count('id'),
+                duration=Sum('duration_minutes')
+            )
+        }
+
+        stale = []
+        for course in Course.objects.only('id', 'total_lessons', 'duration').iterator(chunk_size=batch_size):
+            lessons, duration = totals.get(course.id, (0, 0))
+            if course.total_lessons != lessons or course.duration != duration:
+                course.total_lessons = lessons
+                course.duration = duration
+                stale.append(course)
+
+        Course.objects.bulk_update(stale, ['total_lessons', 'duration'], batch_size=batch_size)
+        return len(stale)
+
+    @staticmethod
+    def recalculate_student_stats_all(batch_size=500):
+        """
+        Пересчитывает students_count и completion_rate всех курсов
+        одним сгруппированным запросом (как Course.update_student_stats для каждого курса).
+        Возвращает количество исправленных курсов.
+        """
+        totals = {
+            row['course_id']: (row['students'], row['completed'])
+            for row in Enrollment.objects.order_by().values('course_id').annotate(
+                students=Count('id'),
+                completed=Count('id', filter=Q(status='completed'))
+            )
+        }
+
+        stale = []
+        for course in Course.objects.only('id', 'students_count', 'completion_rate').iterator(chunk_size=batch_size):
+            students, completed = totals.get(course.id, (0, 0))
+            completion_rate = (
+                (Decimal(completed * 100) / students).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+                if students else Decimal('0')
+            )
+            if course.students_count != students or course.completion_rate != completion_rate:
+                course.students_count = students
+                course.completion_rate = completion_rate
+                stale.append(course)
+
+        Course.objects.bulk_update(stale, ['students_count', 'completion_rate'], batch_size=batch_size)
+        return len(stale)
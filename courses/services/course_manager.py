@@ -1,9 +1,11 @@
-from django.db import transaction
 from django.core.cache import cache
+from django.db import transaction
 from django.utils import timezone
 from django.conf import settings
-from courses.models import Course, Module, Lesson, CourseUserRole
-from courses.services.analytics import CourseAnalyticsService
+from courses.models import Category, Course, Module, Lesson, CourseUserRole, RelatedCourse
+from core import codec
+
+COURSE_SCHEMA = codec.ModelSchema(Course)
 
 class CourseManager:
     """Сервис для управления курсами"""
@@ -45,7 +47,6 @@ class CourseManager:
                 setattr(course, field, value)
         
         course.save()
-        CourseAnalyticsService.invalidate_cache(course)
         return course
 
     @staticmethod
@@ -113,9 +114,6 @@ class CourseManager:
         course.published_at = timezone.now()
         course.save()
         
-        # Инвалидируем кеш
-        CourseAnalyticsService.invalidate_cache(course)
-        
         return course
 
     @staticmethod
@@ -126,48 +124,60 @@ class CourseManager:
         course.archived_at = timezone.now()
         course.save()
         
-        # Инвалидируем кеш
-        CourseAnalyticsService.invalidate_cache(course)
-        
         return course
 
     @staticmethod
     def get_related_courses(course, limit=5):
-        """Получает похожие курсы"""
-        cache_key = f'related_courses_{course.id}'
-        related = cache.get(cache_key)
-        
-        if related is None:
-            # Получаем курсы из той же категории с похожими тегами
-            related = Course.objects.filter(
-                category=course.category,
-                status='published'
-            ).exclude(
-                id=course.id
-            ).annotate(
-                common_tags=Count('tags', filter=Q(tags__in=course.tags.all()))
-            ).order_by('-common_tags', '-average_rating')[:limit]
-            
-            cache.set(cache_key, list(related), 3600)  # кешируем на 1 час
-            
+        """
+        Получает похожие курсы из предвычисленной таблицы RelatedCourse
+        одним запросом по индексу (course, rank)
+        """
+        related = [
+            link.related_course
+            for link in RelatedCourse.objects.filter(
+                course=course,
+                related_course__status='published'
+            ).select_related('related_course').order_by('rank')[:limit]
+        ]
+
+        if not related:
+            # Для новых курсов до ближайшего пересчета показываем лучшие курсы категории
+            related = list(
+                Course.objects.filter(
+                    category_id=course.category_id,
+                    status='published'
+                ).exclude(id=course.id).order_by('-rank_score')[:limit]
+            )
+
         return related
 
+    @staticmethod
+    def get_popular_cache_key(category_id=None):
+        return f'popular_courses_{category_id or "all"}'
+
+    @staticmethod
+    def invalidate_popular_courses():
+        """Сбрасывает кэш популярных курсов: общий и по каждой категории"""
+        cache.delete_many([
+            CourseManager.get_popular_cache_key(category_id)
+            for category_id in [None, *Category.objects.values_list('id', flat=True)]
+        ])
+
     @staticmethod
     def get_popular_courses(category=None, limit=10):
-        """Получает популярные курсы"""
-        cache_key = f'popular_courses_{category.id if category else "all"}'
-        popular = cache.get(cache_key)
+        """Получает список популярных курсов"""
+        cache_key = CourseManager.get_popular_cache_key(category.id if category else None)
+        # Кортежи полей в msgpack вместо pickle моделей (core/codec.py)
+        popular = codec.cache_get(COURSE_SCHEMA, cache_key, many=True)
         
         if popular is None:
             courses = Course.objects.filter(status='published')
             if category:
                 courses = courses.filter(category=category)
                 
-            popular = courses.annotate(
-                student_count=Count('enrollments', distinct=True),
-                review_count=Count('reviews', distinct=True)
-            ).order_by('-student_count', '-average_rating')[:limit]
+            # Сортировка по индексированному rank_score вместо агрегации на каждый запрос
+            popular = list(courses.order_by('-rank_score')[:limit])
             
-            cache.set(cache_key, list(popular), 3600)  # кешируем на 1 час
+            codec.cache_set(COURSE_SCHEMA, cache_key, popular, 3600, many=True)  # кешируем на 1 час
             
         return popular
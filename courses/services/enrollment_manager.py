@@ -2,7 +2,6 @@ from django.db import transaction
 from django.core.cache import cache
 from django.utils import timezone
 from courses.models import Course, Enrollment
-from courses.services.analytics import CourseAnalyticsService
 
 class EnrollmentManager:
     """Сервис для управления записями на курсы"""
@@ -27,9 +26,6 @@ class EnrollmentManager:
         if payment_data:
             enrollment = EnrollmentManager.process_payment(enrollment, payment_data)
             
-        # Инвалидируем кеш статистики курса
-        CourseAnalyticsService.invalidate_cache(course)
-        
         return enrollment
 
     @staticmethod
@@ -79,9 +75,6 @@ class EnrollmentManager:
             enrollment.completed_at = timezone.now()
             enrollment.save()
             
-        # Инвалидируем кеш
-        CourseAnalyticsService.invalidate_cache(enrollment.course)
-        
         return enrollment
 
     @staticmethod
@@ -114,10 +107,6 @@ class EnrollmentManager:
         enrollment.cancellation_reason = reason
         enrollment.cancelled_at = timezone.now()
         enrollment.save()
-        
-        # Инвалидируем кеш
-        CourseAnalyticsService.invalidate_cache(enrollment.course)
-        
         return enrollment
 
     @staticmethod
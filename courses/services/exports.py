@@ -0,0 +1,141 @@
+import csv
+import json
+import zlib
+from datetime import datetime, time as dt_time
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from courses.models import AnalyticsLog, Enrollment
+
+
+class _Echo:
+    """Буфер для csv.writer: возвращает строку вместо записи"""
+
+    def write(self, value):
+        return value
+
+
+class ExportService:
+    """
+    Потоковая выгрузка логов аналитики и зачислений в CSV или JSONL.
+    Строки читаются через values_list().iterator(chunk_size) и собираются
+    в куски по CHUNK_BYTES, поэтому память не зависит от числа строк.
+    """
+
+    DATASETS = {
+        'analytics-logs': {
+            'model': AnalyticsLog,
+            'fields': ('id', 'course_id', 'course__slug', 'event_type', 'user_id', 'timestamp', 'data'),
+            'date_field': 'timestamp',
+            'type_field': 'event_type',
+            'permission': 'can_view_analytics',
+        },
+        'enrollments': {
+            'model': Enrollment,
+            'fields': (
+                'id', 'course_id', 'course__slug', 'student_id', 'student__email', 'status',
+                'progress', 'enrolled_at', 'completed_at', 'last_accessed'
+            ),
+            'date_field': 'enrolled_at',
+            'type_field': 'status',
+            'permission': 'can_manage_students',
+        },
+    }
+
+    FORMATS = {
+        'csv': 'text/csv',
+        'jsonl': 'application/x-ndjson',
+    }
+
+    CHUNK_SIZE = 2000
+    CHUNK_BYTES = 64 * 1024
+
+    @classmethod
+    def get_dataset(cls, name):
+        if name not in cls.DATASETS:
+            raise ValidationError(f'Неизвестный набор данных: {name}')
+        return cls.DATASETS[name]
+
+    @staticmethod
+    def parse_date_bound(value, end=False):
+        """Дата или дата-время из ISO-строки; конец дня для end=True"""
+        if not value:
+            return None
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValidationError(f'Некорректная дата: {value}')
+            parsed = datetime.combine(day, dt_time.max if end else dt_time.min)
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+    @classmethod
+    def get_queryset(cls, dataset, course_ids=None, date_from=None, date_to=None, types=None):
+        """
+        Queryset выгрузки с фильтрами. course_ids=None - все курсы,
+        types - значения event_type (логи) или status (зачисления)
+        """
+        spec = cls.get_dataset(dataset)
+        queryset = spec['model'].objects.all()
+        if course_ids is not None:
+            queryset = queryset.filter(course_id__in=course_ids)
+        if date_from:
+            queryset = queryset.filter(**{f"{spec['date_field']}__gte": cls.parse_date_bound(date_from)})
+        if date_to:
+            queryset = queryset.filter(**{f"{spec['date_field']}__lte": cls.parse_date_bound(date_to, end=True)})
+        if types:
+            queryset = queryset.filter(**{f"{spec['type_field']}__in": types})
+        return queryset.order_by('id').values_list(*spec['fields'])
+
+    @classmethod
+    def _encode_csv(cls, fields, rows):
+        writer = csv.writer(_Echo())
+        yield writer.writerow(fields)
+        for row in rows:
+            yield writer.writerow([
+                json.dumps(value, ensure_ascii=False) if isinstance(value, (dict, list)) else
+                value.isoformat() if isinstance(value, datetime) else value
+                for value in row
+            ])
+
+    @classmethod
+    def _encode_jsonl(cls, fields, rows):
+        encoder = DjangoJSONEncoder(ensure_ascii=False)
+        for row in rows:
+            yield encoder.encode(dict(zip(fields, row))) + '\n'
+
+    @classmethod
+    def stream(cls, dataset, queryset, export_format='csv', compress=False, chunk_size=None):
+        """Генератор байтовых кусков выгрузки (при compress=True - gzip)"""
+        if export_format not in cls.FORMATS:
+            raise ValidationError(f'Неизвестный формат: {export_format}')
+        fields = cls.get_dataset(dataset)['fields']
+        rows = queryset.iterator(chunk_size=chunk_size or cls.CHUNK_SIZE)
+        lines = cls._encode_csv(fields, rows) if export_format == 'csv' else cls._encode_jsonl(fields, rows)
+
+        compressor = zlib.compressobj(wbits=31) if compress else None
+        buffer, size = [], 0
+        for line in lines:
+            buffer.append(line)
+            size += len(line)
+            if size >= cls.CHUNK_BYTES:
+                chunk = ''.join(buffer).encode()
+                buffer, size = [], 0
+                chunk = compressor.compress(chunk) if compressor else chunk
+                if chunk:
+                    yield chunk
+
+        chunk = ''.join(buffer).encode()
+        if compressor:
+            chunk = compressor.compress(chunk) + compressor.flush()
+        if chunk:
+            yield chunk
+
+    @classmethod
+    def get_filename(cls, dataset, export_format, compress=False):
+        name = f"{dataset}-{timezone.now():%Y%m%d-%H%M%S}.{export_format}"
+        return f'{name}.gz' if compress else name
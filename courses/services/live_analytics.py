@@ -0,0 +1,286 @@
+"""
+Живая аналитика курсов для дашбордов (Server-Sent Events).
+
+Путь приема событий публикует дельты счетчиков (просмотры, завершения,
+доход, оценки) в канал Redis pub/sub курса после коммита транзакции.
+В каждом процессе ASGI-воркера один LiveAnalyticsHub держит одно
+соединение pub/sub, подписывается только на курсы, которые сейчас кто-то
+смотрит, склеивает дельты и раздает их подписчикам не чаще раза
+в COALESCE_SECONDS. Подписчик - корутина, а не поток, поэтому
+тысячи открытых потоков стоят только памяти.
+
+Без LIVE_ANALYTICS['REDIS_URL'] дельты передаются внутри процесса
+(разработка и тесты).
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'REDIS_URL': None,
+    'CHANNEL_PREFIX': 'ustat:course_analytics:',
+    'COALESCE_SECONDS': 1.0,
+    'KEEPALIVE_SECONDS': 15,
+    # Поток закрывается по таймауту, EventSource переподключается сам
+    # и получает свежий снимок. Так не копятся подписчики отвалившихся клиентов
+    'MAX_STREAM_SECONDS': 300,
+    'RETRY_MS': 3000,
+}
+
+# Счетчики дельты; revenue - Decimal, остальные - целые
+COUNTERS = ('views', 'completions', 'revenue', 'ratings', 'rating_sum')
+
+live_analytics_subscribers = Gauge(
+    'live_analytics_subscribers',
+    'Number of open live analytics streams in this process'
+)
+
+live_analytics_messages_total = Counter(
+    'live_analytics_messages_total',
+    'Total number of coalesced live analytics messages sent to subscribers'
+)
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'LIVE_ANALYTICS', {})}
+
+
+def get_channel(course_id):
+    return f"{get_config()['CHANNEL_PREFIX']}{course_id}"
+
+
+def event_delta(event_type, data=None):
+    """Дельта счетчиков для события аналитики (AnalyticsEventSerializer)"""
+    data = data or {}
+    if event_type == 'view':
+        return {'views': 1}
+    if event_type == 'complete':
+        return {'completions': 1}
+    if event_type == 'rate':
+        return {'ratings': 1, 'rating_sum': data['rating']}
+    if event_type == 'purchase':
+        return {'revenue': Decimal(str(data['amount']))}
+    return {}
+
+
+def merge_delta(target, delta):
+    """Прибавляет дельту к накопленной (target изменяется)"""
+    for name in COUNTERS:
+        value = delta.get(name)
+        if value:
+            if name == 'revenue':
+                value = Decimal(str(value))
+            target[name] = target.get(name, 0) + value
+    return target
+
+
+def encode_delta(delta):
+    return json.dumps(delta, cls=DjangoJSONEncoder)
+
+
+def decode_delta(payload):
+    return merge_delta({}, json.loads(payload))
+
+
+_redis_client = None
+
+
+def _get_redis():
+    global _redis_client
+    url = get_config()['REDIS_URL']
+    if not url:
+        return None
+    if _redis_client is None:
+        import redis
+        _redis_client = redis.Redis.from_url(url)
+    return _redis_client
+
+
+def _publish_now(course_id, payload):
+    client = _get_redis()
+    if client is None:
+        hub = _hub
+        if hub is not None and not hub.loop.is_closed():
+            hub.loop.call_soon_threadsafe(hub.dispatch, course_id, decode_delta(payload))
+        return
+
+    import redis
+    try:
+        client.publish(get_channel(course_id), payload)
+    except redis.RedisError:
+        # Живой дашборд не должен ломать прием событий
+        logger.warning(f"Failed to publish live analytics for course {course_id}", exc_info=True)
+
+
+def publish(course_id, delta):
+    """Публикует дельту счетчиков курса после коммита текущей транзакции"""
+    if not delta:
+        return
+    payload = encode_delta(delta)
+    transaction.on_commit(lambda: _publish_now(course_id, payload))
+
+
+class Subscription:
+    """Подписчик потока курса: копит дельты, пока клиент их не заберет"""
+
+    def __init__(self, course_id):
+        self.course_id = course_id
+        self.pending = {}
+        self.ready = asyncio.Event()
+
+    def push(self, delta):
+        merge_delta(self.pending, delta)
+        self.ready.set()
+
+    async def get(self, timeout):
+        """Накопленная дельта или None, если за timeout ничего не пришло"""
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self.ready.clear()
+        delta, self.pending = self.pending, {}
+        return delta
+
+
+class LiveAnalyticsHub:
+    """
+    Раздача дельт подписчикам в одном event loop. Дельты курса копятся
+    и рассылаются одним сообщением не чаще раза в interval секунд.
+    """
+
+    def __init__(self, loop, redis_url=None, interval=1.0):
+        self.loop = loop
+        self.redis_url = redis_url
+        self.interval = interval
+        self.subscribers = defaultdict(set)
+        self.pending = {}
+        self.last_flush = {}
+        self.flush_handles = {}
+        self.pubsub = None
+        self.reader = None
+
+    async def subscribe(self, course_id):
+        subscription = Subscription(course_id)
+        first = course_id not in self.subscribers
+        self.subscribers[course_id].add(subscription)
+        live_analytics_subscribers.inc()
+        if first and self.redis_url:
+            await self._redis_subscribe(course_id)
+        return subscription
+
+    async def unsubscribe(self, subscription):
+        course_id = subscription.course_id
+        subscriptions = self.subscribers.get(course_id)
+        if not subscriptions or subscription not in subscriptions:
+            return
+        subscriptions.discard(subscription)
+        live_analytics_subscribers.dec()
+        if subscriptions:
+            return
+
+        del self.subscribers[course_id]
+        self.pending.pop(course_id, None)
+        self.last_flush.pop(course_id, None)
+        handle = self.flush_handles.pop(course_id, None)
+        if handle is not None:
+            handle.cancel()
+        if self.pubsub is not None:
+            await self.pubsub.unsubscribe(get_channel(course_id))
+
+    def dispatch(self, course_id, delta):
+        """Принимает дельту курса и планирует рассылку"""
+        if course_id not in self.subscribers:
+            return
+        merge_delta(self.pending.setdefault(course_id, {}), delta)
+        if course_id in self.flush_handles:
+            return
+        delay = max(0.0, self.last_flush.get(course_id, float('-inf')) + self.interval - self.loop.time())
+        self.flush_handles[course_id] = self.loop.call_later(delay, self._flush, course_id)
+
+    def _flush(self, course_id):
+        self.flush_handles.pop(course_id, None)
+        delta = self.pending.pop(course_id, None)
+        if not delta:
+            return
+        self.last_flush[course_id] = self.loop.time()
+        for subscription in self.subscribers.get(course_id, ()):
+            subscription.push(delta)
+
+    async def _redis_subscribe(self, course_id):
+        if self.pubsub is None:
+            import redis.asyncio as aioredis
+            self.pubsub = aioredis.from_url(self.redis_url).pubsub(ignore_subscribe_messages=True)
+        await self.pubsub.subscribe(get_channel(course_id))
+        if self.reader is None or self.reader.done():
+            self.reader = asyncio.create_task(self._read())
+
+    async def _read(self):
+        import redis
+        prefix = get_config()['CHANNEL_PREFIX']
+        while self.subscribers:
+            try:
+                message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except redis.RedisError:
+                logger.warning("Live analytics pub/sub connection failed, retrying", exc_info=True)
+                await asyncio.sleep(1)
+                continue
+            if message is None:
+                continue
+            try:
+                course_id = int(message['channel'].decode()[len(prefix):])
+                self.dispatch(course_id, decode_delta(message['data']))
+            except (ValueError, TypeError):
+                logger.warning(f"Invalid live analytics message: {message!r}")
+
+
+_hub = None
+
+
+def get_hub():
+    """Хаб текущего event loop (один на процесс ASGI-воркера)"""
+    global _hub
+    loop = asyncio.get_running_loop()
+    if _hub is None or _hub.loop is not loop:
+        config = get_config()
+        _hub = LiveAnalyticsHub(loop, redis_url=config['REDIS_URL'], interval=config['COALESCE_SECONDS'])
+    return _hub
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+
+async def stream(course_id, load_snapshot):
+    """
+    Поток SSE: снимок счетчиков (event: snapshot), затем склеенные
+    дельты (event: delta) и комментарии keepalive
+    """
+    config = get_config()
+    hub = get_hub()
+    loop = asyncio.get_running_loop()
+    # Подписка до чтения снимка: событие не потеряется между ними
+    subscription = await hub.subscribe(course_id)
+    try:
+        snapshot = await load_snapshot()
+        yield f"retry: {config['RETRY_MS']}\n" + format_event('snapshot', snapshot)
+
+        deadline = loop.time() + config['MAX_STREAM_SECONDS']
+        while (remaining := deadline - loop.time()) > 0:
+            delta = await subscription.get(timeout=min(config['KEEPALIVE_SECONDS'], remaining))
+            if delta is None:
+                yield ': keepalive\n\n'
+                continue
+            live_analytics_messages_total.inc()
+            yield format_event('delta', {'course': course_id, **delta})
+    finally:
+        await hub.unsubscribe(subscription)
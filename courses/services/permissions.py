@@ -0,0 +1,99 @@
+import time
+from django.core.cache import cache
+from courses.models import CourseUserRole
+
+
+class CoursePermissionService:
+    """
+    Сервис для проверки прав пользователя в курсах.
+    Все роли пользователя загружаются одним запросом в компактную карту
+    {course_id: битовая маска прав}, которая кэшируется с версией
+    и запоминается на объекте пользователя на время запроса.
+    """
+
+    CACHE_PREFIX = 'course_permissions_'
+    CACHE_TIMEOUT = 3600
+
+    # Порядок битов менять нельзя: маски хранятся в кэше
+    PERMISSIONS = (
+        'can_edit_content',
+        'can_manage_students',
+        'can_view_analytics',
+        'can_manage_teachers',
+        'can_manage_pricing',
+        'can_manage_marketing',
+    )
+    BITS = {permission: 1 << index for index, permission in enumerate(PERMISSIONS)}
+
+    @classmethod
+    def encode(cls, permissions):
+        """Переводит словарь прав роли в битовую маску"""
+        mask = 0
+        for permission, allowed in permissions.items():
+            if allowed and permission in cls.BITS:
+                mask |= cls.BITS[permission]
+        return mask
+
+    @classmethod
+    def decode(cls, mask):
+        """Список прав, закодированных в маске"""
+        return [permission for permission in cls.PERMISSIONS if mask & cls.BITS[permission]]
+
+    @classmethod
+    def _version_key(cls, user_id):
+        return f'{cls.CACHE_PREFIX}version_{user_id}'
+
+    @classmethod
+    def get_cache_key(cls, user_id):
+        version = cache.get_or_set(cls._version_key(user_id), 0, None)
+        return f'{cls.CACHE_PREFIX}{user_id}_{version}'
+
+    @classmethod
+    def invalidate(cls, user_id):
+        """Меняет версию карты прав: старые записи в кэше больше не читаются"""
+        cache.set(cls._version_key(user_id), time.time_ns(), None)
+
+    @classmethod
+    def build_permission_map(cls, user_id):
+        """Строит карту прав одним запросом ко всем ролям пользователя"""
+        permission_map = {}
+        for course_id, permissions in CourseUserRole.objects.filter(
+            user_id=user_id
+        ).values_list('course_id', 'permissions'):
+            # У пользователя может быть несколько ролей в одном курсе - права объединяются
+            permission_map[course_id] = permission_map.get(course_id, 0) | cls.encode(permissions or {})
+        return permission_map
+
+    @classmethod
+    def get_permission_map(cls, user):
+        """Возвращает карту прав пользователя {course_id: маска}"""
+        if not user or not user.is_authenticated:
+            return {}
+
+        # Карта запоминается на объекте пользователя, который живет один запрос
+        permission_map = getattr(user, '_course_permission_map', None)
+        if permission_map is not None:
+            return permission_map
+
+        cache_key = cls.get_cache_key(user.id)
+        permission_map = cache.get(cache_key)
+        if permission_map is None:
+            permission_map = cls.build_permission_map(user.id)
+            cache.set(cache_key, permission_map, cls.CACHE_TIMEOUT)
+
+        user._course_permission_map = permission_map
+        return permission_map
+
+    @classmethod
+    def has_permission(cls, user, course_id, permission):
+        """Проверяет право пользователя в курсе за O(1)"""
+        return bool(cls.get_permission_map(user).get(course_id, 0) & cls.BITS[permission])
+
+    @classmethod
+    def get_course_ids(cls, user, permission=None):
+        """Курсы, в которых у пользователя есть роль (или конкретное право)"""
+        permission_map = cls.get_permission_map(user)
+        if permission is None:
+            return list(permission_map)
+        bit = cls.BITS[permission]
+        return [course_id for course_id, mask in permission_map.items() if mask & bit]
@@ -0,0 +1,110 @@
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from core import identity_map, outbox
+from courses import events
+from courses.models import Course, Module
+from courses.services.teachers import TeacherLoader
+
+
+class CoursePublicationService:
+    """
+    Пакетная проверка готовности и публикация курсов.
+    Для списка курсов делает один запрос к курсам (наличие модулей - EXISTS,
+    уроки - счетчик total_lessons), загружает основных преподавателей через
+    TeacherLoader и публикует прошедшие проверку одним bulk_update.
+    bulk_update не посылает сигналов, поэтому события изменения курсов
+    пишутся в outbox одной пачкой, и кэш сбрасывается одним delete_many.
+    """
+
+    MAX_BATCH_SIZE = 500
+
+    # Причины отказа: код - сообщение
+    REASONS = {
+        'not_found': 'Курс не найден',
+        'already_published': 'Курс уже опубликован',
+        'no_modules': 'Нет ни одного модуля',
+        'no_lessons': 'Нет уроков',
+        'no_cover': 'Нет обложки',
+        'no_description': 'Нет описания',
+        'no_primary_teacher': 'Нет основного преподавателя',
+    }
+
+    FIELDS = ['id', 'status', 'total_lessons', 'cover_image', 'description', 'category_id', 'published_at']
+
+    @staticmethod
+    def get_queryset(course_ids):
+        return Course.objects.filter(pk__in=course_ids).annotate(
+            has_modules=Exists(Module.objects.filter(course_id=OuterRef('pk')))
+        ).only(*CoursePublicationService.FIELDS)
+
+    @classmethod
+    def get_errors(cls, course_ids, courses=None):
+        """
+        {course_id: список кодов причин} для каждого курса из списка,
+        пустой список - курс готов к публикации
+        """
+        course_ids = list(dict.fromkeys(course_ids))
+        if courses is None:
+            courses = cls.get_queryset(course_ids).in_bulk()
+        teachers = TeacherLoader().load_primary_teachers([pk for pk in course_ids if pk in courses])
+
+        errors = {}
+        for course_id in course_ids:
+            course = courses.get(course_id)
+            if course is None:
+                errors[course_id] = ['not_found']
+                continue
+
+            reasons = []
+            if course.status == 'published':
+                reasons.append('already_published')
+            if not course.has_modules:
+                reasons.append('no_modules')
+            if course.total_lessons <= 0:
+                reasons.append('no_lessons')
+            if not course.cover_image:
+                reasons.append('no_cover')
+            if not course.description:
+                reasons.append('no_description')
+            if teachers[course_id] is None:
+                reasons.append('no_primary_teacher')
+            errors[course_id] = reasons
+        return errors
+
+    @classmethod
+    def publish(cls, course_ids, dry_run=False):
+        """
+        Публикует готовые курсы из списка.
+        Возвращает {'published': [id], 'failed': {id: [коды причин]}}
+        """
+        with transaction.atomic():
+            # Блокируем курсы, чтобы проверка и публикация видели одно состояние
+            courses = cls.get_queryset(course_ids)
+            if not dry_run:
+                courses = courses.select_for_update(of=('self',))
+            courses = courses.in_bulk()
+
+            errors = cls.get_errors(course_ids, courses)
+            ready = [courses[course_id] for course_id, reasons in errors.items() if not reasons]
+
+            if ready and not dry_run:
+                now = timezone.now()
+                for course in ready:
+                    course.status = 'published'
+                    course.published_at = now
+                    # bulk_update не вызывает save(), auto_now не срабатывает
+                    course.updated_at = now
+                Course.objects.bulk_update(ready, ['status', 'published_at', 'updated_at'])
+
+                # Сигналы не отправлялись: загруженные в запросе курсы устарели
+                identity_map.clear()
+                outbox.publish_many(events.COURSE_CHANGED, [
+                    {'course_id': course.pk, 'category_ids': [course.category_id]}
+                    for course in ready
+                ])
+
+        return {
+            'published': [course.pk for course in ready],
+            'failed': {course_id: reasons for course_id, reasons in errors.items() if reasons},
+        }
@@ -0,0 +1,140 @@
+import numpy as np
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from courses.models import Course, Enrollment
+
+
+class CourseRankingService:
+    """
+    Сервис для пакетного расчета rank_score курсов.
+    Оценка смешивает байесовски сглаженный рейтинг, затухающую во времени
+    скорость записей на курс и сглаженный процент завершения.
+    """
+
+    DEFAULTS = {
+        'PRIOR_REVIEWS': 10,          # вес априорного среднего рейтинга (в отзывах)
+        'PRIOR_ENROLLMENTS': 20,      # вес априорного процента завершения (в записях)
+        'HALF_LIFE_DAYS': 14,         # период полураспада скорости записей
+        'WINDOW_DAYS': 90,            # окно, за которое учитываются записи
+        'RATING_WEIGHT': 0.5,
+        'VELOCITY_WEIGHT': 0.35,
+        'COMPLETION_WEIGHT': 0.15,
+    }
+
+    @classmethod
+    def get_config(cls):
+        return {**cls.DEFAULTS, **getattr(settings, 'COURSE_RANKING', {})}
+
+    @staticmethod
+    def bayesian_rating(rating_sum, reviews_count, prior_weight):
+        """Байесовское среднее: рейтинг курса стягивается к глобальному среднему"""
+        total_reviews = reviews_count.sum()
+        global_mean = rating_sum.sum() / total_reviews if total_reviews else 0.0
+        return (prior_weight * global_mean + rating_sum) / (prior_weight + reviews_count)
+
+    @staticmethod
+    def smoothed_completion(completed, enrolled, prior_weight):
+        """Процент завершения, сглаженный к глобальному значению"""
+        total = enrolled.sum()
+        global_rate = completed.sum() / total if total else 0.0
+        return (prior_weight * global_rate + completed) / (prior_weight + enrolled)
+
+    @staticmethod
+    def decayed_velocity(index, bucket_course_ids, bucket_ages, bucket_counts, half_life_days, size):
+        """Сумма записей по дням с экспоненциальным затуханием по возрасту"""
+        velocity = np.zeros(size)
+        if not len(bucket_counts):
+            return velocity
+
+        weights = bucket_counts * np.power(0.5, bucket_ages / half_life_days)
+        positions = np.searchsorted(index, bucket_course_ids)
+        np.add.at(velocity, positions, weights)
+        return velocity
+
+    @classmethod
+    def compute_scores(cls, now=None):
+        """
+        Вычисляет rank_score для всех курсов векторно.
+        Возвращает пару (массив id курсов, массив оценок).
+        """
+        config = cls.get_config()
+        now = now or timezone.now()
+
+        courses = np.array(
+            list(Course.objects.order_by('id').values_list('id', 'rating_sum', 'reviews_count')),
+            dtype=float
+        ).reshape(-1, 3)
+        if not len(courses):
+            return np.array([], dtype=np.int64), np.array([])
+
+        ids = courses[:, 0].astype(np.int64)
+        size = len(ids)
+
+        rating = cls.bayesian_rating(courses[:, 1], courses[:, 2], config['PRIOR_REVIEWS']) / 5.0
+
+        # Записи по курсам и дням за окно - один сгруппированный запрос
+        since = now - timedelta(days=config['WINDOW_DAYS'])
+        buckets = np.array(
+            list(
+                Enrollment.objects.filter(enrolled_at__gte=since)
+                .annotate(day=TruncDate('enrolled_at'))
+                .order_by()
+                .values_list('course_id', 'day')
+                .annotate(total=Count('id'))
+            ),
+            dtype=object
+        ).reshape(-1, 3)
+        if len(buckets):
+            today = now.date()
+            ages = np.array([(today - day).days for day in buckets[:, 1]], dtype=float)
+            velocity = cls.decayed_velocity(
+                ids,
+                buckets[:, 0].astype(np.int64),
+                np.clip(ages, 0, None),
+                buckets[:, 2].astype(float),
+                config['HALF_LIFE_DAYS'],
+                size
+            )
+        else:
+            velocity = np.zeros(size)
+        peak = np.log1p(velocity).max()
+        velocity = np.log1p(velocity) / peak if peak > 0 else velocity
+
+        # Завершения по курсам - один сгруппированный запрос
+        enrolled = np.zeros(size)
+        completed = np.zeros(size)
+        totals = np.array(
+            list(
+                Enrollment.objects.order_by().values_list('course_id').annotate(
+                    total=Count('id'),
+                    completed=Count('id', filter=Q(status='completed'))
+                )
+            ),
+            dtype=np.int64
+        ).reshape(-1, 3)
+        if len(totals):
+            positions = np.searchsorted(ids, totals[:, 0])
+            enrolled[positions] = totals[:, 1]
+            completed[positions] = totals[:, 2]
+        completion = cls.smoothed_completion(completed, enrolled, config['PRIOR_ENROLLMENTS'])
+
+        scores = (
+            config['RATING_WEIGHT'] * rating
+            + config['VELOCITY_WEIGHT'] * velocity
+            + config['COMPLETION_WEIGHT'] * completion
+        )
+        return ids, np.round(scores, 6)
+
+    @classmethod
+    def update_scores(cls, batch_size=1000, now=None):
+        """Пересчитывает и сохраняет rank_score всех курсов. Возвращает количество обновленных курсов"""
+        ids, scores = cls.compute_scores(now=now)
+        courses = [
+            Course(id=int(course_id), rank_score=float(score))
+            for course_id, score in zip(ids, scores)
+        ]
+        Course.objects.bulk_update(courses, ['rank_score'], batch_size=batch_size)
+        return len(courses)
@@ -0,0 +1,139 @@
+from decimal import Decimal, ROUND_HALF_UP
+from django.db.models import Count, DecimalField, F, FloatField, Q, Sum, Value
+from django.db.models.functions import Cast, Coalesce, Greatest, NullIf, Round
+from courses.models import Course, Review
+
+
+class CourseRatingService:
+    """Сервис для инкрементального поддержания статистики рейтинга курса"""
+
+    STARS = range(1, 6)
+
+    @staticmethod
+    def star_field(rating):
+        """Имя поля-счетчика для конкретной оценки"""
+        return f'rating_{rating}_count'
+
+    @classmethod
+    def apply_delta(cls, course_id, count=0, rating_sum=0, stars=None):
+        """
+        Применяет O(1)-изменение к статистике рейтинга курса одним UPDATE.
+        stars - словарь {оценка: изменение количества}
+        """
+        updates = {}
+        if count:
+            updates['reviews_count'] = Greatest(F('reviews_count') + count, 0)
+        if rating_sum:
+            updates['rating_sum'] = Greatest(F('rating_sum') + rating_sum, 0)
+        for star, delta in (stars or {}).items():
+            if delta:
+                field = cls.star_field(star)
+                updates[field] = Greatest(F(field) + delta, 0)
+
+        if not updates:
+            return 0
+
+        # Средний рейтинг вычисляется из значений до обновления плюс те же дельты,
+        # так что строка курса обновляется атомарно без повторной агрегации отзывов
+        average = Coalesce(
+            Cast(F('rating_sum') + rating_sum, FloatField()) / NullIf(F('reviews_count') + count, 0),
+            Value(0.0)
+        )
+        updates['average_rating'] = Cast(
+            Round(average, 2),
+            DecimalField(max_digits=3, decimal_places=2)
+        )
+
+        return Course.objects.filter(pk=course_id).update(**updates)
+
+    @classmethod
+    def on_review_created(cls, review):
+        cls.apply_delta(
+            review.course_id,
+            count=1,
+            rating_sum=review.rating,
+            stars={review.rating: 1}
+        )
+
+    @classmethod
+    def on_review_deleted(cls, review):
+        cls.apply_delta(
+            review.course_id,
+            count=-1,
+            rating_sum=-review.rating,
+            stars={review.rating: -1}
+        )
+
+    @classmethod
+    def on_review_changed(cls, review, old_course_id, old_rating):
+        """Применяет разницу при изменении оценки или переносе отзыва в другой курс"""
+        if old_course_id != review.course_id:
+            cls.apply_delta(old_course_id, count=-1, rating_sum=-old_rating, stars={old_rating: -1})
+            cls.on_review_created(review)
+        elif old_rating != review.rating:
+            cls.apply_delta(
+                review.course_id,
+                rating_sum=review.rating - old_rating,
+                stars={old_rating: -1, review.rating: 1}
+            )
+
+    @classmethod
+    def _aggregate_kwargs(cls):
+        kwargs = {
+            'reviews_count': Count('id'),
+            'rating_sum': Sum('rating'),
+        }
+        for star in cls.STARS:
+            kwargs[cls.star_field(star)] = Count('id', filter=Q(rating=star))
+        return kwargs
+
+    @classmethod
+    def _stats_from_row(cls, row):
+        count = row.get('reviews_count') or 0
+        rating_sum = row.get('rating_sum') or 0
+        stats = {
+            'reviews_count': count,
+            'rating_sum': rating_sum,
+            'average_rating': (
+                (Decimal(rating_sum) / count).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+                if count else Decimal('0')
+            ),
+        }
+        for star in cls.STARS:
+            field = cls.star_field(star)
+            stats[field] = row.get(field) or 0
+        return stats
+
+    @classmethod
+    def recalculate(cls, course):
+        """Полностью пересчитывает статистику одного курса одним агрегирующим запросом"""
+        row = Review.objects.filter(course=course).aggregate(**cls._aggregate_kwargs())
+        stats = cls._stats_from_row(row)
+
+        Course.objects.filter(pk=course.pk).update(**stats)
+        for field, value in stats.items():
+            setattr(course, field, value)
+        return stats
+
+    @classmethod
+    def recalculate_all(cls, batch_size=500):
+        """
+        Сверяет статистику рейтинга всех курсов одним сгруппированным запросом.
+        Возвращает количество исправленных курсов.
+        """
+        rows = {
+            row['course_id']: row
+            for row in Review.objects.order_by().values('course_id').annotate(**cls._aggregate_kwargs())
+        }
+        fields = list(cls._stats_from_row({}).keys())
+
+        stale = []
+        for course in Course.objects.only('id', *fields).iterator(chunk_size=batch_size):
+            stats = cls._stats_from_row(rows.get(course.id, {}))
+            if any(getattr(course, field) != value for field, value in stats.items()):
+                for field, value in stats.items():
+                    setattr(course, field, value)
+                stale.append(course)
+
+        Course.objects.bulk_update(stale, fields, batch_size=batch_size)
+        return len(stale)
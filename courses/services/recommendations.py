@@ -0,0 +1,217 @@
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from analytics.models import CourseView, LessonProgress
+from courses.models import Course, CourseRecommendation, Enrollment
+
+
+class RecommendationService:
+    """
+    Персональные рекомендации курсов на основе item-item коллаборативной фильтрации.
+    Неявная обратная связь (записи, пройденные уроки, просмотры) собирается
+    в разреженную матрицу студент × курс потоково, пакетами фиксированного размера.
+    """
+
+    CACHE_PREFIX = 'course_recommendations_'
+    CACHE_TIMEOUT = 6 * 3600
+
+    DEFAULTS = {
+        'TOP_N': 20,
+        'NEIGHBORS': 50,              # сколько похожих курсов хранить для каждого курса
+        'ENROLLMENT_WEIGHT': 3.0,
+        'LESSON_WEIGHT': 1.0,
+        'VIEW_WEIGHT': 0.5,
+        'USER_CHUNK': 500,
+        'QUERY_CHUNK': 5000,
+    }
+
+    @classmethod
+    def get_config(cls):
+        return {**cls.DEFAULTS, **getattr(settings, 'COURSE_RECOMMENDATIONS', {})}
+
+    @classmethod
+    def get_cache_key(cls, user_id):
+        return f'{cls.CACHE_PREFIX}{user_id}'
+
+    @staticmethod
+    def _stream(queryset, fields, chunk_size):
+        """Читает тройки (user_id, course_id, count) в плоский int-массив без материализации моделей"""
+        return np.fromiter(
+            (value for row in queryset.values_list(*fields).iterator(chunk_size=chunk_size) for value in row),
+            dtype=np.int64
+        ).reshape(-1, 3)
+
+    @classmethod
+    def build_interactions(cls, config=None):
+        """
+        Строит матрицу неявной обратной связи студент × курс.
+        Возвращает (матрица, id студентов, id курсов).
+        """
+        config = config or cls.get_config()
+        chunk = config['QUERY_CHUNK']
+
+        sources = [
+            (
+                cls._stream(
+                    Enrollment.objects.order_by().values('student_id', 'course_id').annotate(n=Count('id')),
+                    ('student_id', 'course_id', 'n'),
+                    chunk
+                ),
+                config['ENROLLMENT_WEIGHT']
+            ),
+            (
+                cls._stream(
+                    LessonProgress.objects.filter(status='completed').order_by()
+                    .values('user_id', 'lesson__module__course_id').annotate(n=Count('id')),
+                    ('user_id', 'lesson__module__course_id', 'n'),
+                    chunk
+                ),
+                config['LESSON_WEIGHT']
+            ),
+            (
+                cls._stream(
+                    CourseView.objects.order_by().values('user_id', 'course_id').annotate(n=Count('id')),
+                    ('user_id', 'course_id', 'n'),
+                    chunk
+                ),
+                config['VIEW_WEIGHT']
+            ),
+        ]
+
+        triples = np.concatenate([rows for rows, _ in sources])
+        weights = np.concatenate([weight * np.log1p(rows[:, 2]) for rows, weight in sources])
+        if not len(triples):
+            return sparse.csr_matrix((0, 0)), np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+
+        user_ids, user_rows = np.unique(triples[:, 0], return_inverse=True)
+        course_ids, course_cols = np.unique(triples[:, 1], return_inverse=True)
+        matrix = sparse.csr_matrix(
+            (weights, (user_rows, course_cols)),
+            shape=(len(user_ids), len(course_ids))
+        )
+        return matrix, user_ids, course_ids
+
+    @staticmethod
+    def item_similarity(matrix, neighbors):
+        """Косинусная похожесть курсов с отсечением до neighbors ближайших соседей"""
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel())
+        norms[norms == 0] = 1.0
+        normalized = matrix @ sparse.diags(1.0 / norms)
+        similarity = (normalized.T @ normalized).tocsr()
+        similarity.setdiag(0)
+        similarity.eliminate_zeros()
+
+        # Оставляем только ближайших соседей, чтобы матрица оставалась разреженной
+        for i in range(similarity.shape[0]):
+            start, end = similarity.indptr[i], similarity.indptr[i + 1]
+            if end - start > neighbors:
+                row = similarity.data[start:end]
+                row[np.argpartition(row, end - start - neighbors)[:end - start - neighbors]] = 0
+        similarity.eliminate_zeros()
+        return similarity
+
+    @staticmethod
+    def top_n(scores, n):
+        """Индексы и значения n лучших столбцов для каждой строки плотной матрицы"""
+        n = min(n, scores.shape[1])
+        if not n:
+            return np.empty((scores.shape[0], 0), dtype=np.int64), np.empty((scores.shape[0], 0))
+        best = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        return np.take_along_axis(best, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+    @classmethod
+    def train(cls, batch_size=1000):
+        """
+        Обучает модель и сохраняет top-N рекомендаций для каждого студента.
+        Пользователи обрабатываются пакетами, поэтому плотная матрица оценок
+        никогда не превышает USER_CHUNK × число курсов.
+        Возвращает количество студентов с рекомендациями.
+        """
+        config = cls.get_config()
+        matrix, user_ids, course_ids = cls.build_interactions(config)
+
+        now = timezone.now()
+        if not len(user_ids):
+            CourseRecommendation.objects.all().delete()
+            return 0
+
+        similarity = cls.item_similarity(matrix, config['NEIGHBORS'])
+        published = np.isin(
+            course_ids,
+            np.fromiter(Course.objects.filter(status='published').values_list('id', flat=True), dtype=np.int64)
+        )
+
+        trained = 0
+        for start in range(0, len(user_ids), config['USER_CHUNK']):
+            history = matrix[start:start + config['USER_CHUNK']]
+            scores = (history @ similarity).toarray()
+            # Не рекомендуем уже знакомые и неопубликованные курсы
+            scores[history.nonzero()] = 0
+            scores[:, ~published] = 0
+
+            columns, values = cls.top_n(scores, config['TOP_N'])
+            chunk_users = user_ids[start:start + config['USER_CHUNK']]
+            recommendations = [
+                CourseRecommendation(
+                    user_id=int(user_id),
+                    course_id=int(course_ids[column]),
+                    rank=rank,
+                    score=float(score),
+                    computed_at=now
+                )
+                for user_id, user_columns, user_values in zip(chunk_users, columns, values)
+                for rank, (column, score) in enumerate(
+                    ((c, v) for c, v in zip(user_columns, user_values) if v > 0),
+                    start=1
+                )
+            ]
+            # Старые рекомендации пакета заменяются атомарно, чтобы чтение не видело пустой список
+            with transaction.atomic():
+                CourseRecommendation.objects.filter(user_id__in=chunk_users.tolist()).delete()
+                CourseRecommendation.objects.bulk_create(recommendations, batch_size=batch_size)
+            cache.delete_many([cls.get_cache_key(user_id) for user_id in chunk_users])
+            trained += len({recommendation.user_id for recommendation in recommendations})
+
+        # Удаляем рекомендации студентов, которые выпали из матрицы
+        CourseRecommendation.objects.filter(computed_at__lt=now).delete()
+        return trained
+
+    @classmethod
+    def get_recommended_ids(cls, user, limit=10):
+        """Возвращает id рекомендованных курсов из кэша или предвычисленной таблицы"""
+        cache_key = cls.get_cache_key(user.id)
+        course_ids = cache.get(cache_key)
+
+        if course_ids is None:
+            course_ids = list(
+                CourseRecommendation.objects.filter(user=user).order_by('rank')
+                .values_list('course_id', flat=True)[:cls.get_config()['TOP_N']]
+            )
+            cache.set(cache_key, course_ids, cls.CACHE_TIMEOUT)
+
+        return course_ids[:limit]
+
+    @classmethod
+    def get_recommendations(cls, user, limit=10):
+        """
+        Персональные рекомендации с запасным вариантом по популярности (rank_score)
+        для новых студентов и для добора до limit
+        """
+        course_ids = cls.get_recommended_ids(user, limit)
+        courses = Course.objects.filter(id__in=course_ids, status='published').in_bulk()
+        result = [courses[course_id] for course_id in course_ids if course_id in courses]
+
+        if len(result) < limit:
+            result += list(
+                Course.objects.filter(status='published')
+                .exclude(Q(id__in=[course.id for course in result]) | Q(enrollments__student=user))
+                .order_by('-rank_score')[:limit - len(result)]
+            )
+
+        return result
@@ -0,0 +1,178 @@
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from courses.models import Course, Enrollment, RelatedCourse
+
+
+class RelatedCoursesService:
+    """
+    Сервис для предвычисления похожих курсов.
+    Похожесть - взвешенная сумма коэффициентов Жаккара по тегам и по студентам
+    (совместные записи) плюс бонус за общую категорию. Считается разреженными
+    матрицами пакетами строк, чтобы память не зависела от размера каталога.
+    """
+
+    DEFAULTS = {
+        'TOP_K': 10,
+        'TAG_WEIGHT': 0.45,
+        'ENROLLMENT_WEIGHT': 0.45,
+        'CATEGORY_WEIGHT': 0.1,
+        'POPULARITY_WEIGHT': 0.01,   # небольшая добавка rank_score для разрешения равенства
+        'ROW_CHUNK': 1000,
+        'QUERY_CHUNK': 5000,
+    }
+
+    @classmethod
+    def get_config(cls):
+        return {**cls.DEFAULTS, **getattr(settings, 'RELATED_COURSES', {})}
+
+    @staticmethod
+    def incidence_matrix(pairs, course_ids):
+        """
+        Строит бинарную разреженную матрицу курс × объект из пар (course_id, object_id).
+        course_ids должен быть отсортирован.
+        """
+        pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+        if not len(pairs):
+            return sparse.csr_matrix((len(course_ids), 0), dtype=np.float64)
+
+        rows = np.searchsorted(course_ids, pairs[:, 0])
+        _, cols = np.unique(pairs[:, 1], return_inverse=True)
+        matrix = sparse.csr_matrix(
+            (np.ones(len(pairs)), (rows, cols)),
+            shape=(len(course_ids), cols.max() + 1)
+        )
+        # Повторяющиеся пары не должны увеличивать вес
+        matrix.data[:] = 1.0
+        return matrix
+
+    @staticmethod
+    def jaccard(matrix, rows):
+        """Коэффициенты Жаккара между строками rows и всеми строками бинарной матрицы"""
+        sizes = np.asarray(matrix.getnnz(axis=1), dtype=np.float64)
+        intersection = (matrix[rows] @ matrix.T).tocoo()
+        union = sizes[rows][intersection.row] + sizes[intersection.col] - intersection.data
+        return sparse.csr_matrix(
+            (intersection.data / union, (intersection.row, intersection.col)),
+            shape=intersection.shape
+        )
+
+    @staticmethod
+    def top_k(scores, k):
+        """Возвращает для каждой строки список пар (индекс столбца, оценка) по убыванию"""
+        result = []
+        for i in range(scores.shape[0]):
+            start, end = scores.indptr[i], scores.indptr[i + 1]
+            data, cols = scores.data[start:end], scores.indices[start:end]
+            if len(data) > k:
+                best = np.argpartition(-data, k - 1)[:k]
+                data, cols = data[best], cols[best]
+            order = np.argsort(-data, kind='stable')
+            result.append(list(zip(cols[order].tolist(), data[order].tolist())))
+        return result
+
+    @classmethod
+    def _load(cls, config):
+        courses = np.array(
+            list(Course.objects.order_by('id').values_list('id', 'category_id', 'status', 'rank_score')),
+            dtype=object
+        ).reshape(-1, 4)
+        ids = courses[:, 0].astype(np.int64)
+
+        tags = cls.incidence_matrix(
+            list(Course.tags.through.objects.values_list('course_id', 'tag_id').iterator(
+                chunk_size=config['QUERY_CHUNK']
+            )),
+            ids
+        )
+        enrollments = cls.incidence_matrix(
+            np.fromiter(
+                (value for pair in Enrollment.objects.values_list('course_id', 'student_id').iterator(
+                    chunk_size=config['QUERY_CHUNK']
+                ) for value in pair),
+                dtype=np.int64
+            ),
+            ids
+        )
+        categories = cls.incidence_matrix(
+            np.column_stack([ids, courses[:, 1].astype(np.int64)]) if len(ids) else [],
+            ids
+        )
+        published = (courses[:, 2] == 'published').astype(np.float64)
+        popularity = courses[:, 3].astype(np.float64)
+        return ids, tags, enrollments, categories, published, popularity
+
+    @classmethod
+    def compute(cls, course_ids=None):
+        """
+        Вычисляет похожие курсы. Возвращает словарь
+        {course_id: [(related_course_id, score), ...]} для курсов course_ids (или всех).
+        """
+        config = cls.get_config()
+        ids, tags, enrollments, categories, published, popularity = cls._load(config)
+        if not len(ids):
+            return {}
+
+        if course_ids is None:
+            rows = np.arange(len(ids))
+        else:
+            requested = np.asarray(sorted(set(course_ids)), dtype=np.int64)
+            rows = np.searchsorted(ids, requested)
+            rows = rows[(rows < len(ids)) & (ids[np.minimum(rows, len(ids) - 1)] == requested)]
+
+        # Похожими могут быть только опубликованные курсы
+        targets = sparse.diags(published)
+
+        result = {}
+        for start in range(0, len(rows), config['ROW_CHUNK']):
+            chunk = rows[start:start + config['ROW_CHUNK']]
+            scores = (
+                config['TAG_WEIGHT'] * cls.jaccard(tags, chunk)
+                + config['ENROLLMENT_WEIGHT'] * cls.jaccard(enrollments, chunk)
+                + config['CATEGORY_WEIGHT'] * (categories[chunk] @ categories.T)
+            )
+            scores = (scores @ targets).tocoo()
+
+            # Курс не может быть похож сам на себя
+            keep = (scores.col != chunk[scores.row]) & (scores.data > 0)
+            row, col = scores.row[keep], scores.col[keep]
+            # Небольшая добавка популярности только для уже найденных кандидатов
+            data = scores.data[keep] + config['POPULARITY_WEIGHT'] * popularity[col]
+            scores = sparse.csr_matrix((data, (row, col)), shape=scores.shape)
+
+            for course_row, related in zip(chunk, cls.top_k(scores, config['TOP_K'])):
+                result[int(ids[course_row])] = [(int(ids[col]), score) for col, score in related]
+
+        return result
+
+    @classmethod
+    def rebuild(cls, course_ids=None, batch_size=1000):
+        """
+        Пересчитывает таблицу RelatedCourse для всех курсов (ночная задача)
+        или только для указанных (инкрементальное обновление).
+        Возвращает количество записанных строк.
+        """
+        related = cls.compute(course_ids)
+        now = timezone.now()
+        links = [
+            RelatedCourse(
+                course_id=course_id,
+                related_course_id=related_id,
+                rank=rank,
+                score=score,
+                computed_at=now
+            )
+            for course_id, items in related.items()
+            for rank, (related_id, score) in enumerate(items, start=1)
+        ]
+
+        with transaction.atomic():
+            stale = RelatedCourse.objects.all()
+            if course_ids is not None:
+                stale = stale.filter(course_id__in=list(related.keys()))
+            stale.delete()
+            RelatedCourse.objects.bulk_create(links, batch_size=batch_size)
+
+        return len(links)
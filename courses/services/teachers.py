@@ -0,0 +1,137 @@
+from django.core.cache import cache
+from accounts.models import Profile, User
+from core import codec
+from courses.models import CourseUserRole
+
+USER_SCHEMA = codec.ModelSchema(
+    User,
+    fields=['id', 'email', 'first_name', 'last_name', 'role', 'is_verified', 'is_active']
+)
+PRIMARY_TEACHER_SCHEMA = codec.ModelSchema(
+    CourseUserRole,
+    related={
+        'user': codec.ModelSchema(
+            User,
+            fields=USER_SCHEMA.fields,
+            related={'profile': codec.ModelSchema(Profile)}
+        )
+    }
+)
+
+
+class TeacherLoader:
+    """
+    Пакетная загрузка преподавателей курсов (в духе DataLoader).
+    Для набора курсов делает один cache.get_many, один запрос для промахов
+    и один cache.set_many. Результаты запоминаются в экземпляре,
+    поэтому загрузчик создается на запрос (или на сериализацию списка).
+    """
+
+    PRIMARY_PREFIX = 'course_primary_teacher_'
+    TEACHERS_PREFIX = 'course_teachers_'
+    CACHE_TIMEOUT = 3600
+
+    CONTEXT_KEY = 'teacher_loader'
+
+    def __init__(self):
+        self._primary = {}
+        self._teachers = {}
+
+    @classmethod
+    def get_cache_keys(cls, course_id):
+        return [f'{cls.PRIMARY_PREFIX}{course_id}', f'{cls.TEACHERS_PREFIX}{course_id}']
+
+    @classmethod
+    def invalidate(cls, course_id):
+        cache.delete_many(cls.get_cache_keys(course_id))
+
+    @classmethod
+    def for_serializer(cls, serializer):
+        """
+        Загрузчик из контекста сериализатора. При сериализации списка
+        сразу загружает преподавателей всех курсов списка.
+        """
+        loader = serializer.context.get(cls.CONTEXT_KEY)
+        if loader is None:
+            loader = cls()
+            serializer.context[cls.CONTEXT_KEY] = loader
+
+            courses = getattr(serializer.parent, 'instance', None)
+            if courses is not None and not hasattr(courses, 'pk'):
+                loader.load_primary_teachers([course.pk for course in courses])
+        return loader
+
+    def _load(self, course_ids, memo, prefix, schema, fetch):
+        """
+        Значения в кэше - списки экземпляров, закодированные core.codec
+        (основной преподаватель хранится списком из 0 или 1 роли)
+        """
+        missing = [course_id for course_id in dict.fromkeys(course_ids) if course_id not in memo]
+        if missing:
+            keys = {f'{prefix}{course_id}': course_id for course_id in missing}
+            for key, value in codec.cache_get_many(schema, list(keys), many=True).items():
+                memo[keys[key]] = value
+
+            misses = [course_id for course_id in missing if course_id not in memo]
+            if misses:
+                fetched = fetch(misses)
+                codec.cache_set_many(
+                    schema,
+                    {f'{prefix}{course_id}': fetched[course_id] for course_id in misses},
+                    self.CACHE_TIMEOUT,
+                    many=True
+                )
+                memo.update(fetched)
+
+        return {course_id: memo[course_id] for course_id in course_ids}
+
+    @staticmethod
+    def _fetch_primary(course_ids):
+        result = {course_id: [] for course_id in course_ids}
+        roles = CourseUserRole.objects.filter(
+            course_id__in=course_ids,
+            role='teacher',
+            is_primary=True
+        ).select_related('user', 'user__profile')
+        for role in roles:
+            result[role.course_id] = [role]
+        return result
+
+    @staticmethod
+    def _fetch_teachers(course_ids):
+        result = {course_id: [] for course_id in course_ids}
+        roles = CourseUserRole.objects.filter(
+            course_id__in=course_ids,
+            role='teacher'
+        ).select_related('user').order_by('-is_primary', 'added_at')
+        for role in roles:
+            if role.user not in result[role.course_id]:
+                result[role.course_id].append(role.user)
+        return result
+
+    def load_primary_teachers(self, course_ids):
+        """{course_id: CourseUserRole основного преподавателя или None}"""
+        roles = self._load(
+            course_ids,
+            self._primary,
+            self.PRIMARY_PREFIX,
+            PRIMARY_TEACHER_SCHEMA,
+            self._fetch_primary
+        )
+        return {course_id: role[0] if role else None for course_id, role in roles.items()}
+
+    def load_teachers(self, course_ids):
+        """{course_id: список преподавателей}"""
+        return self._load(
+            course_ids,
+            self._teachers,
+            self.TEACHERS_PREFIX,
+            USER_SCHEMA,
+            self._fetch_teachers
+        )
+
+    def get_primary_teacher(self, course_id):
+        return self.load_primary_teachers([course_id])[course_id]
+
+    def get_teachers(self, course_id):
+        return self.load_teachers([course_id])[course_id]
@@ -0,0 +1,220 @@
+from django.db.models import QuerySet
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from core import outbox
+from . import events
+from .models import Course, CourseUserRole, Enrollment, Module, Lesson, Review
+from .services.counters import CourseCountersService
+from .services.permissions import CoursePermissionService
+from .services.teachers import TeacherLoader
+from .services.ratings import CourseRatingService
+
+
+def _deleted_via(origin, *models):
+    """Проверяет, что удаление каскадно пришло от одной из указанных моделей"""
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return origin_model in models
+
+
+@receiver(pre_save, sender=Lesson)
+def remember_lesson_counters(sender, instance, update_fields=None, **kwargs):
+    """
+    Запоминает модуль и длительность урока до сохранения,
+    чтобы после сохранения применить разницу к счетчикам курса
+    """
+    instance._counters_origin = None
+    if instance._state.adding:
+        return
+    if update_fields is not None and not {'module', 'module_id', 'duration_minutes'} & set(update_fields):
+        return
+
+    instance._counters_origin = Lesson.objects.filter(
+        pk=instance.pk
+    ).values_list('module_id', 'duration_minutes').first()
+
+
+@receiver(post_save, sender=Lesson)
+def update_counters_on_lesson_save(sender, instance, created, **kwargs):
+    """Обновляет total_lessons и duration курса при создании, изменении или переносе урока"""
+    duration = instance.duration_minutes or 0
+
+    if created:
+        CourseCountersService.apply_module_delta(instance.module_id, lessons=1, duration=duration)
+        return
+
+    origin = getattr(instance, '_counters_origin', None)
+    if origin is None:
+        return
+
+    old_module_id, old_duration = origin
+    old_duration = old_duration or 0
+
+    if old_module_id == instance.module_id:
+        CourseCountersService.apply_module_delta(instance.module_id, duration=duration - old_duration)
+    else:
+        # Урок перенесен в другой модуль (возможно, другого курса)
+        CourseCountersService.apply_module_delta(old_module_id, lessons=-1, duration=-old_duration)
+        CourseCountersService.apply_module_delta(instance.module_id, lessons=1, duration=duration)
+
+
+@receiver(post_delete, sender=Lesson)
+def update_counters_on_lesson_delete(sender, instance, origin=None, **kwargs):
+    """Уменьшает счетчики курса при удалении урока"""
+    # При каскадном удалении модуля или курса счетчики обновляются один раз на уровне модуля
+    if _deleted_via(origin, Module, Course):
+        return
+
+    CourseCountersService.apply_module_delta(
+        instance.module_id,
+        lessons=-1,
+        duration=-(instance.duration_minutes or 0)
+    )
+
+
+@receiver(pre_save, sender=Module)
+def remember_module_course(sender, instance, update_fields=None, **kwargs):
+    """Запоминает курс модуля до сохранения для отслеживания переноса"""
+    instance._counters_origin = None
+    if instance._state.adding:
+        return
+    if update_fields is not None and not {'course', 'course_id'} & set(update_fields):
+        return
+
+    instance._counters_origin = Module.objects.filter(
+        pk=instance.pk
+    ).values_list('course_id', flat=True).first()
+
+
+@receiver(post_save, sender=Module)
+def update_counters_on_module_move(sender, instance, created, **kwargs):
+    """Переносит счетчики уроков между курсами при переносе модуля"""
+    old_course_id = getattr(instance, '_counters_origin', None)
+    if created or old_course_id is None or old_course_id == instance.course_id:
+        return
+
+    lessons, duration = CourseCountersService.get_module_totals(instance.pk)
+    CourseCountersService.apply_delta({'pk': old_course_id}, lessons=-lessons, duration=-duration)
+    CourseCountersService.apply_delta({'pk': instance.course_id}, lessons=lessons, duration=duration)
+
+
+@receiver(pre_delete, sender=Module)
+def remember_module_totals(sender, instance, origin=None, **kwargs):
+    """Считает уроки модуля до каскадного удаления"""
+    instance._counters_totals = None
+    if _deleted_via(origin, Course):
+        return
+
+    instance._counters_totals = CourseCountersService.get_module_totals(instance.pk)
+
+
+@receiver(post_delete, sender=Module)
+def update_counters_on_module_delete(sender, instance, **kwargs):
+    """Уменьшает счетчики курса одним запросом при удалении модуля"""
+    totals = getattr(instance, '_counters_totals', None)
+    if not totals:
+        return
+
+    lessons, duration = totals
+    CourseCountersService.apply_delta({'pk': instance.course_id}, lessons=-lessons, duration=-duration)
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_rating(sender, instance, update_fields=None, **kwargs):
+    """Запоминает курс и оценку отзыва до сохранения"""
+    instance._rating_origin = None
+    if instance._state.adding:
+        return
+    if update_fields is not None and not {'rating', 'course', 'course_id'} & set(update_fields):
+        return
+
+    instance._rating_origin = Review.objects.filter(
+        pk=instance.pk
+    ).values_list('course_id', 'rating').first()
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_review_save(sender, instance, created, **kwargs):
+    """Применяет O(1)-изменение к статистике рейтинга курса вместо полного пересчета"""
+    if created:
+        CourseRatingService.on_review_created(instance)
+        outbox.publish(events.REVIEW_CHANGED, course_id=instance.course_id)
+        return
+
+    origin = getattr(instance, '_rating_origin', None)
+    if origin is not None:
+        CourseRatingService.on_review_changed(instance, *origin)
+        outbox.publish(events.REVIEW_CHANGED, course_id=instance.course_id)
+        if origin[0] != instance.course_id:
+            outbox.publish(events.REVIEW_CHANGED, course_id=origin[0])
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_review_delete(sender, instance, origin=None, **kwargs):
+    """Уменьшает статистику рейтинга курса при удалении отзыва"""
+    if _deleted_via(origin, Course):
+        return
+
+    CourseRatingService.on_review_deleted(instance)
+    outbox.publish(events.REVIEW_CHANGED, course_id=instance.course_id)
+
+
+@receiver(pre_save, sender=Course)
+def remember_course_category(sender, instance, update_fields=None, **kwargs):
+    """Запоминает категорию и статус курса до сохранения"""
+    instance._category_origin = None
+    if instance._state.adding:
+        return
+    if update_fields is not None and not {'category', 'category_id', 'status'} & set(update_fields):
+        return
+
+    instance._category_origin = Course.objects.filter(
+        pk=instance.pk
+    ).values_list('category_id', 'status').first()
+
+
+@receiver(post_save, sender=Course)
+def publish_course_saved(sender, instance, created, **kwargs):
+    """
+    Событие изменения курса: сброс кэша курса, а при создании,
+    смене категории или статуса - пересчет счетчиков категорий
+    """
+    category_ids = []
+    origin = getattr(instance, '_category_origin', None)
+    if created:
+        category_ids = [instance.category_id]
+    elif origin is not None and origin != (instance.category_id, instance.status):
+        category_ids = [origin[0], instance.category_id]
+
+    outbox.publish(events.COURSE_CHANGED, course_id=instance.pk, category_ids=category_ids)
+
+
+@receiver(post_delete, sender=Course)
+def publish_course_deleted(sender, instance, origin=None, **kwargs):
+    """Событие удаления курса: сброс кэша и пересчет счетчиков категории"""
+    outbox.publish(events.COURSE_CHANGED, course_id=instance.pk, category_ids=[instance.category_id])
+
+
+@receiver(post_save, sender=Enrollment)
+def publish_enrollment_saved(sender, instance, created, update_fields=None, **kwargs):
+    """Событие записи на курс или смены статуса: кэш и статистика студентов"""
+    if not created and update_fields is not None and 'status' not in update_fields:
+        return
+
+    outbox.publish(events.ENROLLMENT_CHANGED, course_id=instance.course_id)
+
+
+@receiver(post_delete, sender=Enrollment)
+def publish_enrollment_deleted(sender, instance, origin=None, **kwargs):
+    """Событие отчисления: кэш и статистика студентов"""
+    # При удалении курса пересчитывать его статистику не нужно
+    if _deleted_via(origin, Course):
+        return
+
+    outbox.publish(events.ENROLLMENT_CHANGED, course_id=instance.course_id)
+
+
+@receiver([post_save, post_delete], sender=CourseUserRole)
+def invalidate_course_roles(sender, instance, **kwargs):
+    """Сбрасывает карту прав и кэш преподавателей при изменении ролей в курсе"""
+    CoursePermissionService.invalidate(instance.user_id)
+    TeacherLoader.invalidate(instance.course_id)
@@ -1,15 +1,40 @@
 from celery import shared_task
-from django.core.cache import cache
-from django.db.models import Avg, Count
+from decimal import Decimal
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Avg, Count, DecimalField, FloatField, Q, Sum
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Cast
 from django.utils import timezone
-from typing import Dict, Any
+from django.utils.dateparse import parse_datetime
+from typing import Dict, Any, List, Optional
 import logging
 
-from .models import Course, CourseAnalytics, AnalyticsLog
+from core.celery_queues import queue_next_chunk
+from core.db_router import replica_reads
+from .models import Category, Course, CourseAnalytics, AnalyticsLog
 
 logger = logging.getLogger(__name__)
 
+
+def _set_changed(instance, **values):
+    """
+    Присваивает значения полям объекта с точностью DecimalField.
+    Возвращает True, если хотя бы одно значение изменилось
+    """
+    changed = False
+    for name, value in values.items():
+        field = instance._meta.get_field(name)
+        if isinstance(field, DecimalField):
+            value = Decimal(str(value)).quantize(Decimal(1).scaleb(-field.decimal_places))
+        if getattr(instance, name) != value:
+            setattr(instance, name, value)
+            changed = True
+    return changed
+
+
 @shared_task
+@replica_reads
 def update_course_analytics(course_id: int) -> Dict[str, Any]:
     """
     Обновляет аналитику курса на основе логов
@@ -25,24 +50,28 @@ def update_course_analytics(course_id: int) -> Dict[str, Any]:
             timestamp__gte=thirty_days_ago
         )
         
-        # Агрегируем данные
+        # Агрегируем данные (значения из JSON приводятся к числам явно)
         stats = logs.aggregate(
-            views=Count('id', filter={'event_type': 'view'}),
-            completions=Count('id', filter={'event_type': 'complete'}),
-            avg_rating=Avg('data__rating', filter={'event_type': 'rate'}),
-            total_revenue=Sum('data__amount', filter={'event_type': 'purchase'})
+            views=Count('id', filter=Q(event_type='view')),
+            completions=Count('id', filter=Q(event_type='complete')),
+            avg_rating=Avg(Cast(KeyTextTransform('rating', 'data'), FloatField()), filter=Q(event_type='rate')),
+            total_revenue=Sum(
+                Cast(KeyTextTransform('amount', 'data'), DecimalField(max_digits=12, decimal_places=2)),
+                filter=Q(event_type='purchase')
+            )
         )
         
-        # Обновляем аналитику
-        analytics.views_count = stats['views'] or 0
-        analytics.completion_rate = (stats['completions'] or 0) / (stats['views'] or 1) * 100
-        analytics.average_rating = stats['avg_rating'] or 0
-        analytics.revenue = stats['total_revenue'] or 0
-        analytics.save()
-        
-        # Инвалидируем кэш
-        cache_key = f'course_analytics:{course_id}'
-        cache.delete(cache_key)
+        # Обновляем аналитику. Кэш сбрасывается после коммита событием
+        # outbox (core/signals.py), поэтому без изменений строка не сохраняется
+        changed = _set_changed(
+            analytics,
+            views_count=stats['views'] or 0,
+            completion_rate=(stats['completions'] or 0) / (stats['views'] or 1) * 100,
+            average_rating=stats['avg_rating'] or 0,
+            revenue=stats['total_revenue'] or 0
+        )
+        if changed:
+            analytics.save()
         
         return {
             'status': 'success',
@@ -62,36 +91,53 @@ def update_course_analytics(course_id: int) -> Dict[str, Any]:
         logger.exception(f"Error updating analytics for course {course_id}: {str(e)}")
         return {'status': 'error', 'message': str(e)}
 
-@shared_task
-def cleanup_old_analytics_logs(days: int = 90) -> Dict[str, Any]:
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True,
+             autoretry_for=(DatabaseError,), retry_backoff=True, max_retries=5)
+def cleanup_old_analytics_logs(self, days: int = 90, cutoff: Optional[str] = None,
+                               chunk_size: Optional[int] = None) -> Dict[str, Any]:
     """
-    Очищает старые записи аналитики
+    Очищает старые записи аналитики порцией из chunk_size записей
+    и ставит в очередь следующую порцию с той же границей cutoff.
+    Ошибки не перехватываются: упавшая порция повторяется (autoretry)
+    или остается в статусе FAILURE, а не завершается молча
     """
-    try:
-        cutoff_date = timezone.now() - timezone.timedelta(days=days)
-        old_logs = AnalyticsLog.objects.filter(timestamp__lt=cutoff_date)
-        count = old_logs.count()
-        old_logs.delete()
-        
-        return {
-            'status': 'success',
-            'deleted_count': count,
-            'cutoff_date': cutoff_date.isoformat()
-        }
-        
-    except Exception as e:
-        logger.exception(f"Error cleaning up old analytics logs: {str(e)}")
-        return {'status': 'error', 'message': str(e)}
+    chunk_size = chunk_size or settings.CELERY_BULK_CHUNK_SIZE['analytics_logs']
+    cutoff_date = parse_datetime(cutoff) if cutoff else timezone.now() - timezone.timedelta(days=days)
+    old_logs = AnalyticsLog.objects.filter(timestamp__lt=cutoff_date)
+    deleted_count = 0
 
-@shared_task
-def recalculate_course_ratings() -> Dict[str, Any]:
+    while True:
+        # Граница порции - id последней записи: DELETE по диапазону без передачи списка id
+        boundary = list(old_logs.order_by('id').values_list('id', flat=True)[chunk_size - 1:chunk_size])
+        has_more = bool(boundary)
+        chunk = old_logs.filter(id__lte=boundary[0]) if has_more else old_logs
+        deleted_count += chunk.delete()[0]
+
+        next_kwargs = {'days': days, 'cutoff': cutoff_date.isoformat(), 'chunk_size': chunk_size}
+        if not has_more or queue_next_chunk(self, next_kwargs):
+            break
+
+    return {
+        'status': 'success',
+        'deleted_count': deleted_count,
+        'cutoff_date': cutoff_date.isoformat(),
+        'has_more': has_more
+    }
+
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True,
+             autoretry_for=(DatabaseError,), retry_backoff=True, max_retries=5)
+def recalculate_course_ratings(self, after_id: int = 0, chunk_size: Optional[int] = None) -> Dict[str, Any]:
     """
-    Пересчитывает рейтинги всех курсов
+    Пересчитывает рейтинги курсов порцией из chunk_size курсов с id > after_id
+    и ставит в очередь следующую порцию. Прогресс передается в аргументах,
+    поэтому повторная доставка порции после падения воркера безопасна
     """
-    try:
-        courses = Course.objects.all()
-        updated_count = 0
-        
+    chunk_size = chunk_size or settings.CELERY_BULK_CHUNK_SIZE['courses']
+    updated_count = 0
+
+    while True:
+        courses = list(Course.objects.filter(id__gt=after_id).order_by('id')[:chunk_size])
+
         for course in courses:
             analytics = CourseAnalytics.objects.filter(course=course).first()
             if not analytics:
@@ -109,17 +155,121 @@ def recalculate_course_ratings() -> Dict[str, Any]:
                 avg_rating = sum(ratings) / total_ratings
                 
                 # Обновляем аналитику
-                analytics.average_rating = avg_rating
-                analytics.total_ratings = total_ratings
-                analytics.save()
-                
-                updated_count += 1
-                
+                if _set_changed(analytics, average_rating=avg_rating, total_ratings=total_ratings):
+                    analytics.save()
+                    updated_count += 1
+
+        next_after_id = courses[-1].id if len(courses) == chunk_size else None
+        if next_after_id is None or queue_next_chunk(self, {'after_id': next_after_id, 'chunk_size': chunk_size}):
+            break
+        after_id = next_after_id
+
+    return {
+        'status': 'success',
+        'updated_courses': updated_count,
+        'next_after_id': next_after_id
+    }
+
+@shared_task
+@replica_reads
+def update_course_rank_scores() -> Dict[str, Any]:
+    """
+    Пересчитывает rank_score всех курсов для сортировки каталога
+    """
+    from .services.course_manager import CourseManager
+    from .services.ranking import CourseRankingService
+
+    try:
+        updated_count = CourseRankingService.update_scores()
+        CourseManager.invalidate_popular_courses()
+
         return {
             'status': 'success',
             'updated_courses': updated_count
         }
-        
+
     except Exception as e:
-        logger.exception(f"Error recalculating course ratings: {str(e)}")
+        logger.exception(f"Error updating course rank scores: {str(e)}")
         return {'status': 'error', 'message': str(e)}
+
+
+@shared_task
+@replica_reads
+def rebuild_related_courses(course_ids: Optional[List[int]] = None) -> Dict[str, Any]:
+    """
+    Пересчитывает похожие курсы для всех курсов или только для указанных
+    """
+    from .services.related import RelatedCoursesService
+
+    try:
+        links_count = RelatedCoursesService.rebuild(course_ids)
+
+        return {
+            'status': 'success',
+            'links_count': links_count
+        }
+
+    except Exception as e:
+        logger.exception(f"Error rebuilding related courses: {str(e)}")
+        return {'status': 'error', 'message': str(e)}
+
+
+@shared_task
+@replica_reads
+def train_course_recommendations() -> Dict[str, Any]:
+    """
+    Переобучает модель персональных рекомендаций курсов
+    """
+    from .services.recommendations import RecommendationService
+
+    try:
+        students_count = RecommendationService.train()
+
+        return {
+            'status': 'success',
+            'students_count': students_count
+        }
+
+    except Exception as e:
+        logger.exception(f"Error training course recommendations: {str(e)}")
+        return {'status': 'error', 'message': str(e)}
+
+
+@shared_task
+def update_course_student_stats(course_id: int) -> Dict[str, Any]:
+    """
+    Пересчитывает students_count и completion_rate курса
+    (ставится с подавлением дублей при изменении записей на курс)
+    """
+    course = Course.objects.filter(id=course_id).first()
+    if course is None:
+        return {'status': 'error', 'message': 'Course not found'}
+
+    course.update_student_stats()
+    return {
+        'status': 'success',
+        'course_id': course_id,
+        'students_count': course.students_count
+    }
+
+
+@shared_task
+def update_category_counts(category_id: int) -> Dict[str, Any]:
+    """
+    Пересчитывает счетчики категории и всех ее родителей
+    (ставится с подавлением дублей при изменении курсов, записей и отзывов)
+    """
+    category = Category.objects.filter(id=category_id).first()
+    if category is None:
+        return {'status': 'error', 'message': 'Category not found'}
+
+    updated = []
+    while category is not None and category.id not in updated:
+        category.update_counts()
+        updated.append(category.id)
+        category = category.parent
+
+    return {
+        'status': 'success',
+        'updated_categories': updated
+    }
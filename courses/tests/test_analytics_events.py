@@ -0,0 +1,61 @@
+import pytest
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from accounts.models import User
+from core.models import OutboxEvent
+from courses.models import AnalyticsLog, Category, Course, CourseAnalytics
+from courses.services import CourseAnalyticsService
+
+
+@pytest.mark.django_db
+class TestRecordEvent:
+    @pytest.fixture
+    def course(self):
+        category = Category.objects.create(name='Programming', slug='programming')
+        return Course.objects.create(title='Python', slug='python', description='Описание', category=category)
+
+    @pytest.fixture
+    def user(self):
+        return User.objects.create_user(email='student@example.com', password='x')
+
+    def test_records_log_and_counters(self, course, user):
+        """Тест записи событий в лог и обновления агрегатов"""
+        CourseAnalyticsService.record_event(course, {'event_type': 'view'}, user=user)
+        CourseAnalyticsService.record_event(course, {'event_type': 'view'}, user=user)
+        CourseAnalyticsService.record_event(course, {'event_type': 'rate', 'rating': 4}, user=user)
+        CourseAnalyticsService.record_event(course, {'event_type': 'rate', 'rating': 5}, user=user)
+        CourseAnalyticsService.record_event(course, {'event_type': 'complete'}, user=user)
+        CourseAnalyticsService.record_event(course, {'event_type': 'purchase', 'amount': 1500}, user=user)
+
+        analytics = CourseAnalytics.objects.get(course=course)
+        assert analytics.views_count == 2
+        assert analytics.total_ratings == 2
+        assert analytics.rating_sum == 9
+        assert analytics.average_rating == Decimal('4.50')
+        assert analytics.completion_count == 1
+        assert analytics.completion_rate == Decimal('50.00')
+        assert analytics.revenue == Decimal('1500')
+        assert list(
+            AnalyticsLog.objects.filter(course=course, user=user).order_by('id').values_list('event_type', flat=True)
+        ) == ['view', 'view', 'rate', 'rate', 'complete', 'purchase']
+
+    def test_counters_updated_in_place(self, course, user):
+        """Тест: событие меняет только свои счетчики, не перезаписывая строку целиком"""
+        CourseAnalytics.objects.filter(course=course).update(revenue=100)
+        OutboxEvent.objects.all().delete()
+
+        with CaptureQueriesContext(connection) as queries:
+            CourseAnalyticsService.record_event(course, {'event_type': 'view'}, user=user)
+
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+        assert len(updates) == 1 and '"revenue"' not in updates[0]
+        analytics = CourseAnalytics.objects.get(course=course)
+        assert (analytics.views_count, analytics.revenue) == (1, Decimal('100'))
+        assert OutboxEvent.objects.filter(event_type='course_analytics.changed').count() == 1
+
+    def test_creates_missing_row(self, course, user):
+        """Тест: для курса без строки аналитики она создается"""
+        CourseAnalytics.objects.filter(course=course).delete()
+        CourseAnalyticsService.record_event(course, {'event_type': 'purchase', 'amount': Decimal('9.90')}, user=user)
+        assert CourseAnalytics.objects.get(course=course).revenue == Decimal('9.90')
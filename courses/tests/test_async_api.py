@@ -0,0 +1,94 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from accounts.models import User
+from courses.models import Category, Course, CourseAnalytics, CourseUserRole, Review, Tag
+
+
+@pytest.mark.django_db
+class TestAsyncCourseAPI:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        cache.clear()
+
+    @pytest.fixture
+    def teacher(self):
+        return User.objects.create_user(
+            email='teacher@example.com', password='testpass123', role='teacher',
+            first_name='Айбек', last_name='Садыков'
+        )
+
+    @pytest.fixture
+    def course(self, teacher):
+        category = Category.objects.create(name='Programming', slug='programming')
+        course = Course.objects.create(
+            title='Python', slug='python', description='Описание', category=category,
+            status='published', rank_score=2
+        )
+        course.tags.add(Tag.objects.create(name='backend', slug='backend'))
+        CourseUserRole.objects.create(course=course, user=teacher, role='teacher', is_primary=True)
+        CourseAnalytics.objects.filter(course=course).update(views_count=42)
+        Course.objects.create(title='Draft', slug='draft', description='Описание', category=category)
+        return course
+
+    def test_course_list(self, client, course, django_assert_num_queries):
+        """Тест каталога: только опубликованные курсы с тегами и преподавателем"""
+        response = client.get(reverse('async_api:course-list'))
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data['count'] == 1
+        item = data['results'][0]
+        assert item['slug'] == 'python'
+        assert item['category']['slug'] == 'programming'
+        assert [tag['slug'] for tag in item['tags']] == ['backend']
+        assert item['teacher']['user']['email'] == 'teacher@example.com'
+
+        # Повторный запрос отдается из кэша
+        with django_assert_num_queries(0):
+            assert client.get(reverse('async_api:course-list')).json() == data
+
+    def test_course_list_filters(self, client, course):
+        url = reverse('async_api:course-list')
+        assert client.get(url, {'category': 'programming'}).json()['count'] == 1
+        assert client.get(url, {'category': 'design'}).json()['count'] == 0
+
+    def test_course_detail(self, client, course, teacher):
+        """Тест карточки курса со статистикой, отзывами и преподавателями"""
+        student = User.objects.create_user(email='student@example.com', password='testpass123')
+        Review.objects.create(course=course, user=student, rating=5, text='Отлично')
+
+        response = client.get(reverse('async_api:course-detail', args=['python']))
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data['stats']['views_count'] == 42
+        assert [review['text'] for review in data['reviews']] == ['Отлично']
+        assert [user['email'] for user in data['teachers']] == [teacher.email]
+        assert data['modules'] == []
+
+    def test_not_found_and_method(self, client, course):
+        assert client.get(reverse('async_api:course-detail', args=['missing'])).status_code == 404
+        assert client.post(reverse('async_api:course-list')).status_code == 405
+
+    def test_course_analytics_permissions(self, client, course, teacher):
+        """Тест доступа к аналитике только с правом can_view_analytics"""
+        url = reverse('async_api:course-analytics', args=['python'])
+        assert client.get(url).status_code == 401
+
+        student = User.objects.create_user(email='student@example.com', password='testpass123')
+        client.force_login(student)
+        assert client.get(url).status_code == 403
+
+        client.force_login(teacher)
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.json()['views_count'] == 42
+        assert response.json()['rating_distribution'] == {'5': 0, '4': 0, '3': 0, '2': 0, '1': 0}
+
+
+def test_middleware_async_capable(settings):
+    """Тест: все middleware поддерживают async, и ASGI не переводит async-представления в поток"""
+    from django.utils.module_loading import import_string
+    sync_only = [path for path in settings.MIDDLEWARE if not getattr(import_string(path), 'async_capable', False)]
+    assert sync_only == []
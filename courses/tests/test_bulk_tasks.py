@@ -0,0 +1,80 @@
+import pytest
+from django.utils import timezone
+from datetime import timedelta
+from ustat.celery import app
+from courses.models import AnalyticsLog, Category, Course, CourseAnalytics
+from courses.tasks import cleanup_old_analytics_logs, recalculate_course_ratings
+
+
+@pytest.fixture
+def eager_celery():
+    app.conf.task_always_eager = True
+    yield
+    app.conf.task_always_eager = False
+
+
+@pytest.mark.django_db
+class TestChunkedTasks:
+    @pytest.fixture
+    def courses(self):
+        category = Category.objects.create(name='Programming', slug='programming')
+        courses = [
+            Course.objects.create(title=f'Course {i}', slug=f'course-{i}', description='Описание', category=category)
+            for i in range(5)
+        ]
+        for rating, course in enumerate(courses, start=1):
+            AnalyticsLog.objects.create(course=course, event_type='rate', data={'rating': rating})
+        return courses
+
+    def test_recalculate_ratings_by_chunks(self, courses, eager_celery):
+        """Тест: без брокера порции идут циклом одной задачи до последнего курса"""
+        result = recalculate_course_ratings.apply(kwargs={'chunk_size': 2}).get()
+
+        assert result['updated_courses'] == 5
+        assert result['next_after_id'] is None
+        assert [
+            CourseAnalytics.objects.get(course=course).average_rating for course in courses
+        ] == [1, 2, 3, 4, 5]
+
+    def test_recalculate_ratings_resumes_after_id(self, courses):
+        """Тест: порция начинается с курса после after_id"""
+        result = recalculate_course_ratings(after_id=courses[2].id, chunk_size=10)
+
+        assert result['updated_courses'] == 2
+        assert result['next_after_id'] is None
+        assert CourseAnalytics.objects.get(course=courses[0]).average_rating == 0
+
+    def test_cleanup_by_chunks(self, courses, eager_celery):
+        """Тест: очистка логов порциями удаляет только старые записи"""
+        old_logs = [AnalyticsLog.objects.create(course=courses[0], event_type='view', data={}) for _ in range(5)]
+        # timestamp заполняется автоматически при создании
+        AnalyticsLog.objects.filter(id__in=[log.id for log in old_logs]).update(
+            timestamp=timezone.now() - timedelta(days=100)
+        )
+
+        result = cleanup_old_analytics_logs.apply(kwargs={'days': 90, 'chunk_size': 2}).get()
+
+        assert result['deleted_count'] == 5
+        assert not result['has_more']
+        assert AnalyticsLog.objects.count() == 5
+
+    def test_next_chunk_queued_after_commit(self, courses, monkeypatch, django_capture_on_commit_callbacks):
+        """Тест: с брокером следующая порция - отдельное сообщение после коммита"""
+        queued = []
+        monkeypatch.setattr(recalculate_course_ratings, 'apply_async', lambda kwargs: queued.append(kwargs))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            result = recalculate_course_ratings(chunk_size=2)
+            assert queued == []
+
+        assert result['updated_courses'] == 2
+        assert queued == [{'after_id': courses[1].id, 'chunk_size': 2}]
+
+    def test_errors_propagate(self, monkeypatch):
+        """Тест: ошибка порции не превращается в успешный результат"""
+        def fail(*args, **kwargs):
+            raise RuntimeError('db is down')
+
+        monkeypatch.setattr(AnalyticsLog.objects, 'filter', fail)
+        with pytest.raises(RuntimeError):
+            cleanup_old_analytics_logs(days=90)
@@ -0,0 +1,156 @@
+import pytest
+from django.core.management import call_command
+from accounts.models import User
+from ustat.celery import app
+from courses.models import Course, Category, Enrollment, Module, Lesson
+
+
+@pytest.mark.django_db
+class TestCourseCounters:
+    @pytest.fixture
+    def category(self):
+        return Category.objects.create(name='Programming', slug='programming')
+
+    @pytest.fixture
+    def course(self, category):
+        return Course.objects.create(
+            title='Python Course',
+            slug='python-course',
+            description='Learn Python',
+            category=category
+        )
+
+    @pytest.fixture
+    def other_course(self, category):
+        return Course.objects.create(
+            title='Django Course',
+            slug='django-course',
+            description='Learn Django',
+            category=category
+        )
+
+    @pytest.fixture
+    def module(self, course):
+        return Module.objects.create(course=course, title='Основы')
+
+    def create_lesson(self, module, duration=None, title='Урок'):
+        return Lesson.objects.create(
+            module=module,
+            title=title,
+            content_type='text',
+            content='Текст урока',
+            duration_minutes=duration
+        )
+
+    def test_lesson_create_and_delete(self, course, module):
+        """Тест изменения счетчиков при создании и удалении урока"""
+        lesson = self.create_lesson(module, duration=30)
+        self.create_lesson(module, duration=None)
+
+        course.refresh_from_db()
+        assert course.total_lessons == 2
+        assert course.duration == 30
+        assert course.get_total_lessons() == 2
+
+        lesson.delete()
+        course.refresh_from_db()
+        assert course.total_lessons == 1
+        assert course.duration == 0
+
+    def test_lesson_duration_change(self, course, module):
+        """Тест изменения длительности урока"""
+        lesson = self.create_lesson(module, duration=30)
+        lesson.duration_minutes = 45
+        lesson.save()
+
+        course.refresh_from_db()
+        assert course.total_lessons == 1
+        assert course.duration == 45
+
+    def test_lesson_move_between_courses(self, course, other_course, module):
+        """Тест переноса урока в модуль другого курса"""
+        lesson = self.create_lesson(module, duration=20)
+        other_module = Module.objects.create(course=other_course, title='Другой модуль')
+
+        lesson.module = other_module
+        lesson.save()
+
+        course.refresh_from_db()
+        other_course.refresh_from_db()
+        assert (course.total_lessons, course.duration) == (0, 0)
+        assert (other_course.total_lessons, other_course.duration) == (1, 20)
+
+    def test_module_move_and_delete(self, course, other_course, module):
+        """Тест переноса и удаления модуля с уроками"""
+        self.create_lesson(module, duration=10)
+        self.create_lesson(module, duration=15)
+
+        module.course = other_course
+        module.save()
+
+        course.refresh_from_db()
+        other_course.refresh_from_db()
+        assert (course.total_lessons, course.duration) == (0, 0)
+        assert (other_course.total_lessons, other_course.duration) == (2, 25)
+
+        module.delete()
+        other_course.refresh_from_db()
+        assert (other_course.total_lessons, other_course.duration) == (0, 0)
+
+    def test_recalculate_command(self, course, other_course, module):
+        """Тест сверки счетчиков командой управления"""
+        self.create_lesson(module, duration=10)
+        self.create_lesson(module, duration=5)
+        Course.objects.filter(pk__in=[course.pk, other_course.pk]).update(total_lessons=7, duration=99)
+
+        call_command('recalculate_course_counters')
+
+        course.refresh_from_db()
+        other_course.refresh_from_db()
+        assert (course.total_lessons, course.duration) == (2, 15)
+        assert (other_course.total_lessons, other_course.duration) == (0, 0)
+
+
+@pytest.mark.django_db
+class TestDebouncedStats:
+    @pytest.fixture(autouse=True)
+    def eager_celery(self):
+        app.conf.task_always_eager = True
+        yield
+        app.conf.task_always_eager = False
+
+    @pytest.fixture
+    def parent(self):
+        return Category.objects.create(name='IT', slug='it')
+
+    @pytest.fixture
+    def course(self, parent):
+        category = Category.objects.create(name='Programming', slug='programming', parent=parent)
+        return Course.objects.create(
+            title='Python Course', slug='python-course', description='Learn Python',
+            category=category, status='published'
+        )
+
+    def test_enrollment_updates_course_and_categories(self, course, parent, django_capture_on_commit_callbacks):
+        """Тест пересчета статистики курса и категорий после записи на курс"""
+        student = User.objects.create_user(email='student@example.com', password='x')
+        with django_capture_on_commit_callbacks(execute=True):
+            Enrollment.objects.create(student=student, course=course, status='completed')
+
+        course.refresh_from_db()
+        parent.refresh_from_db()
+        assert course.students_count == 1
+        assert course.completion_rate == 100
+        assert (parent.courses_count, parent.active_courses_count, parent.total_students) == (1, 1, 1)
+
+    def test_course_move_updates_both_categories(self, course, parent, django_capture_on_commit_callbacks):
+        """Тест: перенос курса пересчитывает старую и новую категорию"""
+        other = Category.objects.create(name='Design', slug='design')
+        with django_capture_on_commit_callbacks(execute=True):
+            course.category = other
+            course.save()
+
+        other.refresh_from_db()
+        old_category = Category.objects.get(slug='programming')
+        assert other.courses_count == 1
+        assert old_category.courses_count == 0
@@ -0,0 +1,119 @@
+import csv
+import gzip
+import io
+import json
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from accounts.models import User
+from courses.models import AnalyticsLog, Category, Course, CourseUserRole, Enrollment
+from courses.services.exports import ExportService
+
+
+@pytest.mark.django_db
+class TestExports:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        cache.clear()
+
+    @pytest.fixture
+    def courses(self):
+        category = Category.objects.create(name='Programming', slug='programming')
+        return [
+            Course.objects.create(title=f'course-{i}', slug=f'course-{i}', description='Описание', category=category)
+            for i in range(2)
+        ]
+
+    @pytest.fixture
+    def logs(self, courses):
+        for course in courses:
+            for event_type in ('view', 'view', 'purchase'):
+                AnalyticsLog.objects.create(course=course, event_type=event_type, data={'note': 'данные'})
+        # Старое событие вне периода
+        old = AnalyticsLog.objects.create(course=courses[0], event_type='view')
+        AnalyticsLog.objects.filter(pk=old.pk).update(timestamp=timezone.now() - timedelta(days=60))
+
+    @pytest.fixture
+    def teacher(self, courses):
+        teacher = User.objects.create_user(email='teacher@example.com', password='testpass123', role='teacher')
+        CourseUserRole.objects.create(course=courses[0], user=teacher, role='teacher')
+        return teacher
+
+    def read(self, dataset, queryset, export_format='csv', compress=False):
+        data = b''.join(ExportService.stream(dataset, queryset, export_format, compress=compress, chunk_size=2))
+        return (gzip.decompress(data) if compress else data).decode()
+
+    def test_csv(self, courses, logs):
+        """Тест выгрузки CSV с фильтрами по курсу, периоду и типу события"""
+        since = (timezone.now() - timedelta(days=1)).date().isoformat()
+        queryset = ExportService.get_queryset(
+            'analytics-logs', course_ids=[courses[0].id], date_from=since, types=['view']
+        )
+        rows = list(csv.reader(io.StringIO(self.read('analytics-logs', queryset))))
+
+        assert rows[0] == list(ExportService.DATASETS['analytics-logs']['fields'])
+        assert len(rows) == 3
+        assert {row[3] for row in rows[1:]} == {'view'}
+        assert json.loads(rows[1][6]) == {'note': 'данные'}
+
+    def test_jsonl_gzip(self, courses, logs):
+        """Тест JSONL со сжатием на лету"""
+        queryset = ExportService.get_queryset('analytics-logs')
+        lines = self.read('analytics-logs', queryset, 'jsonl', compress=True).splitlines()
+
+        assert len(lines) == 7
+        assert json.loads(lines[0])['course__slug'] == 'course-0'
+
+    def test_invalid_date(self):
+        with pytest.raises(ValidationError):
+            ExportService.get_queryset('enrollments', date_from='вчера')
+
+    def test_stream_is_chunked(self, courses, logs, monkeypatch):
+        """Тест выдачи по частям, а не одним куском"""
+        monkeypatch.setattr(ExportService, 'CHUNK_BYTES', 64)
+        chunks = list(ExportService.stream('analytics-logs', ExportService.get_queryset('analytics-logs')))
+        assert len(chunks) > 1
+
+    def test_api_permissions(self, courses, logs, teacher):
+        """Тест выгрузки только по курсам с правом просмотра аналитики"""
+        client = APIClient()
+        url = reverse('course-export', args=['analytics-logs'])
+        assert client.get(url).status_code == 401
+
+        client.force_authenticate(teacher)
+        response = client.get(url, {'output': 'jsonl'})
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'application/x-ndjson'
+        assert 'attachment; filename="analytics-logs-' in response['Content-Disposition']
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        assert {row['course_id'] for row in rows} == {courses[0].id}
+
+        assert client.get(url, {'course': courses[1].id}).status_code == 403
+        assert client.get(reverse('course-export', args=['unknown'])).status_code == 404
+
+    def test_api_enrollments_gzip(self, courses, teacher):
+        student = User.objects.create_user(email='student@example.com', password='testpass123')
+        Enrollment.objects.create(student=student, course=courses[0], status='completed')
+        client = APIClient()
+        client.force_authenticate(teacher)
+
+        response = client.get(reverse('course-export', args=['enrollments']), {'gzip': '1', 'status': 'completed'})
+
+        assert response['Content-Type'] == 'application/gzip'
+        rows = list(csv.DictReader(io.StringIO(gzip.decompress(b''.join(response.streaming_content)).decode())))
+        assert [row['student__email'] for row in rows] == ['student@example.com']
+
+    def test_command(self, courses, logs, tmp_path):
+        output = tmp_path / 'logs.jsonl'
+        call_command(
+            'export_data', 'analytics-logs', '--format', 'jsonl', '--type', 'purchase',
+            '--course', str(courses[1].id), '-o', str(output), stdout=io.StringIO()
+        )
+        lines = output.read_text().splitlines()
+        assert len(lines) == 1 and json.loads(lines[0])['event_type'] == 'purchase'
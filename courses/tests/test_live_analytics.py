@@ -0,0 +1,153 @@
+import asyncio
+import json
+from decimal import Decimal
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.cache import cache
+from django.test import AsyncClient
+from django.urls import reverse
+from rest_framework.test import APIClient
+from accounts.models import User
+from courses.models import AnalyticsLog, Category, Course, CourseAnalytics, CourseUserRole
+from courses.services import live_analytics
+from courses.services.live_analytics import LiveAnalyticsHub
+
+
+class TestDeltas:
+    def test_event_delta(self):
+        assert live_analytics.event_delta('view') == {'views': 1}
+        assert live_analytics.event_delta('rate', {'rating': 4}) == {'ratings': 1, 'rating_sum': 4}
+        assert live_analytics.event_delta('purchase', {'amount': Decimal('9.90')}) == {'revenue': Decimal('9.90')}
+
+    def test_merge_and_encode(self):
+        """Тест склейки дельт и их передачи через JSON"""
+        delta = live_analytics.merge_delta({'views': 1}, {'views': 2, 'revenue': Decimal('1.10')})
+        delta = live_analytics.decode_delta(live_analytics.encode_delta(delta))
+        assert live_analytics.merge_delta(delta, {'revenue': '0.90'}) == {'views': 3, 'revenue': Decimal('2.00')}
+
+
+class TestLiveAnalyticsHub:
+    def test_coalescing(self):
+        """Тест рассылки не чаще одного сообщения за интервал"""
+        async def scenario():
+            hub = LiveAnalyticsHub(asyncio.get_running_loop(), interval=0.2)
+            first, second = await hub.subscribe(1), await hub.subscribe(1)
+
+            hub.dispatch(1, {'views': 1})
+            hub.dispatch(1, {'views': 1, 'revenue': Decimal('5')})
+            hub.dispatch(2, {'views': 1})  # курс без подписчиков
+            assert await first.get(timeout=1) == {'views': 2, 'revenue': Decimal('5')}
+            assert await second.get(timeout=1) == {'views': 2, 'revenue': Decimal('5')}
+
+            hub.dispatch(1, {'completions': 1})
+            hub.dispatch(1, {'completions': 1})
+            # Следующее сообщение - только после интервала, одной дельтой
+            assert await first.get(timeout=0.05) is None
+            assert await first.get(timeout=1) == {'completions': 2}
+
+            await hub.unsubscribe(first)
+            await hub.unsubscribe(second)
+            assert not hub.subscribers and not hub.flush_handles
+
+        async_to_sync(scenario)()
+
+
+@pytest.mark.django_db
+class TestAnalyticsStream:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        cache.clear()
+
+    @pytest.fixture
+    def course(self):
+        category = Category.objects.create(name='Programming', slug='programming')
+        return Course.objects.create(title='Python', slug='python', description='Описание', category=category)
+
+    @pytest.fixture
+    def teacher(self, course):
+        teacher = User.objects.create_user(email='teacher@example.com', password='testpass123', role='teacher')
+        CourseUserRole.objects.create(course=course, user=teacher, role='teacher')
+        return teacher
+
+    def test_requires_permission(self, client, course):
+        url = reverse('async_api:course-analytics-stream', args=['python'])
+        assert client.get(url).status_code == 401
+
+        client.force_login(User.objects.create_user(email='student@example.com', password='testpass123'))
+        assert client.get(url).status_code == 403
+
+    def test_stream(self, course, teacher, settings, django_capture_on_commit_callbacks):
+        """Тест снимка и дельты, опубликованной путем приема событий"""
+        settings.LIVE_ANALYTICS = {'REDIS_URL': None, 'COALESCE_SECONDS': 0.05}
+        client = AsyncClient()
+        client.force_login(teacher)
+
+        def ingest():
+            with django_capture_on_commit_callbacks(execute=True):
+                live_analytics.publish(course.id, live_analytics.event_delta('purchase', {'amount': Decimal('10')}))
+                live_analytics.publish(course.id, live_analytics.event_delta('view'))
+
+        async def scenario():
+            response = await client.get(reverse('async_api:course-analytics-stream', args=['python']))
+            assert response['Content-Type'] == 'text/event-stream'
+
+            events = aiter(response.streaming_content)
+            snapshot = (await anext(events)).decode()
+            assert 'event: snapshot' in snapshot and '"views_count": 0' in snapshot
+
+            await sync_to_async(ingest)()
+            # Первая дельта простаивающего курса уходит сразу, остальные склеиваются
+            received = {}
+            while received != {'views': 1, 'revenue': Decimal('10')}:
+                event, data = (await anext(events)).decode().split('\n')[:2]
+                assert event == 'event: delta'
+                payload = json.loads(data[len('data: '):])
+                assert payload.pop('course') == course.id
+                live_analytics.merge_delta(received, payload)
+            await events.aclose()
+
+        async_to_sync(scenario)()
+
+    def test_ingest_reaches_stream(self, course, teacher, settings, django_capture_on_commit_callbacks):
+        """Тест доставки подписчику события, принятого через API"""
+        settings.LIVE_ANALYTICS = {'REDIS_URL': None, 'COALESCE_SECONDS': 0.05}
+        client = AsyncClient()
+        client.force_login(teacher)
+        api_client = APIClient()
+        api_client.force_authenticate(User.objects.create_user(email='student@example.com', password='testpass123'))
+
+        def ingest():
+            with django_capture_on_commit_callbacks(execute=True):
+                response = api_client.post(
+                    reverse('course-analytics-events', args=['python']), {'event_type': 'view'}, format='json'
+                )
+            assert response.status_code == 202
+
+        async def scenario():
+            response = await client.get(reverse('async_api:course-analytics-stream', args=['python']))
+            events = aiter(response.streaming_content)
+            await anext(events)  # снимок
+
+            await sync_to_async(ingest)()
+            event, data = (await anext(events)).decode().split('\n')[:2]
+            assert event == 'event: delta'
+            assert json.loads(data[len('data: '):]) == {'course': course.id, 'views': 1}
+            await events.aclose()
+
+        async_to_sync(scenario)()
+        assert CourseAnalytics.objects.get(course=course).views_count == 1
+
+    def test_ingest_permissions(self, course):
+        """Тест приема от пользователей только просмотров"""
+        url = reverse('course-analytics-events', args=['python'])
+        client = APIClient()
+        assert client.post(url, {'event_type': 'view'}, format='json').status_code == 401
+
+        client.force_authenticate(User.objects.create_user(email='student@example.com', password='testpass123'))
+        assert client.post(url, {'event_type': 'purchase', 'amount': '10'}, format='json').status_code == 403
+        assert client.post(url, {'event_type': 'rate'}, format='json').status_code == 400
+
+        client.force_authenticate(User.objects.create_user(email='staff@example.com', password='testpass123', is_staff=True))
+        assert client.post(url, {'event_type': 'purchase', 'amount': '10.50'}, format='json').status_code == 202
+        assert AnalyticsLog.objects.get(course=course).data == {'event_type': 'purchase', 'amount': '10.50'}
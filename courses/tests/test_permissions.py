@@ -0,0 +1,112 @@
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient, APIRequestFactory
+from accounts.models import User
+from courses.api.analytics import CourseAnalyticsViewSet
+from courses.models import AnalyticsLog, Course, CourseAnalytics, Category, CourseUserRole, Enrollment
+from courses.permissions import IsTeacherOrReadOnly
+from courses.services import CoursePermissionService
+
+
+@pytest.mark.django_db
+class TestCoursePermissionService:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        cache.clear()
+
+    @pytest.fixture
+    def category(self):
+        return Category.objects.create(name='Programming', slug='programming')
+
+    @pytest.fixture
+    def teacher(self):
+        return User.objects.create_user(email='teacher@example.com', password='testpass123', role='teacher')
+
+    def create_course(self, category, slug):
+        return Course.objects.create(title=slug, slug=slug, description='Описание', category=category)
+
+    def test_encode(self):
+        """Тест кодирования прав роли в битовую маску"""
+        mask = CoursePermissionService.encode(CourseUserRole.DEFAULT_PERMISSIONS['assistant'])
+        assert CoursePermissionService.decode(mask) == ['can_manage_students']
+
+    def test_permission_map(self, category, teacher, django_assert_num_queries):
+        """Тест загрузки всех ролей пользователя одним запросом"""
+        courses = [self.create_course(category, f'course-{i}') for i in range(3)]
+        CourseUserRole.objects.create(course=courses[0], user=teacher, role='teacher')
+        CourseUserRole.objects.create(course=courses[1], user=teacher, role='assistant')
+
+        with django_assert_num_queries(1):
+            for course in courses:
+                CoursePermissionService.has_permission(teacher, course.id, 'can_edit_content')
+
+        assert CoursePermissionService.has_permission(teacher, courses[0].id, 'can_view_analytics')
+        assert not CoursePermissionService.has_permission(teacher, courses[1].id, 'can_edit_content')
+        assert set(CoursePermissionService.get_course_ids(teacher, 'can_manage_students')) == {
+            courses[0].id, courses[1].id
+        }
+
+    def test_invalidation(self, category, teacher):
+        """Тест сброса кэшированной карты при изменении ролей"""
+        course = self.create_course(category, 'course')
+        assert CoursePermissionService.get_permission_map(teacher) == {}
+
+        CourseUserRole.objects.create(course=course, user=teacher, role='teacher')
+        # Новый запрос - новый объект пользователя
+        teacher = User.objects.get(pk=teacher.pk)
+        assert CoursePermissionService.has_permission(teacher, course.id, 'can_edit_content')
+
+    def test_is_teacher_or_read_only(self, category, teacher):
+        """Тест проверки права редактирования курса преподавателем"""
+        own = self.create_course(category, 'own')
+        other = self.create_course(category, 'other')
+        CourseUserRole.objects.create(course=own, user=teacher, role='teacher')
+
+        request = APIRequestFactory().patch('/')
+        request.user = teacher
+        permission = IsTeacherOrReadOnly()
+
+        assert permission.has_object_permission(request, None, own)
+        assert not permission.has_object_permission(request, None, other)
+
+    def test_analytics_access(self, category, teacher):
+        """Тест: аналитику видят роли с can_view_analytics, записанные студенты - нет"""
+        course = self.create_course(category, 'course')
+        CourseUserRole.objects.create(course=course, user=teacher, role='teacher')
+        student = User.objects.create_user(email='student@example.com', password='testpass123')
+        Enrollment.objects.create(student=student, course=course)
+        client = APIClient()
+
+        client.force_authenticate(teacher)
+        response = client.get('/api/analytics/course-analytics/')
+        assert [item['course_slug'] for item in response.data['results']] == [course.slug]
+
+        client.force_authenticate(student)
+        assert client.get('/api/analytics/course-analytics/').data['results'] == []
+        assert client.get(f'/api/analytics/course-analytics/{course.slug}/').status_code == 404
+
+    def test_course_analytics_viewset(self, category, teacher):
+        """Тест прав и месячной статистики CourseAnalyticsViewSet"""
+        own = self.create_course(category, 'own')
+        other = self.create_course(category, 'other')
+        CourseUserRole.objects.create(course=own, user=teacher, role='teacher')
+        CourseAnalytics.objects.filter(course=own).update(views_count=3)
+        own_analytics, other_analytics = CourseAnalytics.objects.get(course=own), CourseAnalytics.objects.get(course=other)
+        AnalyticsLog.objects.create(course=own, event_type='view', data={'event_type': 'view'})
+        AnalyticsLog.objects.create(course=own, event_type='rate', data={'event_type': 'rate', 'rating': 4})
+        factory = APIRequestFactory()
+
+        def call(actions, pk=None):
+            request = factory.get(f'/course-analytics/{pk}/' if pk else '/course-analytics/')
+            request.user = teacher
+            kwargs = {'pk': pk} if pk else {}
+            return CourseAnalyticsViewSet.as_view(actions)(request, **kwargs)
+
+        response = call({'get': 'list'})
+        assert [(item['course'], item['monthly_views']) for item in response.data['results']] == [(own.pk, 1)]
+
+        response = call({'get': 'analytics'}, own_analytics.pk)
+        assert response.status_code == 200
+        assert response.data['views_count'] == 3
+        assert response.data['monthly_rating'] == 4
+        assert call({'get': 'analytics'}, other_analytics.pk).status_code == 404
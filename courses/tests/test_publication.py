@@ -0,0 +1,112 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from accounts.models import User
+from core.models import OutboxEvent
+from courses import events
+from courses.models import Course, Category, CourseUserRole, Module, Lesson
+from courses.services.publication import CoursePublicationService
+
+
+@pytest.mark.django_db
+class TestCoursePublication:
+    @pytest.fixture
+    def category(self):
+        return Category.objects.create(name='Programming', slug='programming')
+
+    @pytest.fixture
+    def teacher(self):
+        return User.objects.create_user(email='teacher@example.com', password='testpass123', role='teacher')
+
+    def create_course(self, category, teacher, slug, ready=True):
+        course = Course.objects.create(
+            title=slug,
+            slug=slug,
+            description='Описание курса',
+            category=category,
+            status='review',
+            cover_image='courses/covers/cover.png' if ready else ''
+        )
+        if ready:
+            module = Module.objects.create(course=course, title='Основы')
+            Lesson.objects.create(module=module, title='Урок', content_type='text', content='Текст')
+            CourseUserRole.objects.create(course=course, user=teacher, role='teacher', is_primary=True)
+        return course
+
+    def test_errors(self, category, teacher):
+        """Тест причин отказа по каждому курсу"""
+        ready = self.create_course(category, teacher, 'ready')
+        empty = self.create_course(category, teacher, 'empty', ready=False)
+        published = self.create_course(category, teacher, 'published')
+        Course.objects.filter(pk=published.pk).update(status='published')
+
+        errors = CoursePublicationService.get_errors([ready.pk, empty.pk, published.pk, 999999])
+
+        assert errors[ready.pk] == []
+        assert errors[empty.pk] == ['no_modules', 'no_lessons', 'no_cover', 'no_primary_teacher']
+        assert errors[published.pk] == ['already_published']
+        assert errors[999999] == ['not_found']
+
+    def test_queries_do_not_depend_on_batch_size(self, category, teacher):
+        """Тест: число запросов проверки не растет с числом курсов"""
+        courses = [self.create_course(category, teacher, f'course-{i}') for i in range(6)]
+
+        def count_queries(course_ids):
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                CoursePublicationService.get_errors(course_ids)
+            return len(queries)
+
+        assert count_queries([course.pk for course in courses]) == count_queries([courses[0].pk]) <= 2
+
+    def test_publish(self, category, teacher):
+        """Тест публикации готовых курсов и событий outbox одной пачкой"""
+        ready = [self.create_course(category, teacher, f'ready-{i}') for i in range(3)]
+        draft = self.create_course(category, teacher, 'draft', ready=False)
+        OutboxEvent.objects.all().delete()
+
+        result = CoursePublicationService.publish([course.pk for course in ready] + [draft.pk])
+
+        assert sorted(result['published']) == sorted(course.pk for course in ready)
+        assert list(result['failed']) == [draft.pk]
+        assert set(Course.objects.filter(status='published').values_list('pk', flat=True)) == set(result['published'])
+        assert not Course.objects.filter(status='published', published_at__isnull=True).exists()
+        published = Course.objects.filter(status='published').values_list('published_at', 'updated_at')
+        assert all(updated_at == published_at for published_at, updated_at in published)
+
+        payloads = OutboxEvent.objects.filter(event_type=events.COURSE_CHANGED).values_list('payload', flat=True)
+        assert sorted(payload['course_id'] for payload in payloads) == sorted(result['published'])
+
+    def test_dry_run(self, category, teacher):
+        """Тест: при dry_run курсы только проверяются"""
+        course = self.create_course(category, teacher, 'ready')
+
+        result = CoursePublicationService.publish([course.pk], dry_run=True)
+
+        assert result == {'published': [course.pk], 'failed': {}}
+        course.refresh_from_db()
+        assert course.status == 'review'
+
+    def test_api(self, category, teacher):
+        """Тест эндпоинта пакетной публикации"""
+        course = self.create_course(category, teacher, 'ready')
+        draft = self.create_course(category, teacher, 'draft', ready=False)
+        client = APIClient()
+
+        client.force_authenticate(teacher)
+        response = client.post('/api/courses/courses/publish-batch/', {'course_ids': [course.pk]}, format='json')
+        assert response.status_code == 403
+
+        editor = User.objects.create_user(email='editor@example.com', password='testpass123', is_staff=True)
+        client.force_authenticate(editor)
+        response = client.post(
+            '/api/courses/courses/publish-batch/',
+            {'course_ids': [course.pk, draft.pk]},
+            format='json'
+        )
+
+        assert response.status_code == 200
+        assert response.data['published'] == [course.pk]
+        assert response.data['failed'][draft.pk][0] == {'code': 'no_modules', 'message': 'Нет ни одного модуля'}
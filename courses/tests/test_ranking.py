@@ -0,0 +1,91 @@
+import pytest
+import numpy as np
+from datetime import timedelta
+from django.utils import timezone
+from accounts.models import User
+from courses.models import Course, Category, Enrollment, Review
+from courses.services.course_manager import CourseManager
+from courses.services.ranking import CourseRankingService
+from courses.tasks import update_course_rank_scores
+
+
+class TestRankingMath:
+    def test_bayesian_rating_shrinks_to_global_mean(self):
+        """Тест байесовского сглаживания рейтинга"""
+        rating_sum = np.array([5.0, 400.0, 0.0])
+        reviews_count = np.array([1.0, 100.0, 0.0])
+
+        rating = CourseRankingService.bayesian_rating(rating_sum, reviews_count, prior_weight=10)
+
+        global_mean = 405 / 101
+        # Единственная оценка «5» стягивается к глобальному среднему
+        assert global_mean < rating[0] < 4.2
+        # Курс с сотней отзывов почти не меняется
+        assert rating[1] == pytest.approx(4.0, abs=0.01)
+        # Курс без отзывов получает глобальное среднее
+        assert rating[2] == pytest.approx(global_mean)
+
+    def test_decayed_velocity(self):
+        """Тест затухания скорости записей с периодом полураспада"""
+        velocity = CourseRankingService.decayed_velocity(
+            index=np.array([1, 2]),
+            bucket_course_ids=np.array([1, 1, 2]),
+            bucket_ages=np.array([0.0, 14.0, 28.0]),
+            bucket_counts=np.array([2.0, 2.0, 4.0]),
+            half_life_days=14,
+            size=2
+        )
+        assert velocity.tolist() == pytest.approx([3.0, 1.0])
+
+
+@pytest.mark.django_db
+class TestCourseRankScores:
+    @pytest.fixture
+    def category(self):
+        return Category.objects.create(name='Programming', slug='programming')
+
+    def create_course(self, category, slug):
+        return Course.objects.create(
+            title=slug,
+            slug=slug,
+            description='Описание',
+            category=category,
+            status='published'
+        )
+
+    def test_update_rank_scores(self, category):
+        """Тест пакетного пересчета rank_score"""
+        hot = self.create_course(category, 'hot')
+        cold = self.create_course(category, 'cold')
+        old_date = timezone.now() - timedelta(days=60)
+
+        for i in range(5):
+            student = User.objects.create_user(email=f'student{i}@example.com', password='testpass123')
+            Enrollment.objects.create(student=student, course=hot)
+            Review.objects.create(course=hot, user=student, rating=5, text='Отлично')
+            old = Enrollment.objects.create(student=student, course=cold)
+            Enrollment.objects.filter(pk=old.pk).update(enrolled_at=old_date)
+
+        result = update_course_rank_scores()
+
+        assert result == {'status': 'success', 'updated_courses': 2}
+        hot.refresh_from_db()
+        cold.refresh_from_db()
+        assert hot.rank_score > cold.rank_score > 0
+        assert list(Course.objects.filter(status='published').order_by('-rank_score')) == [hot, cold]
+
+    def test_update_rank_scores_resets_popular_cache(self, category):
+        """Тест: после пересчета кэш популярных курсов сбрасывается и по категориям"""
+        course = self.create_course(category, 'course')
+        assert CourseManager.get_popular_courses() == [course]
+        assert CourseManager.get_popular_courses(category) == [course]
+        Course.objects.filter(pk=course.pk).update(status='archived')
+
+        update_course_rank_scores()
+
+        assert CourseManager.get_popular_courses() == []
+        assert CourseManager.get_popular_courses(category) == []
+
+    def test_update_rank_scores_empty(self):
+        """Тест пересчета без курсов"""
+        assert CourseRankingService.update_scores() == 0
@@ -0,0 +1,70 @@
+import pytest
+from decimal import Decimal
+from accounts.models import User
+from courses.models import Course, Category, Review
+
+
+@pytest.mark.django_db
+class TestCourseRatingStats:
+    @pytest.fixture
+    def course(self):
+        category = Category.objects.create(name='Programming', slug='programming')
+        return Course.objects.create(
+            title='Python Course',
+            slug='python-course',
+            description='Learn Python',
+            category=category
+        )
+
+    @pytest.fixture
+    def students(self):
+        return [
+            User.objects.create_user(email=f'student{i}@example.com', password='testpass123')
+            for i in range(3)
+        ]
+
+    def create_review(self, course, user, rating):
+        return Review.objects.create(course=course, user=user, rating=rating, text='Отзыв')
+
+    def test_review_create(self, course, students):
+        """Тест инкрементального обновления статистики при создании отзывов"""
+        for student, rating in zip(students, [5, 4, 4]):
+            self.create_review(course, student, rating)
+
+        course.refresh_from_db()
+        assert course.reviews_count == 3
+        assert course.rating_sum == 13
+        assert course.average_rating == Decimal('4.33')
+        assert course.get_rating_distribution() == {'5': 1, '4': 2, '3': 0, '2': 0, '1': 0}
+
+    def test_review_update_and_delete(self, course, students):
+        """Тест изменения оценки и удаления отзыва"""
+        review = self.create_review(course, students[0], 2)
+        self.create_review(course, students[1], 4)
+
+        review.rating = 5
+        review.save()
+        course.refresh_from_db()
+        assert course.rating_sum == 9
+        assert course.rating_2_count == 0
+        assert course.rating_5_count == 1
+        assert course.average_rating == Decimal('4.50')
+
+        review.delete()
+        course.refresh_from_db()
+        assert course.reviews_count == 1
+        assert course.rating_sum == 4
+        assert course.rating_5_count == 0
+        assert course.average_rating == Decimal('4.00')
+
+    def test_update_rating_stats_recalculates(self, course, students):
+        """Тест полного пересчета статистики после рассинхронизации"""
+        self.create_review(course, students[0], 3)
+        Course.objects.filter(pk=course.pk).update(reviews_count=10, rating_sum=0, rating_3_count=0)
+
+        course.update_rating_stats()
+        course.refresh_from_db()
+        assert course.reviews_count == 1
+        assert course.rating_sum == 3
+        assert course.rating_3_count == 1
+        assert course.average_rating == Decimal('3.00')
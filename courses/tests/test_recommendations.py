@@ -0,0 +1,91 @@
+import pytest
+import numpy as np
+from scipy import sparse
+from django.core.cache import cache
+from accounts.models import User
+from courses.models import Course, Category, Enrollment, CourseRecommendation
+from courses.services import RecommendationService
+from courses.tasks import train_course_recommendations
+
+
+class TestRecommendationMath:
+    def test_item_similarity_prunes_neighbors(self):
+        """Тест отсечения косинусной похожести до ближайших соседей"""
+        matrix = sparse.csr_matrix(np.array([
+            [1.0, 1.0, 0.0, 1.0],
+            [1.0, 1.0, 0.0, 0.0],
+            [0.0, 0.0, 1.0, 1.0],
+        ]))
+        similarity = RecommendationService.item_similarity(matrix, neighbors=1).toarray()
+
+        # Диагональ обнулена, у каждого курса остается не больше одного соседа
+        assert np.all(np.diag(similarity) == 0)
+        assert (similarity > 0).sum(axis=1).max() == 1
+        assert similarity[0, 1] == pytest.approx(1.0)
+
+    def test_top_n(self):
+        """Тест выбора лучших столбцов по убыванию"""
+        columns, values = RecommendationService.top_n(np.array([[0.1, 0.9, 0.5, 0.0]]), 2)
+        assert columns.tolist() == [[1, 2]]
+        assert values.tolist() == [[0.9, 0.5]]
+
+
+@pytest.mark.django_db
+class TestRecommendations:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        cache.clear()
+
+    @pytest.fixture
+    def category(self):
+        return Category.objects.create(name='Programming', slug='programming')
+
+    def create_course(self, category, slug, status='published'):
+        return Course.objects.create(
+            title=slug,
+            slug=slug,
+            description='Описание',
+            category=category,
+            status=status
+        )
+
+    def test_train_and_recommend(self, category):
+        """Тест обучения и выдачи персональных рекомендаций"""
+        python = self.create_course(category, 'python')
+        django = self.create_course(category, 'django')
+        draft = self.create_course(category, 'draft', status='draft')
+
+        students = [
+            User.objects.create_user(email=f'student{i}@example.com', password='testpass123')
+            for i in range(3)
+        ]
+        for student in students[:2]:
+            Enrollment.objects.create(student=student, course=python)
+            Enrollment.objects.create(student=student, course=django)
+            Enrollment.objects.create(student=student, course=draft)
+        Enrollment.objects.create(student=students[2], course=python)
+
+        result = train_course_recommendations()
+        assert result['status'] == 'success'
+
+        # Уже знакомые и неопубликованные курсы не рекомендуются
+        assert list(
+            CourseRecommendation.objects.filter(user=students[2]).values_list('course_id', flat=True)
+        ) == [django.id]
+        assert RecommendationService.get_recommendations(students[2], limit=1) == [django]
+
+    def test_fallback_to_popular(self, category):
+        """Тест запасного варианта по rank_score для нового студента"""
+        popular = self.create_course(category, 'popular')
+        enrolled = self.create_course(category, 'enrolled')
+        Course.objects.filter(pk=enrolled.pk).update(rank_score=1.0)
+        Course.objects.filter(pk=popular.pk).update(rank_score=0.5)
+
+        student = User.objects.create_user(email='new@example.com', password='testpass123')
+        Enrollment.objects.create(student=student, course=enrolled)
+
+        assert RecommendationService.get_recommendations(student) == [popular]
+
+    def test_train_without_interactions(self):
+        """Тест обучения на пустых данных"""
+        assert RecommendationService.train() == 0
@@ -0,0 +1,88 @@
+import pytest
+import numpy as np
+from accounts.models import User
+from courses.models import Course, Category, Tag, Enrollment, RelatedCourse
+from courses.services import CourseManager
+from courses.services.related import RelatedCoursesService
+from courses.tasks import rebuild_related_courses
+
+
+class TestJaccard:
+    def test_jaccard(self):
+        """Тест коэффициента Жаккара на разреженной матрице"""
+        ids = np.array([1, 2, 3])
+        matrix = RelatedCoursesService.incidence_matrix(
+            [(1, 10), (1, 11), (2, 11), (2, 12), (3, 13), (1, 10)],
+            ids
+        )
+        scores = RelatedCoursesService.jaccard(matrix, np.array([0])).toarray()[0]
+        # {10, 11} и {11, 12}: пересечение 1, объединение 3
+        assert scores.tolist() == pytest.approx([1.0, 1 / 3, 0.0])
+
+
+@pytest.mark.django_db
+class TestRelatedCourses:
+    @pytest.fixture
+    def category(self):
+        return Category.objects.create(name='Programming', slug='programming')
+
+    @pytest.fixture
+    def other_category(self):
+        return Category.objects.create(name='Design', slug='design')
+
+    def create_course(self, category, slug, status='published'):
+        return Course.objects.create(
+            title=slug,
+            slug=slug,
+            description='Описание',
+            category=category,
+            status=status
+        )
+
+    def test_rebuild_and_read(self, category, other_category):
+        """Тест пересчета таблицы похожих курсов и чтения из нее"""
+        python = self.create_course(category, 'python')
+        django = self.create_course(category, 'django')
+        figma = self.create_course(other_category, 'figma')
+        draft = self.create_course(category, 'draft', status='draft')
+
+        tag = Tag.objects.create(name='Backend', slug='backend')
+        python.tags.add(tag)
+        django.tags.add(tag)
+        draft.tags.add(tag)
+
+        student = User.objects.create_user(email='student@example.com', password='testpass123')
+        Enrollment.objects.create(student=student, course=python)
+        Enrollment.objects.create(student=student, course=figma)
+
+        result = rebuild_related_courses()
+        assert result['status'] == 'success'
+
+        related = list(
+            RelatedCourse.objects.filter(course=python).values_list('related_course__slug', flat=True)
+        )
+        # Черновики и сам курс не попадают в список
+        assert related == ['django', 'figma']
+        assert CourseManager.get_related_courses(python, limit=1) == [django]
+
+    def test_incremental_rebuild(self, category):
+        """Тест инкрементального пересчета для отдельных курсов"""
+        first = self.create_course(category, 'first')
+        second = self.create_course(category, 'second')
+        RelatedCoursesService.rebuild()
+        assert RelatedCourse.objects.count() == 2
+
+        third = self.create_course(category, 'third')
+        RelatedCoursesService.rebuild([third.id])
+
+        assert RelatedCourse.objects.filter(course=first).count() == 1
+        assert set(
+            RelatedCourse.objects.filter(course=third).values_list('related_course', flat=True)
+        ) == {first.id, second.id}
+
+    def test_fallback_without_precomputed(self, category):
+        """Тест выдачи курсов категории до первого пересчета"""
+        first = self.create_course(category, 'first')
+        second = self.create_course(category, 'second')
+
+        assert CourseManager.get_related_courses(first) == [second]
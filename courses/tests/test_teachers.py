@@ -0,0 +1,68 @@
+import pytest
+from django.core.cache import cache
+from accounts.models import User
+from courses.api.serializers import CourseListSerializer
+from courses.models import Course, Category, CourseUserRole
+from courses.services import TeacherLoader
+
+
+@pytest.mark.django_db
+class TestTeacherLoader:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        cache.clear()
+
+    @pytest.fixture
+    def category(self):
+        return Category.objects.create(name='Programming', slug='programming')
+
+    @pytest.fixture
+    def courses(self, category):
+        courses = [
+            Course.objects.create(title=f'course-{i}', slug=f'course-{i}', description='Описание', category=category)
+            for i in range(3)
+        ]
+        for i, course in enumerate(courses[:2]):
+            teacher = User.objects.create_user(email=f'teacher{i}@example.com', password='testpass123', role='teacher')
+            CourseUserRole.objects.create(course=course, user=teacher, role='teacher', is_primary=True)
+        return courses
+
+    def test_batch_load(self, courses, django_assert_num_queries):
+        """Тест загрузки основных преподавателей всех курсов одним запросом"""
+        ids = [course.id for course in courses]
+        with django_assert_num_queries(1):
+            primary = TeacherLoader().load_primary_teachers(ids)
+
+        assert primary[courses[0].id].user.email == 'teacher0@example.com'
+        assert primary[courses[2].id] is None
+
+        # Повторная загрузка (в том числе курса без преподавателя) идет из кэша
+        with django_assert_num_queries(0):
+            assert TeacherLoader().load_primary_teachers(ids) == primary
+
+    def test_get_teachers_returns_list(self, courses):
+        """Тест одинакового типа результата при промахе и попадании в кэш"""
+        first = courses[0].get_teachers()
+        second = courses[0].get_teachers()
+
+        assert isinstance(first, list) and first == second
+        assert [teacher.email for teacher in first] == ['teacher0@example.com']
+
+    def test_invalidation_on_role_change(self, courses):
+        """Тест сброса кэша при изменении ролей курса"""
+        assert courses[2].get_primary_teacher() is None
+
+        teacher = User.objects.create_user(email='new@example.com', password='testpass123', role='teacher')
+        CourseUserRole.objects.create(course=courses[2], user=teacher, role='teacher', is_primary=True)
+
+        assert courses[2].get_primary_teacher().user == teacher
+
+    def test_list_serializer(self, courses, django_assert_max_num_queries):
+        """Тест пакетной загрузки преподавателей при сериализации списка"""
+        courses = list(Course.objects.prefetch_related('tags').select_related('category').order_by('id'))
+        # 1 запрос на преподавателей для всего списка вне зависимости от числа курсов
+        with django_assert_max_num_queries(1):
+            data = CourseListSerializer(courses, many=True).data
+
+        assert data[0]['teacher']['user']['email'] == 'teacher0@example.com'
+        assert data[2]['teacher'] is None
@@ -13,6 +13,7 @@ from .serializers import (
 )
 from .filters import CourseFilter
 from .permissions import IsTeacherOrReadOnly
+from .services import CourseManager, RecommendationService
 
 class CourseViewSet(viewsets.ModelViewSet):
     """API endpoint для работы с курсами"""
@@ -31,19 +32,35 @@ class CourseViewSet(viewsets.ModelViewSet):
         'created_at', 
         'average_rating',
         'students_count',
-        'duration'
+        'duration',
+        'rank_score'
     ]
+    ordering = ['-rank_score']
     
     @action(detail=False, methods=['get'])
     def recommended(self, request):
         """Получение рекомендованных курсов"""
+        # ?for=me - персональные рекомендации из предвычисленной таблицы
+        if request.query_params.get('for') == 'me' and request.user.is_authenticated:
+            courses = RecommendationService.get_recommendations(request.user)
+            serializer = self.get_serializer(courses, many=True)
+            return Response(serializer.data)
+
+        # rank_score уже учитывает сглаженный рейтинг, поэтому отсечка по рейтингу не нужна
         queryset = self.get_queryset().filter(
-            status='published',
-            average_rating__gte=4.0
-        ).order_by('-average_rating')[:10]
+            status='published'
+        ).order_by('-rank_score')[:10]
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
     
+    @action(detail=True, methods=['get'])
+    def related(self, request, pk=None):
+        """Получение похожих курсов из предвычисленного списка"""
+        course = self.get_object()
+        courses = CourseManager.get_related_courses(course)
+        serializer = self.get_serializer(courses, many=True)
+        return Response(serializer.data)
+    
     @action(detail=False, methods=['get'])
     def price_ranges(self, request):
         """Получение диапазонов цен"""
@@ -68,7 +85,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
         courses = Course.objects.filter(
             category=category,
             status='published'
-        )
+        ).order_by('-rank_score')
         serializer = CourseSerializer(courses, many=True)
         return Response(serializer.data)
 
@@ -0,0 +1,18 @@
+"""
+Асинхронные (ASGI) эндпоинты чтения: /api/async/...
+Под WSGI они тоже работают, но выигрыш дают только под ASGI-сервером
+"""
+from django.urls import path
+from accounts.api import async_views as accounts_views
+from courses.api import async_views as courses_views
+
+app_name = 'async_api'
+
+urlpatterns = [
+    path('courses/', courses_views.course_list, name='course-list'),
+    path('courses/<slug:slug>/', courses_views.course_detail, name='course-detail'),
+    path('courses/<slug:slug>/analytics/', courses_views.course_analytics, name='course-analytics'),
+    path('courses/<slug:slug>/analytics/stream/', courses_views.course_analytics_stream,
+         name='course-analytics-stream'),
+    path('teachers/<str:custom_url>/', accounts_views.teacher_profile, name='teacher-profile'),
+]
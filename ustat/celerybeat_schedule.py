@@ -1,6 +1,18 @@
 from celery.schedules import crontab
 
 CELERYBEAT_SCHEDULE = {
+    # Доставка событий outbox, если relay не был разбужен после коммита
+    'relay-outbox': {
+        'task': 'core.tasks.relay_outbox',
+        'schedule': crontab(),
+    },
+    
+    # Удаление обработанных событий outbox каждый день в 3:30 ночи
+    'purge-outbox': {
+        'task': 'core.tasks.purge_outbox',
+        'schedule': crontab(minute=30, hour=3),
+    },
+    
     # Обновление аналитики каждый час
     'update-course-analytics': {
         'task': 'courses.tasks.update_course_analytics',
@@ -14,6 +26,24 @@ CELERYBEAT_SCHEDULE = {
         'kwargs': {'days': 90},
     },
     
+    # Пересчет оценок ранжирования каталога каждые 30 минут
+    'update-course-rank-scores': {
+        'task': 'courses.tasks.update_course_rank_scores',
+        'schedule': crontab(minute='*/30'),
+    },
+    
+    # Пересчет похожих курсов каждый день в 2 часа ночи
+    'rebuild-related-courses': {
+        'task': 'courses.tasks.rebuild_related_courses',
+        'schedule': crontab(minute=0, hour=2),
+    },
+    
+    # Переобучение персональных рекомендаций каждый день в 2:30 ночи
+    'train-course-recommendations': {
+        'task': 'courses.tasks.train_course_recommendations',
+        'schedule': crontab(minute=30, hour=2),
+    },
+    
     # Пересчет рейтингов каждый день в 4 часа ночи
     'recalculate-course-ratings': {
         'task': 'courses.tasks.recalculate_course_ratings',
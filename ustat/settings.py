@@ -5,6 +5,8 @@ Django settings for ustat project.
 from pathlib import Path
 import os
 
+from kombu import Queue
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -48,11 +50,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.profiling.ProfilingMiddleware',
+    'core.identity_map.IdentityMapMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.db_router.ReplicaPinningMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -85,6 +90,33 @@ DATABASES = {
     }
 }
 
+# Управление соединениями (core/db_connections.py): none, persistent или pooled.
+# Веб-воркеры держат соединение DB_CONN_MAX_AGE секунд с проверкой перед использованием,
+# воркеры Celery переключаются в CELERY_DB_CONNECTION_MODE при старте
+DB_CONNECTION_MODE = os.environ.get('DB_CONNECTION_MODE', 'persistent')
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+CELERY_DB_CONNECTION_MODE = os.environ.get('CELERY_DB_CONNECTION_MODE', 'pooled')
+DATABASES['default'].update({
+    'CONN_MAX_AGE': {'none': 0, 'persistent': DB_CONN_MAX_AGE, 'pooled': None}[DB_CONNECTION_MODE],
+    'CONN_HEALTH_CHECKS': DB_CONNECTION_MODE != 'none',
+})
+
+# Реплика только для чтения. Локально - отдельный файл SQLite,
+# который догоняет primary командой sync_sqlite_replica с заданной задержкой
+if os.environ.get('SQLITE_REPLICA_PATH'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['SQLITE_REPLICA_PATH'],
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+        'CONN_HEALTH_CHECKS': DATABASES['default']['CONN_HEALTH_CHECKS'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Чтение с реплик и закрепление клиента за primary после записи (core/db_router.py)
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_PRIMARY_PIN_SECONDS = 5
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -122,10 +154,77 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Custom user model
 AUTH_USER_MODEL = 'accounts.User'
 
+# Кэш: если задан REDIS_CACHE_URL, перед Redis ставится L1-кэш в памяти процесса,
+# инвалидация L1 между процессами идет через Redis pub/sub (core/cache.py)
+REDIS_CACHE_URL = os.environ.get('REDIS_CACHE_URL')
+if REDIS_CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.TwoLevelCache',
+            'OPTIONS': {
+                'L2_ALIAS': 'redis',
+                'L1_MAX_ENTRIES': 5000,
+                'L1_TIMEOUT': 5,
+                'INVALIDATION_CHANNEL': 'ustat:cache_invalidation',
+            },
+        },
+        'redis': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': REDIS_CACHE_URL,
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            },
+        },
+    }
+
+# Живая аналитика курсов (SSE): дельты счетчиков через Redis pub/sub.
+# Без REDIS_URL дельты доходят только до подписчиков того же процесса
+LIVE_ANALYTICS = {
+    'REDIS_URL': os.environ.get('LIVE_ANALYTICS_REDIS_URL', REDIS_CACHE_URL),
+    'CHANNEL_PREFIX': 'ustat:course_analytics:',
+    'COALESCE_SECONDS': 1.0,
+    'KEEPALIVE_SECONDS': 15,
+    'MAX_STREAM_SECONDS': 300,
+}
+
+# Профилирование запросов (core/profiling.py): доля запросов и/или
+# подписанный заголовок; профили в каталоге или в Redis
+PROFILING = {
+    'ENABLED': os.environ.get('PROFILING_ENABLED', '1') == '1',
+    'SAMPLE_RATE': float(os.environ.get('PROFILING_SAMPLE_RATE', 0)),
+    'INTERVAL_MS': 5,
+    'HEADER': 'X-Profile-Token',
+    'TOKEN_MAX_AGE': 3600,
+    'STORAGE': 'redis' if REDIS_CACHE_URL else 'local',
+    'DIRECTORY': os.path.join(BASE_DIR, 'profiles'),
+    'REDIS_URL': REDIS_CACHE_URL,
+    'MAX_PROFILES_PER_ENDPOINT': 20,
+}
+
+# Карта идентичности на время запроса или задачи (core/identity_map.py):
+# повторные загрузки по внешнему ключу и @memoize-методы не идут в БД.
+# Хранятся только модели из MODELS (по умолчанию core.identity_map.DEFAULTS)
+IDENTITY_MAP = {
+    'ENABLED': os.environ.get('IDENTITY_MAP_ENABLED', '1') == '1',
+}
+
+# Локальный кэш принципалов для core.api.security.JWTAuthentication.
+# Смена роли или блокировка меняет версию принципала в общем кэше: другие
+# процессы видят ее через канал инвалидации TwoLevelCache (не позже L1_TIMEOUT).
+# Поля пользователя вне core.api.security.PRINCIPAL_FIELDS загружаются
+# отдельным запросом при первом обращении
+JWT_PRINCIPAL_CACHE = {
+    'MAX_SIZE': 10000,
+    'TTL': 60,  # секунд; предел устаревания, если общий кэш недоступен
+}
+
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWT с локальным кэшем пользователей: без запроса к БД на каждый запрос.
+        # Заменяет rest_framework_simplejwt.authentication.JWTAuthentication;
+        # access-токены simplejwt принимаются, отозванные по token_version - нет
+        'core.api.security.JWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
@@ -160,6 +259,122 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# Очереди, маршруты и пресеты воркеров (core/celery_queues.py)
+CELERY_TASK_QUEUES = (
+    Queue('realtime'),
+    Queue('analytics'),
+    Queue('maintenance'),
+    Queue('bulk'),
+)
+CELERY_TASK_DEFAULT_QUEUE = 'realtime'
+CELERY_TASK_DEFAULT_PRIORITY = 5
+CELERY_TASK_ROUTES = (
+    'core.celery_queues.route_task',
+    {
+        'core.tasks.run_debounced': {'queue': 'realtime', 'priority': 1},
+        'core.tasks.relay_outbox': {'queue': 'realtime', 'priority': 1},
+        'core.tasks.purge_outbox': {'queue': 'maintenance', 'priority': 9},
+        'courses.tasks.update_course_analytics': {'queue': 'realtime', 'priority': 3},
+        'courses.tasks.update_course_student_stats': {'queue': 'realtime', 'priority': 4},
+        'courses.tasks.update_category_counts': {'queue': 'analytics', 'priority': 4},
+        'courses.tasks.update_course_rank_scores': {'queue': 'analytics', 'priority': 2},
+        'courses.tasks.train_course_recommendations': {'queue': 'analytics', 'priority': 6},
+        'courses.tasks.recalculate_course_ratings': {'queue': 'bulk', 'priority': 6},
+        'courses.tasks.rebuild_related_courses': {'queue': 'bulk', 'priority': 6},
+        'courses.tasks.cleanup_old_analytics_logs': {'queue': 'maintenance', 'priority': 9},
+    },
+)
+# rate_limit действует на каждый процесс воркера отдельно
+CELERY_TASK_ANNOTATIONS = {
+    'courses.tasks.update_course_analytics': {'rate_limit': '120/m'},
+    'courses.tasks.recalculate_course_ratings': {'rate_limit': '30/m'},
+    'courses.tasks.cleanup_old_analytics_logs': {'rate_limit': '10/m'},
+}
+# Приоритеты в Redis: 0 - наивысший; воркер нескольких очередей
+# берет задачи в порядке CELERY_TASK_QUEUES
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'priority_steps': list(range(10)),
+    'sep': ':',
+    'queue_order_strategy': 'priority',
+}
+CELERY_WORKER_PRESETS = {
+    'realtime': {'queues': ['realtime'], 'concurrency': 8, 'prefetch_multiplier': 4, 'max_tasks_per_child': 1000},
+    'analytics': {
+        'queues': ['analytics'], 'concurrency': 2, 'prefetch_multiplier': 1,
+        'max_tasks_per_child': 20, 'soft_time_limit': 900, 'time_limit': 1200,
+    },
+    'maintenance': {'queues': ['maintenance'], 'concurrency': 1, 'prefetch_multiplier': 1, 'time_limit': 900},
+    'bulk': {
+        'queues': ['bulk'], 'concurrency': 2, 'prefetch_multiplier': 1,
+        'max_tasks_per_child': 50, 'soft_time_limit': 1500, 'time_limit': 1800,
+    },
+    # Локальная разработка: один воркер на все очереди
+    'all': {'queues': ['realtime', 'analytics', 'maintenance', 'bulk'], 'concurrency': 2, 'prefetch_multiplier': 1},
+}
+# Размер порции для задач, которые идут по всем курсам или логам
+CELERY_BULK_CHUNK_SIZE = {
+    'courses': 500,
+    'analytics_logs': 5000,
+}
+
+# Метрики задач (core/celery_metrics.py): каждый процесс воркера отдает
+# их на первом свободном порту диапазона; пустое значение - без экспорта
+CELERY_METRICS_PORTS = os.environ.get('CELERY_METRICS_PORTS', '9200-9231')
+# Задачи дольше порога пишутся в лог вместе с аргументами
+CELERY_SLOW_TASK_SECONDS = float(os.environ.get('CELERY_SLOW_TASK_SECONDS', 10))
+
+# Запросы дольше порога (секунды) пишутся в лог декоратором monitor_db_query
+SLOW_QUERY_THRESHOLD = float(os.environ.get('SLOW_QUERY_THRESHOLD', 1))
+
+# Пересчеты по событиям с подавлением дублей (core/debounce.py): серия событий
+# по курсу или категории дает один запуск после QUIET_SECONDS тишины,
+# но не позже MAX_DELAY_SECONDS от первого события
+TASK_DEBOUNCE = {
+    'CACHE_ALIAS': 'redis' if REDIS_CACHE_URL else 'default',
+    'QUIET_SECONDS': 30,
+    'MAX_DELAY_SECONDS': 300,
+    'TASKS': {
+        'core.tasks.relay_outbox': {'QUIET_SECONDS': 1, 'MAX_DELAY_SECONDS': 5},
+        'courses.tasks.update_course_student_stats': {'QUIET_SECONDS': 10, 'MAX_DELAY_SECONDS': 60},
+        'courses.tasks.update_category_counts': {'QUIET_SECONDS': 60, 'MAX_DELAY_SECONDS': 600},
+    },
+}
+
+# Транзакционный outbox доменных событий (core/outbox.py, courses/events.py)
+OUTBOX = {
+    'BATCH_SIZE': 500,
+    'MAX_BATCHES': 20,
+    'MAX_ATTEMPTS': 10,
+    'RETRY_BASE_SECONDS': 5,
+    'RETRY_MAX_SECONDS': 3600,
+    'RETENTION_HOURS': 24,
+}
+
+# Ранжирование каталога курсов (см. courses/services/ranking.py)
+COURSE_RANKING = {
+    'PRIOR_REVIEWS': 10,
+    'PRIOR_ENROLLMENTS': 20,
+    'HALF_LIFE_DAYS': 14,
+    'WINDOW_DAYS': 90,
+    'RATING_WEIGHT': 0.5,
+    'VELOCITY_WEIGHT': 0.35,
+    'COMPLETION_WEIGHT': 0.15,
+}
+
+# Похожие курсы (см. courses/services/related.py)
+RELATED_COURSES = {
+    'TOP_K': 10,
+    'TAG_WEIGHT': 0.45,
+    'ENROLLMENT_WEIGHT': 0.45,
+    'CATEGORY_WEIGHT': 0.1,
+}
+
+# Персональные рекомендации курсов (item-item коллаборативная фильтрация)
+COURSE_RECOMMENDATIONS = {
+    'TOP_N': 20,
+    'NEIGHBORS': 50,
+}
+
 # CKEditor 5 settings
 CKEDITOR_5_CONFIGS = {
     'default': {
@@ -26,6 +26,8 @@ urlpatterns = [
     path('api/courses/', include('courses.api.urls')),
     path('api/reviews/', include('reviews.api.urls')),
     path('api/analytics/', include('analytics.api.urls')),
+    path('api/async/', include('ustat.async_urls')),
+    path('api/', include('core.api.urls')),
     
     # App URLs
     path('', include('accounts.urls')),